@@ -0,0 +1,42 @@
+import os
+
+# Password storage. method is a werkzeug.security method string; stored
+# hashes made with another method (or plaintext rows from before hashing)
+# are replaced on the user's next successful login.
+# Hashing runs off the request's green thread: at most `workers` at a time,
+# and with more than max_pending logins/signups waiting new ones get a 503.
+PASSWORD_HASH_CONFIG = {
+    'method': os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'),
+    'workers': int(os.getenv('PASSWORD_HASH_WORKERS', 2)),
+    'max_pending': int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64))
+}
+
+# Signed session tokens issued at login and checked without a query.
+# secrets: comma separated; the last one signs, the others are still
+# accepted (rotate by appending a new secret, drop the old one after ttl).
+# Every process must share them: set SESSION_TOKEN_SECRETS whenever
+# WEB_CONCURRENCY > 1 or SOCKETIO_MESSAGE_QUEUE is set, or the app refuses
+# to start. A single process without any signs with a random secret, and
+# its tokens stop working when it restarts.
+# revocation_refresh: how stale another process's view of logouts may be.
+SESSION_TOKEN_CONFIG = {
+    'secrets': [s for s in os.getenv('SESSION_TOKEN_SECRETS', '').split(',') if s],
+    'ttl': int(os.getenv('SESSION_TOKEN_TTL', 12 * 3600)),
+    'revocation_refresh': float(os.getenv('SESSION_REVOCATION_REFRESH', 30))
+}
+
+# GET /api/auth/me?email= from before session tokens. Deprecated: it answers
+# without authentication, so it is limited to per_minute lookups per client
+# address (per process) and does not return the user's id. enabled=false
+# turns it off; clients then need a Bearer token.
+LEGACY_USER_LOOKUP_CONFIG = {
+    'enabled': os.getenv('LEGACY_USER_LOOKUP', 'true').lower() in ('1', 'true', 'yes'),
+    'per_minute': int(os.getenv('LEGACY_USER_LOOKUP_PER_MINUTE', 10))
+}
+
+# Bearer tokens (comma separated) for internal and admin endpoints such as
+# POST /api/master-data/cache/invalidate. With none set those endpoints
+# answer 403 to everyone.
+ADMIN_API_CONFIG = {
+    'tokens': [t for t in os.getenv('ADMIN_API_TOKENS', '').split(',') if t]
+}
@@ -0,0 +1,9 @@
+import os
+
+# Booking API limits
+BOOKING_CONFIG = {
+    # Largest number of desk/slot/date items in one /api/bookings/bulk request
+    'max_items': int(os.getenv('BOOKING_MAX_ITEMS', 100)),
+    # How far ahead a desk can be booked
+    'max_days_ahead': int(os.getenv('BOOKING_MAX_DAYS_AHEAD', 90))
+}
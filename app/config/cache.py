@@ -0,0 +1,16 @@
+import os
+
+# In-process cache for MasterData (locations, slots, desk types)
+# listen: hold a LISTEN connection per process so an invalidation reaches
+#   every process at once; without it the others catch up within ttl.
+MASTER_DATA_CACHE_CONFIG = {
+    'ttl': float(os.getenv('MASTER_DATA_CACHE_TTL', 3600)),
+    'maxsize': int(os.getenv('MASTER_DATA_CACHE_MAXSIZE', 16)),
+    'listen': os.getenv('MASTER_DATA_CACHE_LISTEN', 'true').lower() in ('1', 'true', 'yes')
+}
+
+# Response compression for the JSON API (gzip/deflate, negotiated per request)
+HTTP_COMPRESSION_CONFIG = {
+    'min_size': int(os.getenv('HTTP_COMPRESSION_MIN_SIZE', 1024)),
+    'level': int(os.getenv('HTTP_COMPRESSION_LEVEL', 6))
+}
@@ -1,9 +1,25 @@
 import os
 
 DB_CONFIG = {
-    'host': 'dpg-ctlpcvrqf0us7389o680-a.singapore-postgres.render.com',
+    'host': os.getenv('DB_HOST', 'dpg-ctlpcvrqf0us7389o680-a.singapore-postgres.render.com'),
     'port': os.getenv('DB_PORT', 5432),
-    'dbname': 'sena',
-    'user': 'admin',
-    'password': 'kbOZpYYBZLfoeQRlBFajBfxi8A2JwPwk'
-}
\ No newline at end of file
+    'dbname': os.getenv('DB_NAME', 'sena'),
+    'user': os.getenv('DB_USER', 'admin'),
+    'password': os.getenv('DB_PASSWORD', 'kbOZpYYBZLfoeQRlBFajBfxi8A2JwPwk')
+}
+
+# Connection pool sizing and timeouts (seconds)
+DB_POOL_CONFIG = {
+    'minconn': int(os.getenv('DB_POOL_MIN', 1)),
+    'maxconn': int(os.getenv('DB_POOL_MAX', 10)),
+    'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+    'checkout_timeout': float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 10)),
+    'health_check_interval': float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+    'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))
+}
+
+# Identical concurrent reads in model methods marked @coalesce share one
+# query (app/utils/coalesce.py); off runs every call on its own
+DB_COALESCE_CONFIG = {
+    'enabled': os.getenv('DB_COALESCE', 'true').lower() in ('1', 'true', 'yes')
+}
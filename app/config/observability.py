@@ -0,0 +1,15 @@
+import os
+
+# Prometheus metrics served at /metrics
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+}
+
+# Application logging. A message (by its format string) is logged at most
+# rate_limit_burst times per rate_limit_period seconds; repeats beyond that
+# are counted and reported with the next one that gets through.
+LOGGING_CONFIG = {
+    'level': os.getenv('LOG_LEVEL', 'INFO').upper(),
+    'rate_limit_burst': int(os.getenv('LOG_RATE_LIMIT_BURST', 5)),
+    'rate_limit_period': float(os.getenv('LOG_RATE_LIMIT_PERIOD', 60))
+}
@@ -0,0 +1,73 @@
+import os
+
+# Desk availability push settings.
+# mode: 'notify' reacts to Postgres NOTIFY from the desk triggers,
+#       'poll' reruns the availability query every poll_interval seconds.
+DESK_UPDATES_CONFIG = {
+    'mode': os.getenv('DESK_UPDATE_MODE', 'notify'),
+    'poll_interval': float(os.getenv('DESK_POLL_INTERVAL', 5)),
+    'notify_debounce': float(os.getenv('DESK_NOTIFY_DEBOUNCE', 0.1)),
+    'reconnect_delay': float(os.getenv('DESK_NOTIFY_RECONNECT_DELAY', 5)),
+    'max_dates_per_client': int(os.getenv('DESK_MAX_DATES_PER_CLIENT', 31)),
+    # Deltas kept per date for clients resuming from a version, and how long
+    # a date's state is kept after its last subscriber leaves
+    'delta_history': int(os.getenv('DESK_DELTA_HISTORY', 50)),
+    'state_retention': float(os.getenv('DESK_STATE_RETENTION', 300)),
+    # A subscribing client is sent the stored desk list without a query
+    # when it was read less than snapshot_max_age seconds ago or, while the
+    # NOTIFY listener is connected and nothing changed for that date since,
+    # less than snapshot_max_age_listening seconds ago
+    'snapshot_max_age': float(os.getenv('DESK_SNAPSHOT_MAX_AGE', 10)),
+    'snapshot_max_age_listening': float(os.getenv('DESK_SNAPSHOT_MAX_AGE_LISTENING', 300))
+}
+
+# /api/desks: largest page a client can ask for with ?limit=, and the
+# longest date range for /api/desks/range as one document / as a stream
+DESK_API_CONFIG = {
+    'max_page_size': int(os.getenv('DESK_MAX_PAGE_SIZE', 500)),
+    'max_range_days': int(os.getenv('DESK_MAX_RANGE_DAYS', 31)),
+    'max_stream_range_days': int(os.getenv('DESK_MAX_STREAM_RANGE_DAYS', 366))
+}
+
+# Serve DeskData from the materialized sena.desk_daily_availability
+# (migrations/004) for dates it covers; other dates are derived live
+DESK_READ_MODEL_CONFIG = {
+    'enabled': os.getenv('DESK_READ_MODEL', 'false').lower() in ('1', 'true', 'yes'),
+    # Default window for python -m app.utils.availability_read_model rebuild
+    'window_days': int(os.getenv('DESK_READ_MODEL_WINDOW_DAYS', 60))
+}
+
+# Running more than one app process (gunicorn workers or nodes).
+# message_queue: '' for a single process, 'postgres' to relay Socket.IO emits
+#   through sena.socketio_messages (migrations/006), or a redis:// URL (needs
+#   the redis package). With a queue, one process is elected with a Postgres
+#   advisory lock to compute availability and broadcast it; the others
+#   forward their clients' subscriptions to it.
+# transports: clients of a multi-process deployment must stick to one
+#   process; without a sticky load balancer allow only 'websocket'.
+DESK_CLUSTER_CONFIG = {
+    'message_queue': os.getenv('SOCKETIO_MESSAGE_QUEUE', ''),
+    'channel': os.getenv('SOCKETIO_CHANNEL', 'sena_socketio'),
+    'transports': os.getenv('SOCKETIO_TRANSPORTS', 'polling,websocket').split(','),
+    'heartbeat_interval': float(os.getenv('DESK_CLUSTER_HEARTBEAT_INTERVAL', 5)),
+    'leader_retry_interval': float(os.getenv('DESK_LEADER_RETRY_INTERVAL', 5)),
+    # How long Postgres queue rows are kept for processes catching up
+    'message_retention': float(os.getenv('SOCKETIO_MESSAGE_RETENTION', 60))
+}
+
+# Per-client outbound limits for Socket.IO. A client is behind when more
+# than max_queued packets wait in its transport queue; further emits to it
+# are held in an outbox where a newer desk list replaces an older one for the
+# same date. Deltas cannot be merged: when the outbox exceeds its limits
+# they are dropped and the client is sent a fresh snapshot instead.
+# policy: 'disconnect' drops clients still over the limits after that, or
+#   that make no progress for stuck_timeout seconds; 'keep' never does.
+SOCKETIO_BACKPRESSURE_CONFIG = {
+    'enabled': os.getenv('SOCKETIO_BACKPRESSURE', 'true').lower() in ('1', 'true', 'yes'),
+    'max_queued': int(os.getenv('SOCKETIO_MAX_QUEUED_PACKETS', 2)),
+    'max_buffer_packets': int(os.getenv('SOCKETIO_MAX_BUFFER_PACKETS', 100)),
+    'max_buffer_bytes': int(os.getenv('SOCKETIO_MAX_BUFFER_BYTES', 8 * 1024 * 1024)),
+    'stuck_timeout': float(os.getenv('SOCKETIO_STUCK_TIMEOUT', 60)),
+    'policy': os.getenv('SOCKETIO_SLOW_CLIENT_POLICY', 'disconnect'),
+    'pump_interval': float(os.getenv('SOCKETIO_PUMP_INTERVAL', 0.05))
+}
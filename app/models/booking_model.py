@@ -0,0 +1,135 @@
+from typing import Dict, List, NamedTuple, Tuple
+from psycopg2 import errors
+from app.utils.db_utils import db_connection
+from app.config.database import DB_CONFIG
+
+BOOKED_STATUS = 'booked'
+# Bookings in this status no longer hold their slot (see uq_booking_transactions_live_slot)
+CANCELLED_STATUS = 'cancelled'
+
+class BookingItem(NamedTuple):
+    desk_id: int
+    slot_id: int
+    booking_date: str
+
+class Booking:
+    @staticmethod
+    def create_bookings(user_id: str, items: List[BookingItem], all_or_nothing: bool = True) -> Tuple[Dict, int]:
+        """
+        Reserve every (desk, slot, date) in items for user_id with a single
+        INSERT in one transaction. Double bookings are rejected by the unique
+        index on live bookings: ON CONFLICT DO NOTHING skips slots that are
+        already held, including by a transaction that commits while this one
+        waits, so no read-then-write locking is needed.
+        With all_or_nothing, any item that cannot be booked rolls back the lot.
+        Returns: Tuple of ({"bookings", "conflicts", "invalid"}, status_code);
+        201 when every item was booked, 200 when only some were
+        """
+        items = list(dict.fromkeys(items))
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return {"error": "Database connection failed"}, 500
+
+            try:
+                cursor = conn.cursor()
+                # Rows are inserted in (desk, date, slot) order so concurrent
+                # multi-item requests wait on each other in a consistent order
+                cursor.execute("""
+                    WITH requested AS (
+                        SELECT r.idx, r.desk_id, r.slot_id, r.booking_date
+                        FROM unnest(%(desk_ids)s::int[], %(slot_ids)s::int[], %(dates)s::date[])
+                            WITH ORDINALITY AS r (desk_id, slot_id, booking_date, idx)
+                    ),
+                    valid AS (
+                        SELECT rq.*
+                        FROM requested AS rq
+                        JOIN sena.desks AS d ON d.id = rq.desk_id
+                        JOIN sena.slot_master AS sm ON sm.id = rq.slot_id
+                    ),
+                    inserted AS (
+                        INSERT INTO sena.booking_transactions
+                            (desk_id, slot_id, user_id, status, booking_date, created_at, updated_at)
+                        SELECT v.desk_id, v.slot_id, %(user_id)s, %(status)s, v.booking_date, now(), now()
+                        FROM valid AS v
+                        ORDER BY v.desk_id, v.booking_date, v.slot_id
+                        ON CONFLICT (desk_id, slot_id, booking_date) WHERE status <> 'cancelled' DO NOTHING
+                        RETURNING id, desk_id, slot_id, booking_date
+                    )
+                    SELECT rq.desk_id, rq.slot_id, rq.booking_date, i.id, v.idx IS NOT NULL
+                    FROM requested AS rq
+                    LEFT JOIN valid AS v ON v.idx = rq.idx
+                    LEFT JOIN inserted AS i
+                        ON i.desk_id = rq.desk_id
+                        AND i.slot_id = rq.slot_id
+                        AND i.booking_date = rq.booking_date
+                    ORDER BY rq.idx
+                """, {
+                    "desk_ids": [item.desk_id for item in items],
+                    "slot_ids": [item.slot_id for item in items],
+                    "dates": [item.booking_date for item in items],
+                    "user_id": user_id,
+                    "status": BOOKED_STATUS
+                })
+
+                bookings, conflicts, invalid = [], [], []
+                for desk_id, slot_id, booking_date, booking_id, is_valid in cursor.fetchall():
+                    item = {"desk_id": desk_id, "slot_id": slot_id, "date": booking_date.isoformat()}
+                    if booking_id is not None:
+                        bookings.append(dict(item, booking_id=booking_id, status=BOOKED_STATUS))
+                    elif is_valid:
+                        conflicts.append(item)
+                    else:
+                        invalid.append(item)
+                result = {"bookings": bookings, "conflicts": conflicts, "invalid": invalid}
+
+                if conflicts or invalid:
+                    if all_or_nothing or not bookings:
+                        conn.rollback()
+                        result["bookings"] = []
+                        result["error"] = "Slot already booked" if conflicts else "Unknown desk or slot"
+                        return result, 409 if conflicts else 404
+                    conn.commit()
+                    return result, 200
+                conn.commit()
+                return result, 201
+
+            except errors.ForeignKeyViolation:
+                conn.rollback()
+                return {"error": "User not found"}, 404
+            except Exception as e:
+                conn.rollback()
+                return {"error": f"Failed to create booking: {str(e)}"}, 500
+
+    @staticmethod
+    def cancel_booking(booking_id: int, user_id: str) -> Tuple[Dict, int]:
+        """
+        Cancel one of user_id's bookings, which frees its slot
+        Returns: Tuple of (booking_dict, status_code)
+        """
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return {"error": "Database connection failed"}, 500
+
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE sena.booking_transactions
+                    SET status = %s, updated_at = now()
+                    WHERE id = %s AND user_id = %s AND status <> %s
+                    RETURNING id, desk_id, slot_id, booking_date
+                """, (CANCELLED_STATUS, booking_id, user_id, CANCELLED_STATUS))
+                row = cursor.fetchone()
+                conn.commit()
+                if not row:
+                    return {"error": "Booking not found"}, 404
+                return {
+                    "booking_id": row[0],
+                    "desk_id": row[1],
+                    "slot_id": row[2],
+                    "date": row[3].isoformat(),
+                    "status": CANCELLED_STATUS
+                }, 200
+
+            except Exception as e:
+                conn.rollback()
+                return {"error": f"Failed to cancel booking: {str(e)}"}, 500
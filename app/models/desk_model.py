@@ -1,126 +1,634 @@
-from typing import Dict, List, Tuple
-from app.utils.db_utils import get_db_connection
+import json
+import math
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.utils.db_utils import db_connection
 from app.config.database import DB_CONFIG
+from app.config.realtime import DESK_READ_MODEL_CONFIG
+from app.utils.coalesce import coalesce
+from app.utils.raw_json import RawJSON
+
+class DeskFilters:
+    """
+    Filters for desk availability, applied inside the SQL.
+
+    Desk-level filters (city, building, floor, desk type, desk status) select
+    desks. Slot-level filters (slot_type, max_price) limit the slots listed
+    for each desk, and drop desks that have no matching slot; only_available
+    additionally requires one of those slots to be free on the date.
+    Results are ordered by desk_id; `after` and `limit` page through them
+    (keyset pagination, pass the previous page's next_cursor as `after`).
+    """
+
+    def __init__(
+        self,
+        city: Optional[str] = None,
+        building: Optional[str] = None,
+        floor: Optional[int] = None,
+        desk_type_id: Optional[int] = None,
+        status: Optional[str] = None,
+        slot_type: Optional[str] = None,
+        max_price: Optional[float] = None,
+        only_available: bool = False,
+        desk_ids: Optional[List[int]] = None,
+        after: Optional[int] = None,
+        limit: Optional[int] = None
+    ):
+        self.city = city
+        self.building = building
+        self.floor = floor
+        self.desk_type_id = desk_type_id
+        self.status = status
+        self.slot_type = slot_type
+        self.max_price = max_price
+        self.only_available = only_available
+        self.desk_ids = desk_ids
+        self.after = after
+        self.limit = limit
+
+    @staticmethod
+    def from_args(args, max_limit: int) -> 'DeskFilters':
+        """
+        Build filters from request query parameters; raises ValueError on bad input
+        """
+        def optional(name, cast):
+            value = args.get(name)
+            if value is None or value == '':
+                return None
+            # Postgres text cannot hold NUL, so the query would fail on it
+            if '\x00' in value:
+                raise ValueError(f"Invalid value for '{name}'")
+            try:
+                return cast(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for '{name}'")
+
+        limit = optional('limit', int)
+        if limit is not None and limit < 1:
+            raise ValueError("Invalid value for 'limit'")
+        max_price = optional('max_price', float)
+        if max_price is not None and not math.isfinite(max_price):
+            raise ValueError("Invalid value for 'max_price'")
+        return DeskFilters(
+            city=optional('city', str),
+            building=optional('building', str),
+            floor=optional('floor', int),
+            desk_type_id=optional('desk_type_id', int),
+            status=optional('status', str),
+            slot_type=optional('slot_type', str),
+            max_price=max_price,
+            only_available=args.get('only_available', '').lower() in ('1', 'true', 'yes'),
+            after=optional('after', int),
+            limit=min(limit, max_limit) if limit is not None else None
+        )
+
+    def has_slot_filters(self) -> bool:
+        return self.slot_type is not None or self.max_price is not None or self.only_available
+
+    def to_sql(self, price_column: str = "dp.price") -> Tuple[str, str, Dict]:
+        """
+        Returns (desk_conditions, slot_conditions, params). desk_conditions
+        apply to sena.desks d / buildings b / locations l; slot_conditions to
+        slot_master sm and the price in price_column (desk_pricing dp by default).
+        """
+        params = {}
+        desk_conditions = ["true"]
+        if self.city is not None:
+            desk_conditions.append("LOWER(l.name) = LOWER(%(city)s)")
+            params['city'] = self.city
+        if self.building is not None:
+            desk_conditions.append("LOWER(b.name) = LOWER(%(building)s)")
+            params['building'] = self.building
+        if self.floor is not None:
+            desk_conditions.append("d.floor_number = %(floor)s")
+            params['floor'] = self.floor
+        if self.desk_type_id is not None:
+            desk_conditions.append("d.desk_type_id = %(desk_type_id)s")
+            params['desk_type_id'] = self.desk_type_id
+        if self.status is not None:
+            desk_conditions.append("d.status = %(status)s")
+            params['status'] = self.status
+        if self.desk_ids is not None:
+            desk_conditions.append("d.id = ANY(%(desk_ids)s)")
+            params['desk_ids'] = list(self.desk_ids)
+        if self.after is not None:
+            desk_conditions.append("d.id > %(after)s")
+            params['after'] = self.after
+
+        slot_conditions = ["true"]
+        if self.slot_type is not None:
+            slot_conditions.append("LOWER(sm.slot_type) = LOWER(%(slot_type)s)")
+            params['slot_type'] = self.slot_type
+        if self.max_price is not None:
+            slot_conditions.append(f"{price_column} <= %(max_price)s")
+            params['max_price'] = self.max_price
+        return " AND ".join(desk_conditions), " AND ".join(slot_conditions), params
 
 class DeskData:
     @staticmethod
-    def get_desk_availability(target_date: str = None) -> Tuple[Dict, int]:
+    def get_desk_availability(
+        target_date: str = None,
+        desk_ids: List[int] = None,
+        filters: Optional[DeskFilters] = None
+    ) -> Tuple[Dict, int]:
         """
         Get desk availability data with slots and pricing for a specific date.
         If no date is provided, it defaults to the current date.
+        If desk_ids is given, only those desks are returned.
+        filters narrows the result further; when it sets a limit the result
+        also carries next_cursor (None on the last page).
+        Slots come from the desk_daily_availability read model when it is
+        enabled and covers the date, otherwise they are derived from bookings.
         Returns: Tuple of (desk_data_dict, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
-        if not conn:
-            return {"error": "Database connection failed"}, 500
-
-        try:
-            cursor = conn.cursor()
-            # Use CURRENT_DATE if target_date is not provided
-            date_condition = f"AND bt.updated_at::date = '{target_date}'" if target_date else "AND bt.updated_at::date = CURRENT_DATE"
-            
-            cursor.execute(f"""
-                WITH desk_details AS (
-                    SELECT 
-                        d.id AS desk_id,
-                        d.name AS desk_name,
-                        d.floor_number,
-                        d.capacity,
-                        d.description,
-                        d.status AS desk_status,
-                        b.name AS building_name,
-                        b.address AS building_address,
-                        b.amenities,
-                        b.operating_hours,
-                        l.name AS city,
-                        d.desk_type_id
-                    FROM sena.desks AS d
-                    LEFT JOIN sena.buildings AS b ON b.id = d.building_id
-                    LEFT JOIN sena.locations AS l ON l.id = d.location_id
-                ),
-                slot_status AS (
-                    SELECT 
-                        sm.id AS slot_id,
-                        sm.slot_type,
-                        sm.start_time,
-                        sm.end_time,
-                        sm.time_zone,
-                        d.id AS desk_id,
-                        COALESCE(bt.status, 'available') AS slot_status
-                    FROM sena.slot_master AS sm
-                    CROSS JOIN sena.desks AS d
-                    LEFT JOIN sena.booking_transactions AS bt 
-                        ON sm.id = bt.slot_id
-                        AND d.id = bt.desk_id
-                        {date_condition}
-                ),
-                desk_pricing AS (
-                    SELECT 
-                        dp.desk_type_id,
-                        dp.slot_id,
-                        dp.price
-                    FROM sena.desk_pricing AS dp
-                    WHERE dp.is_active = true
-                ),
-                slots_with_pricing AS (
-                    SELECT 
-                        ss.slot_id,
-                        ss.slot_type,
-                        ss.start_time,
-                        ss.end_time,
-                        ss.time_zone,
-                        ss.desk_id,
-                        ss.slot_status,
-                        dp.price
-                    FROM slot_status AS ss
-                    LEFT JOIN desk_pricing AS dp 
-                        ON dp.slot_id = ss.slot_id
-                        AND dp.desk_type_id = (SELECT desk_type_id FROM sena.desks WHERE id = ss.desk_id)
+        desk_data, status_code = DeskData.get_desk_availability_json(target_date, desk_ids, filters)
+        if status_code == 200:
+            # The result may be shared with concurrent callers, so it is copied
+            desk_data = dict(desk_data, desks=json.loads(desk_data["desks"].text))
+        return desk_data, status_code
+
+    @staticmethod
+    @coalesce('desk_availability')
+    def get_desk_availability_json(
+        target_date: str = None,
+        desk_ids: List[int] = None,
+        filters: Optional[DeskFilters] = None
+    ) -> Tuple[Dict, int]:
+        """
+        Same as get_desk_availability, but "desks" is the JSON text built by
+        Postgres wrapped in RawJSON, to be sent on without decoding it
+        (see app.utils.raw_json).
+        """
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return {"error": "Database connection failed"}, 500
+
+            try:
+                cursor = conn.cursor()
+                filters = DeskData._execute_availability(cursor, target_date, desk_ids, filters, per_desk=False)
+                desks_json, has_more, last_desk_id = cursor.fetchone()
+                desk_data = {"desks": RawJSON(desks_json)}
+                if filters.limit is not None:
+                    desk_data["next_cursor"] = last_desk_id if has_more else None
+                return desk_data, 200
+
+            except Exception as e:
+                return {"error": f"Failed to fetch desk data: {str(e)}"}, 500
+
+    @staticmethod
+    @coalesce('desk_json_by_id')
+    def get_desk_json_by_id(target_date: str = None, desk_ids: List[int] = None) -> Tuple[Dict, int]:
+        """
+        Each desk's JSON text (as in get_desk_availability_json) keyed by
+        desk_id. Equal data gives equal text, so changes can be found by
+        comparing strings.
+        Returns: Tuple of ({desk_id: json_text}, status_code)
+        """
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return {"error": "Database connection failed"}, 500
+
+            try:
+                cursor = conn.cursor()
+                DeskData._execute_availability(cursor, target_date, desk_ids, None, per_desk=True)
+                return dict(cursor.fetchall()), 200
+
+            except Exception as e:
+                return {"error": f"Failed to fetch desk data: {str(e)}"}, 500
+
+    @staticmethod
+    def _execute_availability(
+        cursor,
+        target_date: Optional[str],
+        desk_ids: Optional[List[int]],
+        filters: Optional[DeskFilters],
+        per_desk: bool
+    ) -> DeskFilters:
+        """
+        Run the availability query on cursor. The result is one row of
+        (desks JSON array text, has_more, last_desk_id), or with per_desk one
+        (desk_id, desk JSON text) row per desk. Returns the filters used.
+        """
+        filters = filters or DeskFilters()
+        if desk_ids is not None:
+            filters.desk_ids = desk_ids
+
+        use_read_model = False
+        if DESK_READ_MODEL_CONFIG['enabled']:
+            cursor.execute("""
+                SELECT EXISTS (
+                    SELECT 1 FROM sena.desk_availability_days
+                    WHERE day = COALESCE(%s::date, CURRENT_DATE)
                 )
-                SELECT 
-                    JSON_AGG(
-                        JSON_BUILD_OBJECT(
-                            'desk_id', dd.desk_id,
-                            'desk_name', dd.desk_name,
-                            'floor_number', dd.floor_number,
-                            'capacity', dd.capacity,
-                            'description', dd.description,
-                            'desk_status', dd.desk_status,
-                            'building_name', dd.building_name,
-                            'building_address', dd.building_address,
-                            'amenities', dd.amenities,
-                            'operating_hours', dd.operating_hours,
-                            'city', dd.city,
-                            'slots', (
-                                SELECT JSON_AGG(
-                                    JSON_BUILD_OBJECT(
-                                        'slot_id', sp.slot_id,
-                                        'slot_type', sp.slot_type,
-                                        'start_time', sp.start_time,
-                                        'end_time', sp.end_time,
-                                        'time_zone', sp.time_zone,
-                                        'status', sp.slot_status,
-                                        'price', sp.price
-                                    )
-                                )
-                                FROM slots_with_pricing AS sp
-                                WHERE sp.desk_id = dd.desk_id
-                            )
-                        )
-                    ) AS desks_json
-                FROM desk_details AS dd;
-            """)
-            
-            result = cursor.fetchone()
-            if not result or not result[0]:
-                return {"desks": []}, 200
-
-            print(f"Debug: Type of result[0]: {type(result[0])}")
-            print(f"Debug: Value of result[0]: {result[0]}")
-            desks_data = result[0]
-            return {"desks": desks_data}, 200
-
-        except Exception as e:
-            return {"error": f"Failed to fetch desk data: {str(e)}"}, 500
-        finally:
-            conn.close() 
\ No newline at end of file
+            """, (target_date,))
+            use_read_model = cursor.fetchone()[0]
+
+        if use_read_model:
+            slot_exists, slot_ctes, params = DeskData._read_model_fragments(filters)
+        else:
+            slot_exists, slot_ctes, params = DeskData._live_fragments(filters)
+        desk_conditions, _, _ = filters.to_sql()
+        params.update({
+            "target_date": target_date,
+            # One extra row tells whether another page follows; LIMIT NULL is no limit
+            "page_limit": filters.limit + 1 if filters.limit is not None else None,
+            "limit": filters.limit
+        })
+
+        # The JSON is returned as text so psycopg2 leaves it undecoded
+        if per_desk:
+            output = """
+                    SELECT dj.id, dj.desk::text
+                    FROM desk_json AS dj
+                    ORDER BY dj.id;"""
+        else:
+            output = """
+                    SELECT
+                        COALESCE(JSON_AGG(dj.desk ORDER BY dj.id), '[]')::text AS desks_json,
+                        (SELECT COUNT(*) FROM matching) > COUNT(*) AS has_more,
+                        MAX(dj.id) AS last_desk_id
+                    FROM desk_json AS dj;"""
+
+        cursor.execute(f"""
+                    WITH target AS (
+                        SELECT COALESCE(%(target_date)s::date, CURRENT_DATE) AS day
+                    ),
+                    matching AS (
+                        SELECT d.id
+                        FROM sena.desks AS d
+                        LEFT JOIN sena.buildings AS b ON b.id = d.building_id
+                        LEFT JOIN sena.locations AS l ON l.id = d.location_id
+                        CROSS JOIN target AS t
+                        WHERE {desk_conditions}{slot_exists}
+                        ORDER BY d.id
+                        LIMIT %(page_limit)s
+                    ),
+                    page AS (
+                        SELECT id FROM matching ORDER BY id LIMIT %(limit)s
+                    ),{slot_ctes},
+                    desk_json AS (
+                        SELECT
+                            d.id,
+                            JSON_BUILD_OBJECT(
+                                'desk_id', d.id,
+                                'desk_name', d.name,
+                                'floor_number', d.floor_number,
+                                'capacity', d.capacity,
+                                'description', d.description,
+                                'desk_status', d.status,
+                                'building_name', b.name,
+                                'building_address', b.address,
+                                'amenities', b.amenities,
+                                'operating_hours', b.operating_hours,
+                                'city', l.name,
+                                'slots', ds.slots
+                            ) AS desk
+                        FROM page AS p
+                        JOIN sena.desks AS d ON d.id = p.id
+                        LEFT JOIN sena.buildings AS b ON b.id = d.building_id
+                        LEFT JOIN sena.locations AS l ON l.id = d.location_id
+                        LEFT JOIN desk_slots AS ds ON ds.desk_id = d.id
+                    ){output}
+        """, params)
+        return filters
+
+    # JSON for one slot of a desk; status and price come from the fragments
+    _SLOT_JSON = """
+                                JSON_BUILD_OBJECT(
+                                    'slot_id', sm.id,
+                                    'slot_type', sm.slot_type,
+                                    'start_time', sm.start_time,
+                                    'end_time', sm.end_time,
+                                    'time_zone', sm.time_zone,
+                                    'status', {status},
+                                    'price', {price}
+                                ) ORDER BY sm.id"""
+
+    @staticmethod
+    def _live_fragments(filters: DeskFilters) -> Tuple[str, str, Dict]:
+        """
+        (slot_exists, slot_ctes, params) deriving slots from booking_transactions
+        """
+        _, slot_conditions, params = filters.to_sql()
+
+        # With slot filters a desk only qualifies through a matching slot. The
+        # check is a per-desk EXISTS served by the (desk_id, booking_date)
+        # booking index, so with a limit the scan stops once a page is full.
+        slot_exists = ""
+        if filters.has_slot_filters():
+            free_slot = """
+                                AND NOT EXISTS (
+                                    SELECT 1
+                                    FROM sena.booking_transactions AS bt
+                                    WHERE bt.desk_id = d.id
+                                        AND bt.slot_id = sm.id
+                                        AND bt.booking_date = t.day
+                                        AND bt.status <> 'cancelled'
+                                )""" if filters.only_available else ""
+            slot_exists = f"""
+                        AND EXISTS (
+                            SELECT 1
+                            FROM sena.slot_master AS sm
+                            LEFT JOIN sena.desk_pricing AS dp
+                                ON dp.desk_type_id = d.desk_type_id
+                                AND dp.slot_id = sm.id
+                                AND dp.is_active = true
+                            WHERE {slot_conditions}{free_slot}
+                        )"""
+
+        # Bookings are looked up by booking_date through the
+        # (booking_date, desk_id, slot_id) index; the latest booking wins when a
+        # desk/slot has several that day. Cancelled bookings free their slot,
+        # as in uq_booking_transactions_live_slot. Slots are aggregated for the
+        # selected page of desks in a single grouped pass.
+        slot_json = DeskData._SLOT_JSON.format(status="COALESCE(bk.status, 'available')", price="dp.price")
+        slot_ctes = f"""
+                    booked AS (
+                        SELECT DISTINCT ON (bt.desk_id, bt.slot_id)
+                            bt.desk_id,
+                            bt.slot_id,
+                            bt.status
+                        FROM sena.booking_transactions AS bt, target AS t
+                        WHERE bt.booking_date = t.day
+                            AND bt.desk_id IN (SELECT id FROM page)
+                            AND bt.status <> 'cancelled'
+                        ORDER BY bt.desk_id, bt.slot_id, bt.updated_at DESC
+                    ),
+                    desk_slots AS (
+                        SELECT
+                            d.id AS desk_id,
+                            JSON_AGG({slot_json}
+                            ) AS slots
+                        FROM page AS p
+                        JOIN sena.desks AS d ON d.id = p.id
+                        CROSS JOIN sena.slot_master AS sm
+                        LEFT JOIN booked AS bk
+                            ON bk.desk_id = d.id
+                            AND bk.slot_id = sm.id
+                        LEFT JOIN sena.desk_pricing AS dp
+                            ON dp.desk_type_id = d.desk_type_id
+                            AND dp.slot_id = sm.id
+                            AND dp.is_active = true
+                        WHERE {slot_conditions}
+                        GROUP BY d.id
+                    )"""
+        return slot_exists, slot_ctes, params
+
+    @staticmethod
+    def _read_model_fragments(filters: DeskFilters) -> Tuple[str, str, Dict]:
+        """
+        (slot_exists, slot_ctes, params) reading slots from desk_daily_availability:
+        one primary key range per desk, whatever the size of the booking table
+        """
+        _, slot_conditions, params = filters.to_sql(price_column="a.price")
+
+        slot_exists = ""
+        if filters.has_slot_filters():
+            free_slot = """
+                                AND a.status = 'available'""" if filters.only_available else ""
+            slot_exists = f"""
+                        AND EXISTS (
+                            SELECT 1
+                            FROM sena.desk_daily_availability AS a
+                            JOIN sena.slot_master AS sm ON sm.id = a.slot_id
+                            WHERE a.day = t.day
+                                AND a.desk_id = d.id
+                                AND {slot_conditions}{free_slot}
+                        )"""
+
+        slot_json = DeskData._SLOT_JSON.format(status="a.status", price="a.price")
+        slot_ctes = f"""
+                    desk_slots AS (
+                        SELECT
+                            a.desk_id,
+                            JSON_AGG({slot_json}
+                            ) AS slots
+                        FROM page AS p
+                        CROSS JOIN target AS t
+                        JOIN sena.desk_daily_availability AS a
+                            ON a.day = t.day
+                            AND a.desk_id = p.id
+                        JOIN sena.slot_master AS sm ON sm.id = a.slot_id
+                        WHERE {slot_conditions}
+                        GROUP BY a.desk_id
+                    )"""
+        return slot_exists, slot_ctes, params
+
+    @staticmethod
+    def _availability_range_query(filters: DeskFilters, use_read_model: bool = False) -> Tuple[str, Dict]:
+        """
+        One row per desk: (desk_id, desk_name, prices per slot, bookings as
+        [day_index, slot_index, status]). Only booked cells are returned; the
+        grid is filled in with 'available' by _RangeGrid.
+        """
+        desk_conditions, slot_conditions, params = filters.to_sql()
+        params["limit"] = filters.limit
+        if use_read_model:
+            booked = """
+                SELECT
+                    a.desk_id,
+                    (a.day - %(start_date)s::date) AS day_idx,
+                    s.idx AS slot_idx,
+                    a.status
+                FROM sena.desk_daily_availability AS a
+                JOIN slots AS s ON s.id = a.slot_id
+                WHERE a.day BETWEEN %(start_date)s::date AND %(end_date)s::date
+                    AND a.status <> 'available'
+                    AND a.desk_id IN (SELECT id FROM selected)"""
+        else:
+            booked = """
+                SELECT DISTINCT ON (bt.desk_id, bt.booking_date, bt.slot_id)
+                    bt.desk_id,
+                    (bt.booking_date - %(start_date)s::date) AS day_idx,
+                    s.idx AS slot_idx,
+                    bt.status
+                FROM sena.booking_transactions AS bt
+                JOIN slots AS s ON s.id = bt.slot_id
+                WHERE bt.booking_date BETWEEN %(start_date)s::date AND %(end_date)s::date
+                    AND bt.desk_id IN (SELECT id FROM selected)
+                    AND bt.status <> 'cancelled'
+                ORDER BY bt.desk_id, bt.booking_date, bt.slot_id, bt.updated_at DESC"""
+        return f"""
+            WITH slots AS (
+                SELECT sm.id, (ROW_NUMBER() OVER (ORDER BY sm.id) - 1)::int AS idx
+                FROM sena.slot_master AS sm
+                WHERE {slot_conditions}
+            ),
+            selected AS (
+                SELECT d.id, d.name, d.desk_type_id
+                FROM sena.desks AS d
+                LEFT JOIN sena.buildings AS b ON b.id = d.building_id
+                LEFT JOIN sena.locations AS l ON l.id = d.location_id
+                WHERE {desk_conditions}
+                ORDER BY d.id
+                LIMIT %(limit)s
+            ),
+            type_prices AS (
+                SELECT t.desk_type_id, JSON_AGG(dp.price ORDER BY s.idx) AS prices
+                FROM (SELECT DISTINCT desk_type_id FROM selected) AS t
+                CROSS JOIN slots AS s
+                LEFT JOIN sena.desk_pricing AS dp
+                    ON dp.desk_type_id = t.desk_type_id
+                    AND dp.slot_id = s.id
+                    AND dp.is_active = true
+                GROUP BY t.desk_type_id
+            ),
+            booked AS ({booked}
+            ),
+            desk_bookings AS (
+                SELECT desk_id, JSON_AGG(JSON_BUILD_ARRAY(day_idx, slot_idx, status)) AS bookings
+                FROM booked
+                GROUP BY desk_id
+            )
+            SELECT sel.id, sel.name, tp.prices, COALESCE(db.bookings, '[]'::json)
+            FROM selected AS sel
+            LEFT JOIN type_prices AS tp ON tp.desk_type_id = sel.desk_type_id
+            LEFT JOIN desk_bookings AS db ON db.desk_id = sel.id
+            ORDER BY sel.id
+        """, params
+
+    @staticmethod
+    def _read_model_covers(cursor, start_date: str, end_date: str) -> bool:
+        """
+        True when the read model is enabled and materializes every date in the range
+        """
+        if not DESK_READ_MODEL_CONFIG['enabled']:
+            return False
+        cursor.execute("""
+            SELECT COUNT(*) = %s::date - %s::date + 1
+            FROM sena.desk_availability_days
+            WHERE day BETWEEN %s::date AND %s::date
+        """, (end_date, start_date, start_date, end_date))
+        return cursor.fetchone()[0]
+
+    @staticmethod
+    def _range_slots(cursor, filters: DeskFilters) -> List[Dict]:
+        _, slot_conditions, params = filters.to_sql()
+        cursor.execute(f"""
+            SELECT sm.id, sm.slot_type
+            FROM sena.slot_master AS sm
+            WHERE {slot_conditions}
+            ORDER BY sm.id
+        """, params)
+        return [{"slot_id": row[0], "slot_type": row[1]} for row in cursor.fetchall()]
+
+    @staticmethod
+    @coalesce('availability_range')
+    def get_availability_range(start_date: str, end_date: str, filters: Optional[DeskFilters] = None) -> Tuple[Dict, int]:
+        """
+        Desk x date x slot availability for every day from start_date to
+        end_date (inclusive), computed in one query.
+        Returns: Tuple of (grid_dict, status_code); see _RangeGrid for the layout
+        """
+        filters = filters or DeskFilters()
+
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return {"error": "Database connection failed"}, 500
+
+            try:
+                cursor = conn.cursor()
+                grid = _RangeGrid(start_date, end_date, DeskData._range_slots(cursor, filters))
+                query, params = DeskData._availability_range_query(
+                    filters, DeskData._read_model_covers(cursor, start_date, end_date))
+                params.update({"start_date": start_date, "end_date": end_date})
+                cursor.execute(query, params)
+                desks = [grid.desk_row(*row) for row in cursor.fetchall()]
+                result = grid.header()
+                result["statuses"] = grid.statuses
+                result["desks"] = desks
+                if filters.limit is not None:
+                    result["next_cursor"] = desks[-1]["desk_id"] if len(desks) == filters.limit else None
+                return result, 200
+
+            except Exception as e:
+                return {"error": f"Failed to fetch desk availability range: {str(e)}"}, 500
+
+    @staticmethod
+    def stream_availability_range(
+        start_date: str,
+        end_date: str,
+        filters: Optional[DeskFilters] = None,
+        batch_size: int = 200
+    ) -> Iterator[str]:
+        """
+        Same data as get_availability_range as newline-delimited JSON, read
+        through a server-side cursor so memory stays bounded by batch_size
+        desks. Lines: {"type": "header", ...}, then {"type": "status", ...}
+        the first time a status code is used, {"type": "desk", ...} per desk,
+        and a final {"type": "end", "desks": n} or {"type": "error", ...}.
+        """
+        filters = filters or DeskFilters()
+
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                yield json.dumps({"type": "error", "error": "Database connection failed"}) + "\n"
+                return
+
+            count = 0
+            try:
+                grid = _RangeGrid(start_date, end_date, DeskData._range_slots(conn.cursor(), filters))
+                query, params = DeskData._availability_range_query(
+                    filters, DeskData._read_model_covers(conn.cursor(), start_date, end_date))
+                params.update({"start_date": start_date, "end_date": end_date})
+                header = grid.header()
+                header["type"] = "header"
+                yield json.dumps(header) + "\n"
+
+                cursor = conn.cursor(name="desk_availability_range")
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                known_statuses = len(grid.statuses)
+                for row in cursor:
+                    desk = grid.desk_row(*row)
+                    for code in range(known_statuses, len(grid.statuses)):
+                        yield json.dumps({"type": "status", "code": code, "status": grid.statuses[code]}) + "\n"
+                    known_statuses = len(grid.statuses)
+                    desk["type"] = "desk"
+                    yield json.dumps(desk) + "\n"
+                    count += 1
+                yield json.dumps({"type": "end", "desks": count}) + "\n"
+
+            except Exception as e:
+                yield json.dumps({"type": "error", "error": f"Failed to fetch desk availability range: {str(e)}"}) + "\n"
+
+class _RangeGrid:
+    """
+    Compact layout for availability over a date range:
+    {"start_date", "end_date", "dates": [...], "slots": [{"slot_id", "slot_type"}],
+     "statuses": ["available", "booked", ...],
+     "desks": [{"desk_id", "desk_name", "prices": [per slot],
+                "grid": [[status code per slot] per date]}]}
+    Status codes index into "statuses"; 0 is always "available".
+    """
+
+    def __init__(self, start_date: str, end_date: str, slots: List[Dict]):
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        self.dates = [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+        self.slots = slots
+        self.statuses = ["available"]
+        self._codes = {"available": 0}
+
+    def header(self) -> Dict:
+        return {
+            "start_date": self.dates[0],
+            "end_date": self.dates[-1],
+            "dates": self.dates,
+            "slots": self.slots,
+            "statuses": list(self.statuses)
+        }
+
+    def desk_row(self, desk_id, desk_name, prices, bookings) -> Dict:
+        grid = [[0] * len(self.slots) for _ in self.dates]
+        for day_idx, slot_idx, status in bookings:
+            code = self._codes.get(status)
+            if code is None:
+                code = self._codes[status] = len(self.statuses)
+                self.statuses.append(status)
+            grid[day_idx][slot_idx] = code
+        return {
+            "desk_id": desk_id,
+            "desk_name": desk_name,
+            "prices": prices or [None] * len(self.slots),
+            "grid": grid
+        }
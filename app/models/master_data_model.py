@@ -1,37 +1,150 @@
-from typing import Dict, List, Tuple
-from app.utils.db_utils import get_db_connection
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from app.utils.db_utils import db_connection
+from app.utils.cache import TTLCache
+from app.utils.coalesce import coalesce
+from app.utils.http_cache import Validator
 from app.config.database import DB_CONFIG
+from app.config.cache import MASTER_DATA_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Master data changes rarely, so every getter is served from this cache and
+# all three sets are (re)loaded together in one round trip
+_cache = TTLCache(maxsize=MASTER_DATA_CACHE_CONFIG['maxsize'], ttl=MASTER_DATA_CACHE_CONFIG['ttl'])
+_ALL_KEY = 'all'
+# (version, first time this process saw it); version is a digest of the data
+# taken once per load, so it is the same in every worker
+_last_version: Tuple[Optional[str], float] = (None, 0.0)
+# Bumped by invalidate_cache; a load started under an older generation may
+# have read the data from before the write, so it is neither cached nor shared
+_generation = 0
+_generation_lock = threading.Lock()
 
 class MasterData:
+    @staticmethod
+    def _load_all() -> Optional[Dict]:
+        """
+        Return locations, slots and desk types from the cache, loading all
+        three with a single query on a miss. Returns None if the load fails.
+        """
+        entry = MasterData._load_entry()
+        return entry[0] if entry else None
+
+    @staticmethod
+    def _load_entry() -> Optional[Tuple[Dict, str, float]]:
+        """
+        Cached (master_data, version, changed_at), loading on a miss
+        """
+        cached = _cache.get(_ALL_KEY)
+        if cached is not None:
+            return cached
+        return MasterData._fetch_entry(_generation)
+
+    @staticmethod
+    @coalesce('master_data')
+    def _fetch_entry(generation: int) -> Optional[Tuple[Dict, str, float]]:
+        """
+        Load master data into the cache; concurrent misses of the same
+        generation share one load. Not cached if invalidated meanwhile.
+        """
+        global _last_version
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return None
+
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT
+                        (
+                            SELECT COALESCE(JSON_AGG(JSON_BUILD_OBJECT(
+                                'location_id', l.id,
+                                'location_name', l.name
+                            ) ORDER BY l.id), '[]')
+                            FROM sena.locations as l
+                        ) AS locations,
+                        (
+                            SELECT COALESCE(JSON_AGG(JSON_BUILD_OBJECT(
+                                'slot_id', s.id,
+                                'slot_type', s.slot_type,
+                                'start_time', TO_CHAR(s.start_time, 'HH24:MI:SS'),
+                                'end_time', TO_CHAR(s.end_time, 'HH24:MI:SS'),
+                                'time_zone', s.time_zone
+                            ) ORDER BY s.id), '[]')
+                            FROM sena.slot_master as s
+                        ) AS slots,
+                        (
+                            SELECT COALESCE(JSON_AGG(JSON_BUILD_OBJECT(
+                                'desk_type_id', d.id,
+                                'type', d.type,
+                                'capacity', d.capacity
+                            ) ORDER BY d.id), '[]')
+                            FROM sena.desk_type_master as d
+                        ) AS desk_types
+                """)
+
+                locations, slots, desk_types = cursor.fetchone()
+                master_data = {
+                    "locations": locations,
+                    "slots": slots,
+                    "desk_types": desk_types
+                }
+                version = hashlib.sha1(
+                    json.dumps(master_data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+                ).hexdigest()[:16]
+                if _last_version[0] != version:
+                    _last_version = (version, time.time())
+                entry = (master_data, version, _last_version[1])
+                with _generation_lock:
+                    if generation == _generation:
+                        _cache.set(_ALL_KEY, entry)
+                return entry
+
+            except Exception as e:
+                logger.error("Failed to load master data: %s", e)
+                return None
+
+    @staticmethod
+    def invalidate_cache():
+        """
+        Drop cached master data; call after writing to locations, slot_master or desk_type_master
+        """
+        global _generation
+        with _generation_lock:
+            _generation += 1
+            _cache.invalidate()
+
+    @staticmethod
+    def get_validator(scope: str = 'all') -> Optional[Validator]:
+        """
+        HTTP validator for the current master data, usually without a query.
+        scope names the endpoint, since each returns a different body.
+        """
+        entry = MasterData._load_entry()
+        if entry is None:
+            return None
+        _, version, changed_at = entry
+        return Validator(etag=f"master-{scope}-{version}", changed_at=changed_at)
+
+    @staticmethod
+    def cache_stats() -> Dict:
+        return _cache.stats()
+
     @staticmethod
     def get_locations() -> Tuple[List[Dict], int]:
         """
         Get all locations
         Returns: Tuple of (locations_list, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
-        if not conn:
+        master_data = MasterData._load_all()
+        if master_data is None:
             return [], 500
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT l.id as location_id, l.name as location_name 
-                FROM sena.locations as l
-            """)
-            
-            locations = cursor.fetchall()
-            return [
-                {
-                    "location_id": loc[0],
-                    "location_name": loc[1]
-                } for loc in locations
-            ], 200
-
-        except Exception as e:
-            return [], 500
-        finally:
-            conn.close()
+        return master_data["locations"], 200
 
     @staticmethod
     def get_slots() -> Tuple[List[Dict], int]:
@@ -39,32 +152,10 @@ class MasterData:
         Get all slots
         Returns: Tuple of (slots_list, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
-        if not conn:
+        master_data = MasterData._load_all()
+        if master_data is None:
             return [], 500
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT s.id as slot_id, s.slot_type, s.start_time, s.end_time, s.time_zone
-                FROM sena.slot_master as s
-            """)
-            
-            slots = cursor.fetchall()
-            return [
-                {
-                    "slot_id": slot[0],
-                    "slot_type": slot[1],
-                    "start_time": slot[2].strftime('%H:%M:%S') if slot[2] else None,
-                    "end_time": slot[3].strftime('%H:%M:%S') if slot[3] else None,
-                    "time_zone": slot[4]
-                } for slot in slots
-            ], 200
-
-        except Exception as e:
-            return [], 500
-        finally:
-            conn.close()
+        return master_data["slots"], 200
 
     @staticmethod
     def get_desk_types() -> Tuple[List[Dict], int]:
@@ -72,30 +163,10 @@ class MasterData:
         Get all desk types
         Returns: Tuple of (desk_types_list, status_code)
         """
-        conn = get_db_connection(DB_CONFIG)
-        if not conn:
+        master_data = MasterData._load_all()
+        if master_data is None:
             return [], 500
-
-        try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT d.id as desk_type_id, d.type, d.capacity
-                FROM sena.desk_type_master as d
-            """)
-            
-            desk_types = cursor.fetchall()
-            return [
-                {
-                    "desk_type_id": desk[0],
-                    "type": desk[1],
-                    "capacity": desk[2]
-                } for desk in desk_types
-            ], 200
-
-        except Exception as e:
-            return [], 500
-        finally:
-            conn.close()
+        return master_data["desk_types"], 200
 
     @staticmethod
     def get_all_master_data() -> Tuple[Dict, int]:
@@ -103,15 +174,7 @@ class MasterData:
         Get all master data (locations, slots, desk types)
         Returns: Tuple of (master_data_dict, status_code)
         """
-        locations, loc_status = MasterData.get_locations()
-        slots, slot_status = MasterData.get_slots()
-        desk_types, desk_status = MasterData.get_desk_types()
-
-        if any(status != 200 for status in [loc_status, slot_status, desk_status]):
+        master_data = MasterData._load_all()
+        if master_data is None:
             return {"error": "Failed to fetch master data"}, 500
-
-        return {
-            "locations": locations,
-            "slots": slots,
-            "desk_types": desk_types
-        }, 200 
\ No newline at end of file
+        return dict(master_data), 200
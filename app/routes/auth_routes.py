@@ -1,10 +1,48 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, g, request, jsonify
 from app.models.user_model import User
-from app.utils.db_utils import get_db_connection
+from app.utils import metrics
+from app.utils.db_utils import db_connection
+from app.utils.passwords import PasswordHashingBusy, busy_response, hash_password, is_hashed, verify_password
+from app.utils.session_tokens import USER_CLAIMS, bearer_token, issue_token, login_required, revocations, verify_token
+from app.config.auth import LEGACY_USER_LOOKUP_CONFIG
 from app.config.database import DB_CONFIG
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 auth_bp = Blueprint('auth', __name__)
 
+PASSWORDS_REHASHED = metrics.Counter(
+    'passwords_rehashed_total', 'Stored passwords upgraded on login, by what was stored before', ['previous'])
+LEGACY_USER_LOOKUPS = metrics.Counter(
+    'legacy_user_lookups_total', 'GET /api/auth/me?email= requests, by outcome', ['result'])
+
+class LookupRateLimiter:
+    """At most `limit` calls per client address in each `period` second window."""
+
+    def __init__(self, limit: int, period: float = 60):
+        self.limit = limit
+        self.period = period
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._counts = {}
+
+    def allow(self, client: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window_start >= self.period:
+                self._window_start = now
+                self._counts = {}
+            count = self._counts.get(client, 0)
+            if count >= self.limit:
+                return False
+            self._counts[client] = count + 1
+            return True
+
+legacy_lookups = LookupRateLimiter(LEGACY_USER_LOOKUP_CONFIG['per_minute'])
+
 @auth_bp.route('/api/auth/login', methods=['POST'])
 def login():
     data = request.get_json()
@@ -14,75 +52,123 @@ def login():
     if not email or not password:
         return jsonify({'error': 'Email and password are required'}), 400
 
-    conn = get_db_connection(DB_CONFIG)
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
+    # The connection goes back to the pool before the password is checked
+    with db_connection(DB_CONFIG) as conn:
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, email, first_name, last_name, phone, created_at, updated_at, is_active, password
+                FROM sena.users
+                WHERE email = %s
+            """, (email,))
+            user = cursor.fetchone()
 
+        except Exception as e:
+            return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+    stored = user[8] if user else None
+    try:
+        matches, needs_rehash = verify_password(stored, password)
+    except PasswordHashingBusy:
+        return busy_response()
+    if not matches:
+        return jsonify({'error': 'Invalid credentials'}), 401
+    if needs_rehash:
+        rehash_password(user[0], stored, password)
+
+    user_data = {
+        'id': user[0],
+        'email': user[1],
+        'first_name': user[2],
+        'last_name': user[3],
+        'phone': user[4],
+        'created_at': user[5],
+        'updated_at': user[6],
+        'is_active': user[7]
+    }
+    token, expires_at = issue_token(user_data)
+    return jsonify({
+        'message': 'Login successful',
+        'user': user_data,
+        'token': token,
+        'token_type': 'Bearer',
+        'expires_at': expires_at
+    }), 200
+
+def rehash_password(user_id, stored: str, password: str):
+    """
+    Replace a plaintext or outdated stored password with a current hash.
+    Best effort: the login has already succeeded either way.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, email, first_name, last_name, phone, created_at, updated_at, is_active
-            FROM sena.users
-            WHERE email = %s AND password = %s
-        """, (email, password))
-        
-        user = cursor.fetchone()
-        if not user:
-            return jsonify({'error': 'Invalid credentials'}), 401
-
-        return jsonify({
-            'message': 'Login successful',
-            'user': {
-                'id': user[0],
-                'email': user[1],
-                'first_name': user[2],
-                'last_name': user[3],
-                'phone': user[4],
-                'created_at': user[5],
-                'updated_at': user[6],
-                'is_active': user[7]
-            }
-        }), 200
-
-    except Exception as e:
-        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
-    finally:
-        conn.close()
+        new_hash = hash_password(password)
+    except PasswordHashingBusy:
+        return  # next login
+    with db_connection(DB_CONFIG) as conn:
+        if not conn:
+            return
+        try:
+            cursor = conn.cursor()
+            # Unless the password was changed in the meantime
+            cursor.execute("""
+                UPDATE sena.users SET password = %s, updated_at = now()
+                WHERE id = %s AND password = %s
+            """, (new_hash, user_id, stored))
+            conn.commit()
+            if cursor.rowcount == 1:
+                PASSWORDS_REHASHED.labels('hashed' if is_hashed(stored) else 'plaintext').inc()
+        except Exception as e:
+            conn.rollback()
+            logger.warning("Could not rehash password for user %s: %s", user_id, e)
 
 @auth_bp.route('/api/auth/me', methods=['GET'])
 def get_current_user():
+    """
+    The signed-in user from the Bearer token's claims, without a query.
+    ?email= (looked up in sena.users) is deprecated: it is unauthenticated,
+    so it is rate limited, does not return the user's id and can be turned
+    off with LEGACY_USER_LOOKUP=false.
+    """
+    token = bearer_token()
+    if token is not None:
+        claims = verify_token(token)
+        if claims is None:
+            return jsonify({'error': 'Invalid or expired token'}), 401
+        return jsonify(dict({name: claims.get(name) for name in USER_CLAIMS}, id=claims['sub'])), 200
+
     email = request.args.get('email')
-    if not email:
-        return jsonify({'error': 'Email is required'}), 400
+    if not email or not LEGACY_USER_LOOKUP_CONFIG['enabled']:
+        response = jsonify({'error': 'Authentication required'})
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response, 401
+    if not legacy_lookups.allow(request.remote_addr or ''):
+        LEGACY_USER_LOOKUPS.labels('limited').inc()
+        response = jsonify({'error': 'Too many lookups, please sign in'})
+        response.headers['Retry-After'] = str(int(legacy_lookups.period))
+        return response, 429
+    LEGACY_USER_LOOKUPS.labels('served').inc()
 
-    conn = get_db_connection(DB_CONFIG)
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
+    user, status_code = User.get_user_by_email(email)
+    if status_code == 404:
+        response = jsonify({'error': 'User not found'})
+    elif status_code != 200:
+        response = jsonify({'error': 'Failed to fetch user'})
+    else:
+        response = jsonify({name: value for name, value in user.items() if name != 'id'})
+    response.headers['Deprecation'] = 'true'
+    response.headers['Link'] = '</api/auth/login>; rel="successor-version"'
+    return response, status_code
 
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, email, first_name, last_name, phone, created_at, updated_at, is_active
-            FROM sena.users
-            WHERE email = %s
-        """, (email,))
-        
-        user = cursor.fetchone()
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-
-        return jsonify({
-            'id': user[0],
-            'email': user[1],
-            'first_name': user[2],
-            'last_name': user[3],
-            'phone': user[4],
-            'created_at': user[5],
-            'updated_at': user[6],
-            'is_active': user[7]
-        }), 200
-
-    except Exception as e:
-        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
-    finally:
-        conn.close()
+@auth_bp.route('/api/auth/logout', methods=['POST'])
+@login_required
+def logout():
+    """
+    Revoke the Bearer token; other processes stop accepting it within
+    SESSION_REVOCATION_REFRESH seconds
+    """
+    if not revocations.revoke(g.user['jti'], g.user['sub'], g.user['exp']):
+        return jsonify({'error': 'Could not log out, please retry'}), 503
+    return jsonify({'message': 'Logged out'}), 200
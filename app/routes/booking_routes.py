@@ -0,0 +1,92 @@
+from flask import Blueprint, g, request, jsonify
+from app.models.booking_model import Booking, BookingItem
+from app.config.booking import BOOKING_CONFIG
+from app.utils.session_tokens import login_required
+from datetime import date, timedelta
+from typing import List
+
+booking_bp = Blueprint('booking', __name__)
+
+def parse_item(desk_id, slot_id, booking_date) -> BookingItem:
+    """
+    Validate one desk/slot/date; raises ValueError on bad input
+    """
+    try:
+        item = BookingItem(int(desk_id), int(slot_id), date.fromisoformat(booking_date).isoformat())
+    except (TypeError, ValueError):
+        raise ValueError('Each booking needs desk_id, slot_id and date (YYYY-MM-DD)')
+    today = date.today()
+    if not today <= date.fromisoformat(item.booking_date) <= today + timedelta(days=BOOKING_CONFIG['max_days_ahead']):
+        raise ValueError(f"Bookings can be made from today up to {BOOKING_CONFIG['max_days_ahead']} days ahead")
+    return item
+
+def parse_bulk_items(data) -> List[BookingItem]:
+    """
+    Either "items": [{"desk_id", "slot_id", "date"}, ...] or one desk with
+    "slot_ids" and "dates", booked for every combination
+    """
+    if 'items' in data:
+        raw_items = data.get('items')
+        if not isinstance(raw_items, list):
+            raise ValueError('items must be a list')
+        items = [parse_item(entry.get('desk_id'), entry.get('slot_id'), entry.get('date'))
+                 for entry in raw_items if isinstance(entry, dict)]
+        if len(items) != len(raw_items):
+            raise ValueError('Each booking needs desk_id, slot_id and date (YYYY-MM-DD)')
+    else:
+        slot_ids, dates = data.get('slot_ids'), data.get('dates')
+        if not isinstance(slot_ids, list) or not isinstance(dates, list):
+            raise ValueError('Send items, or desk_id with slot_ids and dates')
+        items = [parse_item(data.get('desk_id'), slot_id, booking_date)
+                 for booking_date in dates for slot_id in slot_ids]
+    if not items:
+        raise ValueError('No bookings requested')
+    if len(items) > BOOKING_CONFIG['max_items']:
+        raise ValueError(f"At most {BOOKING_CONFIG['max_items']} bookings per request")
+    return items
+
+@booking_bp.route('/api/bookings', methods=['POST'])
+@login_required
+def create_booking():
+    """
+    Book one slot for the signed-in user: {"desk_id", "slot_id", "date"}.
+    201 with the booking, 409 if the slot is already taken.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        item = parse_item(data.get('desk_id'), data.get('slot_id'), data.get('date'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    result, status_code = Booking.create_bookings(g.user['sub'], [item])
+    if status_code == 201:
+        return jsonify(result['bookings'][0]), 201
+    return jsonify(result), status_code
+
+@booking_bp.route('/api/bookings/bulk', methods=['POST'])
+@login_required
+def create_bookings_bulk():
+    """
+    Book several slots and/or days for the signed-in user in one transaction:
+    {"items": [{"desk_id", "slot_id", "date"}, ...]} or
+    {"desk_id", "slot_ids": [...], "dates": [...]}.
+    By default nothing is booked unless everything can be
+    ("all_or_nothing": false keeps whatever could be booked).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        items = parse_bulk_items(data)
+    except (AttributeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    result, status_code = Booking.create_bookings(g.user['sub'], items, bool(data.get('all_or_nothing', True)))
+    return jsonify(result), status_code
+
+@booking_bp.route('/api/bookings/<int:booking_id>/cancel', methods=['POST'])
+@login_required
+def cancel_booking(booking_id):
+    """
+    Cancel one of the signed-in user's bookings
+    """
+    result, status_code = Booking.cancel_booking(booking_id, g.user['sub'])
+    return jsonify(result), status_code
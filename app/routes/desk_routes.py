@@ -1,53 +1,316 @@
-from flask import Blueprint, jsonify, request
-from flask_socketio import SocketIO, emit
-from app.models.desk_model import DeskData
+from flask import Blueprint, Response, jsonify, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from app.models.desk_model import DeskData, DeskFilters
+from app.config.realtime import (DESK_API_CONFIG, DESK_CLUSTER_CONFIG, DESK_UPDATES_CONFIG,
+                                 SOCKETIO_BACKPRESSURE_CONFIG)
+from app.utils.coalesce import fresh_since
+from app.utils.desk_cluster import DeskCluster
+from app.utils.desk_notifications import DeskChangeListener, DeskChangeTracker, changes_for_date
+from app.utils.desk_rooms import DeskSubscriptions, PROTOCOL_DELTA, PROTOCOL_FULL, desk_room
+from app.utils.desk_versions import DeskVersionStore
+from app.utils.http_cache import Validator, compressed, conditional_response
+from app.utils.single_flight import SingleFlight
+from app.utils import metrics, raw_json
+from app.utils.socketio_backpressure import CHAIN, STATE
+from app.utils.socketio_queue import create_client_manager
+import hashlib
+import logging
 import threading
 import time
-from datetime import date
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 desk_bp = Blueprint('desk', __name__)
-socketio = SocketIO()
 
-# Store connected clients and current display date
-connected_clients = set()
-current_display_date = date.today().isoformat()  # Initialize with current date as YYYY-MM-DD
+# With a message queue, emits reach the clients of every app process
+client_manager = create_client_manager(
+    DESK_CLUSTER_CONFIG['message_queue'],
+    DESK_CLUSTER_CONFIG['channel'],
+    retention=DESK_CLUSTER_CONFIG['message_retention'],
+    instrumented=metrics.enabled(),
+    backpressure=SOCKETIO_BACKPRESSURE_CONFIG['enabled']
+)
+# Snapshots carry the desk JSON from Postgres as RawJSON, spliced in as-is
+socketio = SocketIO(json=raw_json, transports=DESK_CLUSTER_CONFIG['transports'],
+                    **({'client_manager': client_manager} if client_manager else {}))
+
+# Dates each connected client is viewing; every date is a Socket.IO room
+subscriptions = DeskSubscriptions()
+
+# Which process computes and broadcasts availability, and the dates the
+# clients of every process are viewing
+cluster = DeskCluster(
+    subscriptions,
+    client_manager if DESK_CLUSTER_CONFIG['message_queue'] else None,
+    heartbeat_interval=DESK_CLUSTER_CONFIG['heartbeat_interval'],
+    leader_retry_interval=DESK_CLUSTER_CONFIG['leader_retry_interval']
+)
+
+# Latest desk list and recent deltas per date
+desk_versions = DeskVersionStore(
+    history=DESK_UPDATES_CONFIG['delta_history'],
+    retention=DESK_UPDATES_CONFIG['state_retention']
+)
+
+metrics.CallbackMetric('desk_broadcaster_leader', 'Whether this process computes and broadcasts availability',
+                       [], lambda: [((), 1 if cluster.is_leader() else 0)])
+
+# Change stamps per date from the NOTIFY listener, used for ETags on /api/desks
+desk_changes_tracker = DeskChangeTracker()
+
+# Subscribers arriving together (a reconnect storm) share one query per date
+desk_refreshes = SingleFlight()
+
+DESK_VALIDATOR_UNAVAILABLE = metrics.Counter(
+    'desk_validator_unavailable_total',
+    '/api/desks requests answered in full without an ETag, by why: poll mode or listener disconnected',
+    ['reason'])
+
+DESK_SYNC_SNAPSHOTS = metrics.Counter(
+    'desk_sync_snapshots_total',
+    'Desk lists for subscribing clients by source: stored, queried, or shared with a concurrent query',
+    ['source'])
+
+def refresh_desks(target_date: str, desk_ids: Optional[Iterable[int]] = None) -> Tuple[Optional[Dict], int]:
+    """
+    Recompute desk availability for target_date and record it in desk_versions.
+    When desk_ids is given and the stored state for that date is fresh, only
+    those desks are queried and merged into it; otherwise every desk is fetched.
+    The query never joins one that started before this refresh, which could
+    predate the change being refreshed for.
+    Returns: Tuple of (delta or None if nothing changed, status_code), or
+    (error_dict, status_code) on failure
+    """
+    started = time.time()
+    base = desk_versions.desks(target_date) if desk_ids is not None else None
+    if base is not None:
+        desk_ids = set(desk_ids)
+        with fresh_since(started):
+            desk_json, status_code = DeskData.get_desk_json_by_id(target_date, desk_ids=sorted(desk_ids))
+        if status_code != 200:
+            return desk_json, status_code
+        desks = dict(base)
+        for desk_id in desk_ids:
+            desks.pop(desk_id, None)  # deleted desks are not returned
+        desks.update(desk_json)
+    else:
+        with fresh_since(started):
+            desks, status_code = DeskData.get_desk_json_by_id(target_date)
+        if status_code != 200:
+            return desks, status_code
+
+    return desk_versions.update(target_date, desks, as_of=started), 200
+
+def stored_desks_current(target_date: str) -> bool:
+    """
+    Whether desk_versions can answer for target_date without a query, within
+    the snapshot_max_age bounds. With the NOTIFY listener connected, a state
+    read before the latest change for its date is never current.
+    """
+    refreshed_at = desk_versions.refreshed_at(target_date)
+    if refreshed_at is None:
+        return False
+    age = time.time() - refreshed_at
+    changes = desk_changes_tracker.version(target_date) if DESK_UPDATES_CONFIG['mode'] == 'notify' else None
+    if changes is not None:
+        _, changed_at = changes
+        return changed_at <= refreshed_at and age <= DESK_UPDATES_CONFIG['snapshot_max_age_listening']
+    return age <= DESK_UPDATES_CONFIG['snapshot_max_age']
+
+def emit_desk_changes(target_date: str, delta: Dict, skip_sid: Optional[str] = None):
+    """
+    Send a change to both rooms of a date: the whole list to 'full' clients
+    and just the delta to 'delta' clients
+    """
+    if cluster.has_subscribers(target_date, PROTOCOL_FULL):
+        socketio.emit('desk_update', desk_versions.snapshot(target_date),
+                      to=desk_room(target_date), skip_sid=skip_sid)
+    if cluster.has_subscribers(target_date, PROTOCOL_DELTA):
+        socketio.emit('desk_delta', delta, to=desk_room(target_date, PROTOCOL_DELTA), skip_sid=skip_sid)
+
+def broadcast_desks(target_date: str, desk_ids: Optional[Iterable[int]] = None):
+    """
+    Compute availability for target_date once and emit it to that date's rooms if it changed
+    """
+    delta, status_code = refresh_desks(target_date, desk_ids)
+    if status_code != 200:
+        logger.warning("Failed to fetch desk data for %s: %s", target_date, delta.get('error'))
+    elif delta is not None:
+        emit_desk_changes(target_date, delta)
 
 def background_desk_updates():
     """
-    Background task to send desk updates to connected clients based on current_display_date
+    Background task to send desk updates for every date that has subscribers
+    (polling mode, broadcaster only)
     """
-    global current_display_date
     while True:
-        if connected_clients:
-            try:
-                desk_data, status_code = DeskData.get_desk_availability(current_display_date)
-                print(f"[Background Task] Fetched desk data for {current_display_date}: {desk_data}, Status: {status_code}")
-                if status_code == 200:
-                    socketio.emit('desk_update', desk_data)
-                    print("[Background Task] Emitted desk_update event.")
-            except Exception as e:
-                print(f"Error in background task: {str(e)}")
-        time.sleep(5)  # Update every 5 seconds
+        try:
+            if cluster.is_leader():
+                desk_versions.prune(cluster.active_dates())
+                for target_date in cluster.active_dates():
+                    broadcast_desks(target_date)
+        except Exception as e:
+            logger.exception("Error in background desk updates: %s", e)
+        time.sleep(DESK_UPDATES_CONFIG['poll_interval'])
+
+def handle_desk_changes(changes):
+    """
+    Push recomputed desks to each active date a NOTIFY batch touches
+    (notify mode). Every process listens, to keep its HTTP validators
+    current, but only the broadcaster recomputes.
+    """
+    if not cluster.is_leader():
+        return
+    desk_versions.prune(cluster.active_dates())
+    for target_date in cluster.active_dates():
+        affected, desk_ids = changes_for_date(changes, target_date)
+        if affected:
+            broadcast_desks(target_date, desk_ids)
+
+def resync_desks():
+    """
+    Full refresh after the listener (re)connects, as notifications may have
+    been missed, and when this process becomes the broadcaster
+    """
+    handle_desk_changes({None: None})
+
+def start_background_updates() -> threading.Thread:
+    if DESK_UPDATES_CONFIG['mode'] == 'poll':
+        target = background_desk_updates
+    else:
+        listener = DeskChangeListener(
+            on_changes=handle_desk_changes,
+            on_resync=resync_desks,
+            debounce=DESK_UPDATES_CONFIG['notify_debounce'],
+            reconnect_delay=DESK_UPDATES_CONFIG['reconnect_delay'],
+            tracker=desk_changes_tracker
+        )
+        target = listener.run
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+def start_cluster():
+    """
+    Join the other app processes; call once socketio.init_app has run.
+    python-socketio only starts the queue listener on the first client
+    connection, but cluster messages must be received before that.
+    """
+    if cluster.manager is not None and not socketio.server.manager_initialized:
+        socketio.server.manager_initialized = True
+        socketio.server.manager.initialize()
+    cluster.start(
+        on_elected=lambda: socketio.start_background_task(resync_desks),
+        on_sync=lambda *request: socketio.start_background_task(sync_client, *request)
+    )
 
 # Start background task
-update_thread = threading.Thread(target=background_desk_updates, daemon=True)
-update_thread.start()
+update_thread = start_background_updates()
+
+def parse_dates(values) -> List[str]:
+    """
+    Validate a list of YYYY-MM-DD strings; raises ValueError on a bad entry
+    """
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list) or not values:
+        raise ValueError('Dates not provided in request.')
+    return sorted({date.fromisoformat(value).isoformat() for value in values})
+
+def subscribe_client(sid: str, target_date: str, protocol: str = PROTOCOL_FULL, last_version: Optional[int] = None):
+    """
+    Add the client to target_date's room and have it brought up to date,
+    by the broadcaster if that is another process
+    """
+    previous = subscriptions.subscribe(sid, target_date, protocol)
+    if previous != protocol:
+        if previous is not None:
+            leave_room(desk_room(target_date, previous))
+        join_room(desk_room(target_date, protocol))
+
+    if not cluster.forward_sync(sid, target_date, protocol, last_version):
+        sync_client(sid, target_date, protocol, last_version)
+
+def sync_client(sid: str, target_date: str, protocol: str, last_version: Optional[int] = None):
+    """
+    Bring a subscribed client up to date: the whole list for 'full' clients;
+    for 'delta' clients the deltas missed since last_version, or a snapshot
+    if they are too far behind. The client may be connected to another process.
+    The stored list is used while it is current; otherwise it is refreshed,
+    once for all the clients subscribing to the date at the same time.
+    """
+    if stored_desks_current(target_date):
+        DESK_SYNC_SNAPSHOTS.labels('stored').inc()
+    else:
+        (delta, status_code), shared = desk_refreshes.do(target_date, refresh_desks, target_date)
+        DESK_SYNC_SNAPSHOTS.labels('shared' if shared else 'queried').inc()
+        if status_code != 200:
+            socketio.emit('error', {'message': f'Failed to fetch data for {target_date}: {delta.get("error")}'}, to=sid)
+            return
+        if delta is not None and not shared:
+            emit_desk_changes(target_date, delta, skip_sid=sid)
+
+    if protocol == PROTOCOL_FULL:
+        socketio.emit('desk_update', desk_versions.snapshot(target_date), to=sid)
+        return
+    missed = desk_versions.deltas_since(target_date, last_version) if last_version else None
+    if missed is None:
+        socketio.emit('desk_snapshot', desk_versions.snapshot(target_date), to=sid)
+    else:
+        for missed_delta in missed:
+            socketio.emit('desk_delta', missed_delta, to=sid)
+
+def resync_client(sid: str, target_date: str):
+    """
+    Send a snapshot to a delta client whose backlog of deltas was dropped
+    because it could not keep up
+    """
+    if subscriptions.client_protocol(sid, target_date) != PROTOCOL_DELTA:
+        return
+    if not cluster.forward_sync(sid, target_date, PROTOCOL_DELTA, None):
+        sync_client(sid, target_date, PROTOCOL_DELTA)
+
+def classify_desk_packet(event: str, data) -> Tuple[Optional[Tuple[str, str]], Optional[str]]:
+    """
+    How desk emits queued for a slow client relate: a full list supersedes
+    everything queued for its date, a delta needs all the ones before it
+    """
+    target_date = data.get('date') if isinstance(data, dict) else None
+    if target_date is None:
+        return None, None
+    if event in ('desk_update', 'desk_snapshot'):
+        return ('desks', target_date), STATE
+    if event == 'desk_delta':
+        return ('desks', target_date), CHAIN
+    return None, None
+
+if hasattr(client_manager, 'classify_packet'):
+    client_manager.classify_packet = classify_desk_packet
+    client_manager.on_resync = lambda sid, key: resync_client(sid, key[1])
+
+def unsubscribe_client(sid: str, target_date: str):
+    protocol = subscriptions.unsubscribe(sid, target_date)
+    if protocol is not None:
+        leave_room(desk_room(target_date, protocol))
+
+def check_date_limit(sid: str, requested_dates: List[str]) -> bool:
+    max_dates = DESK_UPDATES_CONFIG['max_dates_per_client']
+    if len(set(subscriptions.client_dates(sid)) | set(requested_dates)) > max_dates:
+        emit('error', {'message': f'A client can view at most {max_dates} dates at once.'})
+        return False
+    return True
 
 @socketio.on('connect')
 def handle_connect():
     """
-    Handle client connection
+    Handle client connection; clients start out viewing today's desks
     """
     client_id = request.sid
-    connected_clients.add(client_id)
-    print(f"Client connected: {client_id}")
-    
-    # Send initial desk data for the current_display_date
-    desk_data, status_code = DeskData.get_desk_availability(current_display_date)
-    print(f"[Initial Connect] Fetched desk data for {current_display_date}: {desk_data}, Status: {status_code}")
-    if status_code == 200:
-        emit('desk_update', desk_data)
-        print("[Initial Connect] Emitted desk_update event.")
+    subscriptions.add_client(client_id)
+    logger.debug("Client connected: %s", client_id)
+    subscribe_client(client_id, date.today().isoformat())
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -55,40 +318,184 @@ def handle_disconnect():
     Handle client disconnection
     """
     client_id = request.sid
-    if client_id in connected_clients:
-        connected_clients.remove(client_id)
-        print(f"Client disconnected: {client_id}")
+    subscriptions.remove_client(client_id)
+    desk_versions.prune(cluster.active_dates())
+    logger.debug("Client disconnected: %s", client_id)
 
 @socketio.on('request_desk_update_by_date')
 def handle_request_desk_update_by_date(data):
     """
-    Handle request from client to update desk data for a specific date.
+    Switch this client to a single date: it leaves every other date's room.
     """
-    global current_display_date
-    requested_date = data.get('date')
-    if requested_date:
-        try:
-            # Validate date format (YYYY-MM-DD)
-            date.fromisoformat(requested_date)
-            current_display_date = requested_date
-            print(f"Client requested desk data for date: {current_display_date}")
-            
-            # Immediately send updated data for the new date
-            desk_data, status_code = DeskData.get_desk_availability(current_display_date)
-            if status_code == 200:
-                emit('desk_update', desk_data)
-                print("Emitted desk_update event for new date.")
-            else:
-                emit('error', {'message': f'Failed to fetch data for {requested_date}: {desk_data.get("error")}'})
-        except ValueError:
-            emit('error', {'message': f'Invalid date format. Please use YYYY-MM-DD.'})
-    else:
+    requested_date = (data or {}).get('date')
+    if not requested_date:
         emit('error', {'message': 'Date not provided in request.'})
+        return
+    try:
+        # Validate date format (YYYY-MM-DD)
+        requested_date = date.fromisoformat(requested_date).isoformat()
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Invalid date format. Please use YYYY-MM-DD.'})
+        return
+
+    client_id = request.sid
+    for target_date in subscriptions.client_dates(client_id):
+        if target_date != requested_date:
+            unsubscribe_client(client_id, target_date)
+    desk_versions.prune(cluster.active_dates())
+    logger.debug("Client %s requested desk data for date: %s", client_id, requested_date)
+    subscribe_client(client_id, requested_date)
+
+@socketio.on('subscribe_desk_dates')
+def handle_subscribe_desk_dates(data):
+    """
+    Add dates to this client's subscriptions, e.g. {"dates": ["2025-01-01", "2025-01-02"]}
+    """
+    client_id = request.sid
+    try:
+        requested_dates = parse_dates((data or {}).get('dates'))
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Invalid dates. Please send a list of YYYY-MM-DD dates.'})
+        return
+    if not check_date_limit(client_id, requested_dates):
+        return
+    for target_date in requested_dates:
+        subscribe_client(client_id, target_date)
+
+@socketio.on('subscribe_desks')
+def handle_subscribe_desks(data):
+    """
+    Versioned subscription: {"dates": [...], "versions": {"2025-01-01": 1736000000123}}.
+    The client receives desk_snapshot once, then desk_delta messages whose
+    base_version is the version it already has. Passing the last version it
+    saw for a date resumes from there with only the missed deltas.
+    """
+    client_id = request.sid
+    data = data or {}
+    try:
+        requested_dates = parse_dates(data.get('dates'))
+        versions = {date.fromisoformat(key).isoformat(): int(value)
+                    for key, value in (data.get('versions') or {}).items()}
+    except (AttributeError, TypeError, ValueError):
+        emit('error', {'message': 'Invalid subscription. Send {"dates": [YYYY-MM-DD, ...], "versions": {date: version}}.'})
+        return
+    if not check_date_limit(client_id, requested_dates):
+        return
+    for target_date in requested_dates:
+        subscribe_client(client_id, target_date, PROTOCOL_DELTA, versions.get(target_date))
+
+@socketio.on('unsubscribe_desk_dates')
+def handle_unsubscribe_desk_dates(data):
+    """
+    Stop receiving updates for the given dates
+    """
+    client_id = request.sid
+    try:
+        requested_dates = parse_dates((data or {}).get('dates'))
+    except (TypeError, ValueError):
+        emit('error', {'message': 'Invalid dates. Please send a list of YYYY-MM-DD dates.'})
+        return
+    for target_date in requested_dates:
+        unsubscribe_client(client_id, target_date)
+    desk_versions.prune(cluster.active_dates())
+
+def desk_validator(target_date: str) -> Optional[Validator]:
+    """
+    Version of target_date's availability as seen by the NOTIFY listener.
+    The query string is part of the tag since filters and pages change the body.
+
+    Only notify mode with the listener connected knows when availability
+    last changed. In poll mode, or while the listener is disconnected, this
+    is None: there is no ETag or Last-Modified, no request is ever answered
+    304, and every request runs the query (counted in
+    desk_validator_unavailable_total). desk_versions is not used instead: in
+    poll mode it can be a poll interval behind the database, and a 304 from
+    it could keep a client on availability that has already changed.
+    """
+    version = desk_changes_tracker.version(target_date)
+    if version is None:
+        DESK_VALIDATOR_UNAVAILABLE.labels(
+            'poll' if DESK_UPDATES_CONFIG['mode'] == 'poll' else 'listener_disconnected').inc()
+        return None
+    tag, changed_at = version
+    query = '&'.join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+    variant = hashlib.sha1(query.encode('utf-8')).hexdigest()[:10]
+    return Validator(etag=f"desks-{target_date}-{tag}-{variant}", changed_at=changed_at)
 
 @desk_bp.route('/api/desks', methods=['GET'])
+@compressed
+@conditional_response(lambda: desk_validator(date.today().isoformat()))
 def get_desks():
     """
-    Regular HTTP endpoint for getting desk data (current date only)
+    Regular HTTP endpoint for getting desk data (current date only).
+    Optional filters: city, building, floor, desk_type_id, status, slot_type,
+    max_price, only_available. Pass limit (and after=<next_cursor>) to page.
     """
-    desk_data, status_code = DeskData.get_desk_availability(date.today().isoformat())
-    return jsonify(desk_data), status_code 
\ No newline at end of file
+    try:
+        filters = DeskFilters.from_args(request.args, DESK_API_CONFIG['max_page_size'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    desk_data, status_code = DeskData.get_desk_availability_json(date.today().isoformat(), filters=filters)
+    if status_code != 200:
+        return jsonify(desk_data), status_code
+    return Response(raw_json.dumps(desk_data, separators=(',', ':')), mimetype='application/json')
+
+def parse_range(args) -> Tuple[str, str, bool]:
+    """
+    (start_date, end_date, stream) from query parameters; raises ValueError
+    when the range is invalid or longer than allowed
+    """
+    try:
+        start = date.fromisoformat(args.get('start_date', ''))
+        end = date.fromisoformat(args.get('end_date', ''))
+    except ValueError:
+        raise ValueError('start_date and end_date are required, as YYYY-MM-DD.')
+    if end < start:
+        raise ValueError('end_date must not be before start_date.')
+    stream = args.get('stream', '').lower() in ('1', 'true', 'yes')
+    max_days = DESK_API_CONFIG['max_stream_range_days' if stream else 'max_range_days']
+    if (end - start).days + 1 > max_days:
+        raise ValueError(f'A range can span at most {max_days} days{" when streamed" if stream else ""}.')
+    return start.isoformat(), end.isoformat(), stream
+
+def desk_range_validator() -> Optional[Validator]:
+    """
+    Like desk_validator, covering every date of the range
+    """
+    try:
+        start_date, end_date, _ = parse_range(request.args)
+    except ValueError:
+        return None
+    start = date.fromisoformat(start_date)
+    days = (date.fromisoformat(end_date) - start).days + 1
+    version = desk_changes_tracker.version(*[(start + timedelta(days=offset)).isoformat() for offset in range(days)])
+    if version is None:
+        return None
+    tag, changed_at = version
+    query = '&'.join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+    variant = hashlib.sha1(query.encode('utf-8')).hexdigest()[:10]
+    return Validator(etag=f"desks-range-{tag}-{variant}", changed_at=changed_at)
+
+@desk_bp.route('/api/desks/range', methods=['GET'])
+@compressed
+@conditional_response(desk_range_validator)
+def get_desk_range():
+    """
+    Availability for every day from start_date to end_date (inclusive) as a
+    desk x date x slot grid. Takes the desk filters of /api/desks plus
+    slot_type, limit and after. With stream=1 the grid is sent as
+    newline-delimited JSON, one desk per line, for ranges up to a year.
+    """
+    try:
+        start_date, end_date, stream = parse_range(request.args)
+        filters = DeskFilters.from_args(request.args, DESK_API_CONFIG['max_page_size'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if filters.max_price is not None or filters.only_available:
+        return jsonify({'error': 'max_price and only_available are not supported for date ranges.'}), 400
+
+    if stream:
+        return Response(DeskData.stream_availability_range(start_date, end_date, filters),
+                        mimetype='application/x-ndjson')
+    range_data, status_code = DeskData.get_availability_range(start_date, end_date, filters)
+    return jsonify(range_data), status_code
@@ -0,0 +1,30 @@
+from flask import Blueprint, Response, jsonify
+from app.routes.desk_routes import client_manager, cluster
+from app.utils import metrics
+from app.utils.db_utils import get_pool_stats
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/api/health/db-pool', methods=['GET'])
+def get_db_pool_stats():
+    """
+    Connection pool statistics, used to size DB_POOL_MIN / DB_POOL_MAX
+    """
+    return jsonify({"pools": get_pool_stats()}), 200
+
+@health_bp.route('/api/health/socketio', methods=['GET'])
+def get_socketio_stats():
+    """
+    Slow-client outboxes and broadcaster status, used to tune SOCKETIO_BACKPRESSURE_*
+    """
+    backpressure = client_manager.stats() if hasattr(client_manager, 'classify_packet') else None
+    return jsonify({"backpressure": backpressure, "cluster": cluster.stats()}), 200
+
+@health_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus scrape endpoint: request, query, pool and Socket.IO emit metrics
+    """
+    if not metrics.enabled():
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,9 +1,17 @@
 from flask import Blueprint, jsonify
+from typing import Optional
+import threading
+from app.config.cache import MASTER_DATA_CACHE_CONFIG
 from app.models.master_data_model import MasterData
+from app.utils.cache_invalidation import MASTER_DATA_CHANNEL, InvalidationListener, publish
+from app.utils.http_cache import compressed, conditional_response
+from app.utils.session_tokens import admin_required
 
 master_data_bp = Blueprint('master_data', __name__)
 
 @master_data_bp.route('/api/master-data', methods=['GET'])
+@compressed
+@conditional_response(lambda: MasterData.get_validator('all'))
 def get_all_master_data():
     """
     Get all master data (locations, slots, desk types) in a single call
@@ -12,6 +20,8 @@ def get_all_master_data():
     return jsonify(result), status_code
 
 @master_data_bp.route('/api/master-data/locations', methods=['GET'])
+@compressed
+@conditional_response(lambda: MasterData.get_validator('locations'))
 def get_locations():
     """
     Get all locations
@@ -20,6 +30,8 @@ def get_locations():
     return jsonify({"locations": locations}), status_code
 
 @master_data_bp.route('/api/master-data/slots', methods=['GET'])
+@compressed
+@conditional_response(lambda: MasterData.get_validator('slots'))
 def get_slots():
     """
     Get all slots
@@ -28,9 +40,36 @@ def get_slots():
     return jsonify({"slots": slots}), status_code
 
 @master_data_bp.route('/api/master-data/desk-types', methods=['GET'])
+@compressed
+@conditional_response(lambda: MasterData.get_validator('desk_types'))
 def get_desk_types():
     """
     Get all desk types
     """
     desk_types, status_code = MasterData.get_desk_types()
-    return jsonify({"desk_types": desk_types}), status_code 
\ No newline at end of file
+    return jsonify({"desk_types": desk_types}), status_code 
+
+@master_data_bp.route('/api/master-data/cache/invalidate', methods=['POST'])
+@admin_required
+def invalidate_master_data_cache():
+    """
+    Drop cached master data in every process so the next request reloads it
+    (call after admin writes). Needs an ADMIN_API_TOKENS Bearer token.
+    """
+    MasterData.invalidate_cache()
+    if not publish(MASTER_DATA_CHANNEL):
+        return jsonify({"error": "Invalidated in this process only, please retry"}), 503
+    return jsonify({"message": "Master data cache invalidated"}), 200
+
+@master_data_bp.route('/api/master-data/cache/stats', methods=['GET'])
+def get_master_data_cache_stats():
+    """
+    Cache hit/miss counters for monitoring
+    """
+    return jsonify(MasterData.cache_stats()), 200
+
+def start_cache_invalidation() -> Optional[threading.Thread]:
+    """Drop this process's master data when any process is asked to invalidate it."""
+    if not MASTER_DATA_CACHE_CONFIG['listen']:
+        return None
+    return InvalidationListener({MASTER_DATA_CHANNEL: MasterData.invalidate_cache}).start()
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-from app.utils.db_utils import get_db_connection
+from app.utils.db_utils import db_connection
+from app.utils.passwords import PasswordHashingBusy, busy_response, hash_password
 from app.config.database import DB_CONFIG
 import re
 
@@ -32,43 +33,47 @@ def signup():
     if not validate_email(email):
         return jsonify({'error': 'Invalid email format'}), 400
 
-    conn = get_db_connection(DB_CONFIG)
-    if not conn:
-        return jsonify({'error': 'Database connection failed'}), 500
-
+    # Hashed before taking a connection, which it would otherwise hold idle
     try:
-        cursor = conn.cursor()
-        # Check if email already exists
-        cursor.execute("SELECT id FROM sena.users WHERE email = %s", (email,))
-        if cursor.fetchone():
-            return jsonify({'error': 'Email already registered'}), 409
+        password_hash = hash_password(password)
+    except PasswordHashingBusy:
+        return busy_response()
+
+    with db_connection(DB_CONFIG) as conn:
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
 
-        # Create new user - let database generate UUID
-        cursor.execute("""
-            INSERT INTO sena.users (email, first_name, last_name, phone, password)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id, email, first_name, last_name, phone, created_at, updated_at, is_active
-        """, (email, first_name, last_name, phone, password))
+        try:
+            cursor = conn.cursor()
+            # Check if email already exists
+            cursor.execute("SELECT id FROM sena.users WHERE email = %s", (email,))
+            if cursor.fetchone():
+                return jsonify({'error': 'Email already registered'}), 409
+
+            # Create new user - let database generate UUID
+            cursor.execute("""
+                INSERT INTO sena.users (email, first_name, last_name, phone, password)
+                VALUES (%s, %s, %s, %s, %s)
+                RETURNING id, email, first_name, last_name, phone, created_at, updated_at, is_active
+            """, (email, first_name, last_name, phone, password_hash))
         
-        new_user = cursor.fetchone()
-        conn.commit()
+            new_user = cursor.fetchone()
+            conn.commit()
         
-        return jsonify({
-            'message': 'User created successfully',
-            'user': {
-                'id': new_user[0],
-                'email': new_user[1],
-                'first_name': new_user[2],
-                'last_name': new_user[3],
-                'phone': new_user[4],
-                'created_at': new_user[5],
-                'updated_at': new_user[6],
-                'is_active': new_user[7]
-            }
-        }), 201
+            return jsonify({
+                'message': 'User created successfully',
+                'user': {
+                    'id': new_user[0],
+                    'email': new_user[1],
+                    'first_name': new_user[2],
+                    'last_name': new_user[3],
+                    'phone': new_user[4],
+                    'created_at': new_user[5],
+                    'updated_at': new_user[6],
+                    'is_active': new_user[7]
+                }
+            }), 201
 
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': f'Failed to create user: {str(e)}'}), 500
-    finally:
-        conn.close()
+        except Exception as e:
+            conn.rollback()
+            return jsonify({'error': f'Failed to create user: {str(e)}'}), 500
@@ -0,0 +1,156 @@
+"""
+Maintain the desk_daily_availability read model (migrations/004).
+
+Triggers keep materialized dates current; this command adds dates, rebuilds
+them in bulk and checks them against the live derivation:
+
+    python -m app.utils.availability_read_model rebuild            # today + DESK_READ_MODEL_WINDOW_DAYS
+    python -m app.utils.availability_read_model rebuild --from 2025-01-01 --to 2025-01-31
+    python -m app.utils.availability_read_model check [--from ... --to ...]
+    python -m app.utils.availability_read_model prune --before 2025-01-01
+
+Each date is rebuilt in its own transaction so bookings are only held up
+for one date at a time. Run rebuild daily to roll the window forward.
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from typing import Dict, List
+
+from app.config.database import DB_CONFIG
+from app.config.realtime import DESK_READ_MODEL_CONFIG
+from app.utils.db_utils import get_db_connection
+
+
+def rebuild(conn, start: date, end: date) -> int:
+    """Materialize and rebuild every date in [start, end]; returns rows written."""
+    cursor = conn.cursor()
+    written = 0
+    day = start
+    while day <= end:
+        try:
+            cursor.execute("SELECT sena.rebuild_desk_daily_availability(%s, %s)", (day, day))
+            written += cursor.fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        day += timedelta(days=1)
+    return written
+
+
+def check(conn, start: date, end: date, sample: int = 20) -> Dict:
+    """
+    Compare materialized rows in [start, end] with the live derivation.
+    Returns {"dates", "rows", "mismatches", "examples"}; mismatches counts
+    rows that are missing, extra or different.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        WITH live AS (
+            SELECT * FROM sena.desk_daily_availability_source
+            WHERE day BETWEEN %(start)s AND %(end)s
+        ),
+        stored AS (
+            SELECT * FROM sena.desk_daily_availability
+            WHERE day BETWEEN %(start)s AND %(end)s
+        ),
+        diff AS (
+            SELECT
+                COALESCE(live.desk_id, stored.desk_id) AS desk_id,
+                COALESCE(live.day, stored.day) AS day,
+                COALESCE(live.slot_id, stored.slot_id) AS slot_id,
+                live.status AS live_status,
+                stored.status AS stored_status,
+                live.price AS live_price,
+                stored.price AS stored_price
+            FROM live
+            FULL JOIN stored
+                ON stored.day = live.day
+                AND stored.desk_id = live.desk_id
+                AND stored.slot_id = live.slot_id
+            WHERE (live.status, live.price) IS DISTINCT FROM (stored.status, stored.price)
+                OR live.desk_id IS NULL
+                OR stored.desk_id IS NULL
+        )
+        SELECT
+            (SELECT COUNT(*) FROM sena.desk_availability_days WHERE day BETWEEN %(start)s AND %(end)s),
+            (SELECT COUNT(*) FROM stored),
+            (SELECT COUNT(*) FROM diff),
+            (SELECT COALESCE(JSON_AGG(e), '[]') FROM (
+                SELECT * FROM diff ORDER BY day, desk_id, slot_id LIMIT %(sample)s
+            ) AS e)
+    """, {"start": start, "end": end, "sample": sample})
+    dates, rows, mismatches, examples = cursor.fetchone()
+    conn.rollback()
+    return {"dates": dates, "rows": rows, "mismatches": mismatches, "examples": examples}
+
+
+def prune(conn, before: date) -> int:
+    """Stop materializing dates before `before`; returns dates dropped."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM sena.desk_availability_days WHERE day < %s", (before,))
+        dropped = cursor.rowcount
+        conn.commit()
+        return dropped
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def materialized_range(conn) -> List:
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(day), MAX(day) FROM sena.desk_availability_days")
+    first, last = cursor.fetchone()
+    conn.rollback()
+    return [first, last]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('rebuild', 'check', 'prune'))
+    parser.add_argument('--from', dest='start', type=date.fromisoformat, help='first date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='end', type=date.fromisoformat, help='last date (YYYY-MM-DD)')
+    parser.add_argument('--before', type=date.fromisoformat, help='prune: drop dates before this one')
+    parser.add_argument('--sample', type=int, default=20, help='check: mismatching rows to print')
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        return 1
+    try:
+        if args.command == 'rebuild':
+            start = args.start or date.today()
+            end = args.end or start + timedelta(days=DESK_READ_MODEL_CONFIG['window_days'] - 1)
+            written = rebuild(conn, start, end)
+            print(f"Rebuilt {start} .. {end}: {written} rows written")
+            return 0
+
+        if args.command == 'prune':
+            before = args.before or date.today()
+            print(f"Dropped {prune(conn, before)} dates before {before}")
+            return 0
+
+        start, end = args.start, args.end
+        if start is None or end is None:
+            first, last = materialized_range(conn)
+            if first is None:
+                print("Nothing is materialized")
+                return 0
+            start, end = start or first, end or last
+        result = check(conn, start, end, args.sample)
+        print(f"Checked {result['dates']} dates ({start} .. {end}), {result['rows']} rows: "
+              f"{result['mismatches']} mismatches")
+        for example in result['examples']:
+            print(f"  {example}")
+        return 1 if result['mismatches'] else 0
+    except Exception as e:
+        print(f"Read model {args.command} failed: {e}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Invalidate in-process caches in every app process with Postgres NOTIFY.
+
+publish(channel) raises a notification that each process's
+InvalidationListener receives on a dedicated LISTEN connection, calling the
+callback registered for that channel. After every (re)connect all
+callbacks are called, since notifications may have been missed in between.
+"""
+import logging
+import select
+import threading
+import time
+from typing import Callable, Dict
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from app.config.database import DB_CONFIG
+from app.utils.db_utils import db_connection, get_db_connection
+
+logger = logging.getLogger(__name__)
+
+MASTER_DATA_CHANNEL = 'master_data_changes'
+
+
+def publish(channel: str) -> bool:
+    """Notify every listening process; returns False if the notification could not be sent."""
+    with db_connection(DB_CONFIG) as conn:
+        if not conn:
+            return False
+        try:
+            conn.cursor().execute("SELECT pg_notify(%s, '')", (channel,))
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.error("Could not notify %s: %s", channel, e)
+            return False
+
+
+class InvalidationListener:
+    def __init__(self, callbacks: Dict[str, Callable[[], None]], reconnect_delay: float = 5,
+                 keepalive_interval: float = 60):
+        self.callbacks = callbacks
+        self.reconnect_delay = reconnect_delay
+        self.keepalive_interval = keepalive_interval
+
+    def run(self):
+        while True:
+            conn = get_db_connection(DB_CONFIG)
+            if conn:
+                try:
+                    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                    cursor = conn.cursor()
+                    for channel in self.callbacks:
+                        cursor.execute(f"LISTEN {channel}")
+                    for channel in self.callbacks:
+                        self._deliver(channel)
+                    self._listen(conn)
+                except Exception as e:
+                    logger.warning("Cache invalidation listener connection lost: %s", e)
+                finally:
+                    conn.close()
+            time.sleep(self.reconnect_delay)
+
+    def _listen(self, conn):
+        while True:
+            readable, _, _ = select.select([conn], [], [], self.keepalive_interval)
+            if not readable:
+                conn.cursor().execute("SELECT 1")
+            conn.poll()
+            channels = set()
+            while conn.notifies:
+                channels.add(conn.notifies.pop(0).channel)
+            for channel in channels:
+                self._deliver(channel)
+
+    def _deliver(self, channel: str):
+        callback = self.callbacks.get(channel)
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            logger.exception("Error invalidating %s: %s", channel, e)
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,105 @@
+"""
+Opt-in coalescing of identical concurrent reads.
+
+    class DeskData:
+        @staticmethod
+        @coalesce('desk_availability')
+        def get_desk_availability_json(target_date=None, desk_ids=None, filters=None):
+            ...
+
+While a call is running, calls with the same arguments wait for it and get
+its result instead of opening their own connection and running the same
+query. Nothing is cached once the call returns. The result is shared by
+every waiting caller, so callers must not modify it.
+
+A caller that must see every change made before some moment (it was told
+of a change, or is about to tag the response with a version) wraps the
+call in fresh_since(that moment) so it does not join a call that started
+earlier:
+
+    with fresh_since(started):
+        DeskData.get_desk_json_by_id(target_date)
+
+Waiting uses threading primitives, which gunicorn's eventlet worker patches
+before the app is loaded, so waiting callers are green threads that yield.
+"""
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, List, Optional
+
+from app.config.database import DB_COALESCE_CONFIG
+from app.utils import metrics
+from app.utils.single_flight import SingleFlight
+
+COALESCED_CALLS = metrics.Counter(
+    'coalesced_calls_total',
+    'Calls to coalesced functions: executed, or shared with an identical call in flight',
+    ['function', 'result'])
+
+_flights: Dict[str, SingleFlight] = {}
+_floor = threading.local()
+
+
+@contextmanager
+def fresh_since(timestamp: Optional[float]):
+    """Coalesced calls in the block only share calls that started at or after timestamp (epoch seconds)."""
+    previous = getattr(_floor, 'timestamp', None)
+    if timestamp is not None:
+        _floor.timestamp = timestamp if previous is None else max(previous, timestamp)
+    try:
+        yield
+    finally:
+        _floor.timestamp = previous
+
+
+def freeze(value) -> Hashable:
+    """A hashable stand-in for an argument: lists, sets, dicts and plain objects by value."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted(((key, freeze(item)) for key, item in value.items()), key=lambda entry: repr(entry[0])))
+    if hasattr(value, '__dict__') and not callable(value):
+        return (type(value).__name__, freeze(vars(value)))
+    return value
+
+
+def coalesce(name: str, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Share one call among identical concurrent calls to the decorated function.
+    Calls are identical when key(*args, **kwargs) is equal; by default every
+    argument is compared by value, defaults included.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        flight = _flights[name] = SingleFlight()
+
+        def call_key(args, kwargs) -> Hashable:
+            if key is not None:
+                return key(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return freeze(bound.arguments)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not DB_COALESCE_CONFIG['enabled']:
+                return fn(*args, **kwargs)
+            result, shared = flight.do(call_key(args, kwargs), fn, *args,
+                                       not_before=getattr(_floor, 'timestamp', None), **kwargs)
+            COALESCED_CALLS.labels(name, 'shared' if shared else 'executed').inc()
+            return result
+
+        return wrapper
+    return decorator
+
+
+def in_flight() -> List:
+    return [((name,), flight.in_flight()) for name, flight in sorted(_flights.items())]
+
+
+metrics.CallbackMetric('coalesced_calls_in_flight', 'Distinct coalesced calls currently running',
+                       ['function'], in_flight)
@@ -1,15 +1,348 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
 import psycopg2
+from psycopg2 import extensions
+
+from app.config.database import DB_CONFIG, DB_POOL_CONFIG
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[tuple, "ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+_green = False
+
+DB_QUERY_DURATION = metrics.Histogram(
+    'db_query_duration_seconds', 'Time spent in cursor.execute, by calling function', ['caller'])
+DB_QUERY_ERRORS = metrics.Counter(
+    'db_query_errors_total', 'Statements that raised, by calling function', ['caller'])
+DB_POOL_WAIT = metrics.Histogram(
+    'db_pool_wait_seconds', 'Time to check out a pooled connection', ['pool'])
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the checkout timeout."""
 
-def get_db_connection(db_config):
+
+def _use_green_driver() -> bool:
+    """
+    Make psycopg2 cooperate with eventlet when the process is monkey patched
+    (gunicorn's eventlet worker patches before the app is loaded), so that a
+    query only blocks its own green thread instead of the whole hub.
+    """
+    global _green
+    if _green:
+        return True
     try:
-        conn = psycopg2.connect(
-            host=db_config['host'],
-            port=db_config['port'],
-            dbname=db_config['dbname'],
-            user=db_config['user'],
-            password=db_config['password']
-        )
-        return conn
+        from eventlet import patcher
+        if patcher.is_monkey_patched('socket'):
+            from eventlet.support import psycopg2_patcher
+            psycopg2_patcher.make_psycopg_green()
+            _green = True
+    except ImportError:
+        pass
+    return _green
+
+
+def get_db_connection(db_config, connect_timeout: Optional[int] = None, **connect_params):
+    """
+    Open a new, unpooled connection. Prefer db_connection() for request work;
+    this is meant for long-lived dedicated connections and for the pool itself.
+    connect_params are passed on to libpq (keepalives, options, ...).
+    """
+    timeout = connect_timeout or DB_POOL_CONFIG['connect_timeout']
+    try:
+        if _use_green_driver():
+            # libpq ignores connect_timeout for asynchronous connects
+            import eventlet
+            with eventlet.Timeout(timeout, psycopg2.OperationalError("connection timed out")):
+                return _connect(db_config, timeout, **connect_params)
+        return _connect(db_config, timeout, **connect_params)
     except Exception as e:
-        print(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
         return None
+
+
+def _connect(db_config, connect_timeout: int, **connect_params):
+    return psycopg2.connect(
+        host=db_config['host'],
+        port=db_config['port'],
+        dbname=db_config['dbname'],
+        user=db_config['user'],
+        password=db_config['password'],
+        connect_timeout=connect_timeout,
+        cursor_factory=InstrumentedCursor if metrics.enabled() else None,
+        **connect_params
+    )
+
+
+class InstrumentedCursor(extensions.cursor):
+    """
+    Cursor that records the duration and failures of every statement,
+    labelled with the function that issued it (e.g. DeskData._execute_availability).
+    """
+
+    def execute(self, query, vars=None):
+        caller = sys._getframe(1).f_code.co_qualname
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        except Exception:
+            DB_QUERY_ERRORS.labels(caller).inc()
+            raise
+        finally:
+            DB_QUERY_DURATION.labels(caller).observe(time.perf_counter() - started)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of psycopg2 connections.
+
+    Connections are health checked on checkout when they have been idle longer
+    than health_check_interval, rolled back on return and discarded when broken.
+    Idle connections above minconn are closed after idle_timeout.
+    """
+
+    def __init__(
+        self,
+        db_config: Dict,
+        minconn: int = 1,
+        maxconn: int = 10,
+        connect_timeout: int = 5,
+        checkout_timeout: float = 10,
+        health_check_interval: float = 30,
+        idle_timeout: float = 300
+    ):
+        if maxconn < 1 or minconn < 0 or minconn > maxconn:
+            raise ValueError("Invalid pool size: require 0 <= minconn <= maxconn and maxconn >= 1")
+        self.db_config = db_config
+        self.name = f"{db_config.get('host')}/{db_config.get('dbname')}"
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.connect_timeout = connect_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.idle_timeout = idle_timeout
+
+        self._idle = deque()  # (conn, returned_at), most recently returned on the right
+        self._size = 0  # open connections plus connections being opened
+        self._in_use = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'connect_failures': 0,
+            'checkouts': 0,
+            'checkout_timeouts': 0,
+            'health_check_failures': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0
+        }
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a healthy connection, opening one if the pool is below maxconn."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        while True:
+            conn, returned_at, must_open = None, None, False
+            with self._cond:
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['checkout_timeouts'] += 1
+                        raise PoolTimeout(f"No database connection available within {timeout}s")
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    self._size += 1
+                    must_open = True
+
+            if must_open:
+                conn = self._open()
+                if conn is None:
+                    raise psycopg2.OperationalError("Database connection failed")
+            elif not self._is_healthy(conn, returned_at):
+                with self._cond:
+                    self._stats['health_check_failures'] += 1
+                self._discard(conn)
+                continue
+
+            waited = time.monotonic() - started
+            DB_POOL_WAIT.labels(self.name).observe(waited)
+            with self._cond:
+                self._in_use += 1
+                self._stats['checkouts'] += 1
+                self._stats['wait_time_total'] += waited
+                self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+            return conn
+
+    def putconn(self, conn, discard: bool = False):
+        """Return a connection; it is rolled back, or closed if broken or discard is set."""
+        with self._cond:
+            self._in_use -= 1
+        if not discard and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+        if discard or conn.closed:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            expired = self._expire_idle()
+            self._cond.notify()
+        for stale in expired:
+            self._close(stale)
+
+    def closeall(self):
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'minconn': self.minconn,
+                'maxconn': self.maxconn
+            })
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = stats['wait_time_total'] / checkouts if checkouts else 0.0
+        return stats
+
+    def _open(self):
+        conn = get_db_connection(self.db_config, self.connect_timeout)
+        with self._cond:
+            if conn is None:
+                self._size -= 1
+                self._stats['connect_failures'] += 1
+                self._cond.notify()
+            else:
+                self._stats['connections_created'] += 1
+        return conn
+
+    def _is_healthy(self, conn, returned_at: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _expire_idle(self) -> list:
+        """Pop connections idle longer than idle_timeout, keeping at least minconn open. Caller holds the lock."""
+        expired = []
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._size > self.minconn and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            expired.append(conn)
+        return expired
+
+    def _discard(self, conn):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        self._close(conn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['connections_closed'] += 1
+
+
+def get_pool(db_config=None) -> ConnectionPool:
+    """Return the shared pool for db_config, creating it on first use."""
+    db_config = db_config or DB_CONFIG
+    key = tuple(sorted((k, str(v)) for k, v in db_config.items()))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(db_config, **DB_POOL_CONFIG)
+                _pools[key] = pool
+    return pool
+
+
+@contextmanager
+def db_connection(db_config=None):
+    """
+    Check out a pooled connection for the duration of the block.
+    Yields None when no connection could be obtained so callers can return
+    their usual "Database connection failed" response. Uncommitted work is
+    rolled back when the connection goes back to the pool.
+    """
+    pool = get_pool(db_config)
+    try:
+        conn = pool.getconn()
+    except Exception as e:
+        logger.error("Database connection error: %s", e)
+        conn = None
+
+    if conn is None:
+        yield None
+        return
+
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def get_pool_stats() -> Dict:
+    """Statistics for every pool created in this process."""
+    return {pool.name: pool.stats() for pool in list(_pools.values())}
+
+
+def _pool_gauges():
+    for name, stats in get_pool_stats().items():
+        for state in ('size', 'idle', 'in_use', 'waiting', 'maxconn'):
+            yield (name, state), stats[state]
+
+
+def _pool_events():
+    for name, stats in get_pool_stats().items():
+        for event in ('connections_created', 'connections_closed', 'connect_failures',
+                      'checkouts', 'checkout_timeouts', 'health_check_failures'):
+            yield (name, event), stats[event]
+
+
+metrics.CallbackMetric('db_pool_connections', 'Pooled connections by state', ['pool', 'state'], _pool_gauges)
+metrics.CallbackMetric('db_pool_events_total', 'Pool events since start', ['pool', 'event'], _pool_events,
+                       type='counter')
@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.utils.desk_rooms import PROTOCOL_DELTA, PROTOCOL_FULL, DeskSubscriptions
+from app.utils.leader_election import LeaderElection
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock name for the process that computes and broadcasts availability
+BROADCASTER_LOCK = 'sena.desk_broadcaster'
+
+# A sync request is (sid, target_date, protocol, last_version)
+SyncHandler = Callable[[str, str, str, Optional[int]], None]
+
+
+class DeskCluster:
+    """
+    Coordinates the processes serving Socket.IO clients so that desk
+    availability is computed by one of them, the elected broadcaster, whose
+    emits reach every process's clients through the message queue.
+
+    Each process announces the dates (and protocols) its clients subscribe
+    to with a heartbeat, so the broadcaster knows every active date. A
+    client that subscribes on another process needs the broadcaster's
+    snapshot (versions come from its store), so the request is forwarded.
+    While no broadcaster is known, e.g. between a leader's death and the
+    next election, requests are served by the process itself.
+
+    Without a message queue (manager is None) this process is the only one
+    and always the broadcaster.
+    """
+
+    def __init__(
+        self,
+        subscriptions: DeskSubscriptions,
+        manager=None,
+        heartbeat_interval: float = 5,
+        leader_retry_interval: float = 5
+    ):
+        self.subscriptions = subscriptions
+        self.manager = manager
+        self.worker_id = manager.host_id if manager is not None else uuid.uuid4().hex
+        self.heartbeat_interval = heartbeat_interval
+        self.expiry = heartbeat_interval * 3
+        self._lock = threading.Lock()
+        # worker_id -> (expires_at, {date: {protocol, ...}}, is_leader)
+        self._workers: Dict[str, Tuple[float, Dict[str, Set[str]], bool]] = {}
+        self._on_elected: Optional[Callable[[], None]] = None
+        self._on_sync: Optional[SyncHandler] = None
+        self.election = None
+        if manager is not None:
+            self.election = LeaderElection(
+                BROADCASTER_LOCK,
+                on_elected=self._elected,
+                on_demoted=self._heartbeat,
+                retry_interval=leader_retry_interval,
+                check_interval=heartbeat_interval
+            )
+
+    def start(self, on_elected: Optional[Callable[[], None]] = None, on_sync: Optional[SyncHandler] = None):
+        """
+        Join the cluster. on_elected runs whenever this process becomes the
+        broadcaster; on_sync serves a subscription forwarded by another process.
+        """
+        self._on_elected = on_elected
+        self._on_sync = on_sync
+        if self.manager is None:
+            return
+        self.manager.on_cluster_message('heartbeat', self._handle_heartbeat)
+        self.manager.on_cluster_message('sync', self._handle_sync)
+        for target in (self.election.run, self._heartbeat_loop):
+            threading.Thread(target=target, daemon=True).start()
+
+    def is_leader(self) -> bool:
+        return self.election is None or self.election.is_leader
+
+    def leader_known(self) -> bool:
+        if self.is_leader():
+            return True
+        now = time.monotonic()
+        with self._lock:
+            return any(is_leader and expires > now for expires, _, is_leader in self._workers.values())
+
+    def active_dates(self) -> List[str]:
+        """Dates with subscribers on any process."""
+        dates = set(self.subscriptions.active_dates())
+        for worker_dates in self._live_workers():
+            dates.update(worker_dates)
+        return sorted(dates)
+
+    def has_subscribers(self, target_date: str, protocol: str) -> bool:
+        if self.subscriptions.subscriber_count(target_date, protocol):
+            return True
+        return any(protocol in worker_dates.get(target_date, ()) for worker_dates in self._live_workers())
+
+    def forward_sync(self, sid: str, target_date: str, protocol: str, last_version: Optional[int]) -> bool:
+        """
+        Ask the broadcaster to bring a client of this process up to date.
+        Returns False when this process should do it itself.
+        """
+        if self.manager is None or not self.leader_known() or self.is_leader():
+            return False
+        self.manager.publish_cluster_message('sync', {
+            'worker_id': self.worker_id, 'sid': sid, 'date': target_date,
+            'protocol': protocol, 'last_version': last_version
+        })
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            'worker_id': self.worker_id,
+            'leader': self.is_leader(),
+            'leader_known': self.leader_known(),
+            'workers': 1 + len(self._live_workers())
+        }
+
+    def _live_workers(self) -> List[Dict[str, Set[str]]]:
+        now = time.monotonic()
+        with self._lock:
+            for worker_id in [w for w, (expires, _, _) in self._workers.items() if expires <= now]:
+                del self._workers[worker_id]
+            return [dates for _, dates, _ in self._workers.values()]
+
+    def _elected(self):
+        # Let the other processes know at once, so they stop serving syncs themselves
+        self._heartbeat()
+        if self._on_elected is not None:
+            self._on_elected()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            self._heartbeat()
+
+    def _heartbeat(self):
+        dates = {day: [protocol for protocol in (PROTOCOL_FULL, PROTOCOL_DELTA)
+                       if self.subscriptions.subscriber_count(day, protocol)]
+                 for day in self.subscriptions.active_dates()}
+        try:
+            self.manager.publish_cluster_message('heartbeat', {
+                'worker_id': self.worker_id, 'dates': dates, 'leader': self.is_leader()
+            })
+        except Exception as e:
+            logger.warning("Could not send cluster heartbeat: %s", e)
+
+    def _handle_heartbeat(self, body: Dict):
+        dates = {day: set(protocols) for day, protocols in (body.get('dates') or {}).items()}
+        with self._lock:
+            self._workers[body['worker_id']] = (time.monotonic() + self.expiry, dates, bool(body.get('leader')))
+
+    def _handle_sync(self, body: Dict):
+        if not self.is_leader() or self._on_sync is None:
+            return
+        # Count the date as active right away rather than at the next heartbeat
+        with self._lock:
+            expires, dates, is_leader = self._workers.get(body['worker_id'], (0, {}, False))
+            dates.setdefault(body['date'], set()).add(body['protocol'])
+            self._workers[body['worker_id']] = (max(expires, time.monotonic() + self.expiry), dates, is_leader)
+        self._on_sync(body['sid'], body['date'], body['protocol'], body.get('last_version'))
@@ -0,0 +1,189 @@
+import itertools
+import json
+import logging
+import select
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from app.config.database import DB_CONFIG
+from app.utils.db_utils import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Channel raised by the triggers in migrations/002_desk_change_notify.sql
+DESK_CHANGES_CHANNEL = 'desk_changes'
+
+# Pending changes keyed by date; a None key means every date and a None value
+# means every desk for that key.
+DeskChanges = Dict[Optional[str], Optional[Set[int]]]
+
+
+def add_change(changes: DeskChanges, payload: Dict):
+    """Fold one NOTIFY payload into changes."""
+    day = payload.get('date')
+    desk_id = payload.get('desk_id')
+    if day in changes and changes[day] is None:
+        return
+    if desk_id is None:
+        changes[day] = None
+    else:
+        changes.setdefault(day, set()).add(desk_id)
+
+
+def changes_for_date(changes: DeskChanges, day: str) -> Tuple[bool, Optional[Set[int]]]:
+    """
+    Returns (affected, desk_ids) for one date.
+    desk_ids is None when every desk has to be recomputed.
+    """
+    affected = False
+    desk_ids = set()
+    for key in (None, day):
+        if key not in changes:
+            continue
+        affected = True
+        if changes[key] is None:
+            return True, None
+        desk_ids |= changes[key]
+    return affected, desk_ids if affected else None
+
+
+class DeskChangeTracker:
+    """
+    Change stamps per date, fed by the listener, used as HTTP validators.
+    A version only means something while the listener is connected: every
+    (re)connect starts a new epoch because notifications may have been missed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._epoch: Optional[str] = None
+        self._global: Tuple[int, float] = (0, 0.0)
+        self._dates: Dict[str, Tuple[int, float]] = {}
+
+    def reset(self):
+        with self._lock:
+            self._epoch = uuid.uuid4().hex[:12]
+            self._global = (next(self._counter), time.time())
+            self._dates.clear()
+
+    def disconnected(self):
+        with self._lock:
+            self._epoch = None
+
+    def record(self, changes: DeskChanges):
+        with self._lock:
+            stamp = (next(self._counter), time.time())
+            if None in changes:
+                # Supersedes every per-date stamp
+                self._global = stamp
+                self._dates.clear()
+            for key in changes:
+                if key is not None:
+                    self._dates[key] = stamp
+
+    def version(self, *dates: str) -> Optional[Tuple[str, float]]:
+        """
+        (version, changed_at) covering the given dates, or None when changes
+        are not being tracked. changed_at is when the newest change was seen.
+        """
+        with self._lock:
+            if self._epoch is None:
+                return None
+            seq, changed_at = max([self._global] + [self._dates[day] for day in dates if day in self._dates])
+            return f"{self._epoch}-{seq}", changed_at
+
+
+class DeskChangeListener:
+    """
+    Holds a dedicated connection LISTENing on desk_changes and hands batches
+    of changes to on_changes. Notifications arriving within debounce seconds
+    of each other are delivered as one batch. After every (re)connect
+    on_resync is called, since changes may have been missed in between.
+    If a tracker is given it is kept in step with what has been received.
+    """
+
+    def __init__(
+        self,
+        on_changes: Callable[[DeskChanges], None],
+        on_resync: Optional[Callable[[], None]] = None,
+        debounce: float = 0.1,
+        reconnect_delay: float = 5,
+        keepalive_interval: float = 60,
+        tracker: Optional[DeskChangeTracker] = None
+    ):
+        self.on_changes = on_changes
+        self.tracker = tracker
+        self.on_resync = on_resync
+        self.debounce = debounce
+        self.reconnect_delay = reconnect_delay
+        self.keepalive_interval = keepalive_interval
+
+    def run(self):
+        while True:
+            conn = get_db_connection(DB_CONFIG)
+            if conn:
+                try:
+                    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                    conn.cursor().execute(f"LISTEN {DESK_CHANGES_CHANNEL}")
+                    logger.info("Listening on %s", DESK_CHANGES_CHANNEL)
+                    if self.tracker:
+                        self.tracker.reset()
+                    if self.on_resync:
+                        self._deliver(self.on_resync)
+                    self._listen(conn)
+                except Exception as e:
+                    logger.warning("Desk listener connection lost: %s", e)
+                finally:
+                    if self.tracker:
+                        self.tracker.disconnected()
+                    conn.close()
+            time.sleep(self.reconnect_delay)
+
+    def _listen(self, conn):
+        while True:
+            if not self._wait(conn, self.keepalive_interval):
+                # Nothing for a while: make sure the connection is still alive
+                conn.cursor().execute("SELECT 1")
+                if not conn.notifies:
+                    continue
+
+            changes: DeskChanges = {}
+            self._collect(conn, changes)
+            deadline = time.monotonic() + self.debounce
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if self._wait(conn, remaining):
+                    self._collect(conn, changes)
+            if changes:
+                if self.tracker:
+                    self.tracker.record(changes)
+                self._deliver(self.on_changes, changes)
+
+    @staticmethod
+    def _wait(conn, timeout: float) -> bool:
+        readable, _, _ = select.select([conn], [], [], timeout)
+        return bool(readable)
+
+    @staticmethod
+    def _collect(conn, changes: DeskChanges):
+        conn.poll()
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            try:
+                add_change(changes, json.loads(notify.payload))
+            except (ValueError, AttributeError):
+                changes[None] = None
+
+    @staticmethod
+    def _deliver(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.exception("Error handling desk changes: %s", e)
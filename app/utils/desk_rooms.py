@@ -0,0 +1,101 @@
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+# 'full' clients get the whole desk list on every change (desk_update);
+# 'delta' clients get a snapshot once and then versioned deltas.
+PROTOCOL_FULL = 'full'
+PROTOCOL_DELTA = 'delta'
+
+
+def desk_room(target_date: str, protocol: str = PROTOCOL_FULL) -> str:
+    """Socket.IO room for clients viewing desks on target_date (YYYY-MM-DD)."""
+    if protocol == PROTOCOL_DELTA:
+        return f"desks:{target_date}:delta"
+    return f"desks:{target_date}"
+
+
+class DeskSubscriptions:
+    """
+    Which dates each connected client is viewing and with which protocol,
+    and the reverse index used by the broadcaster to compute each active
+    date once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client_dates: Dict[str, Dict[str, str]] = {}
+        self._date_clients: Dict[str, Dict[str, Set[str]]] = {}
+
+    def add_client(self, sid: str):
+        with self._lock:
+            self._client_dates.setdefault(sid, {})
+
+    def remove_client(self, sid: str) -> List[str]:
+        """Forget sid; returns the dates it was subscribed to."""
+        with self._lock:
+            dates = self._client_dates.pop(sid, {})
+            for day, protocol in dates.items():
+                self._discard(day, protocol, sid)
+            return sorted(dates)
+
+    def subscribe(self, sid: str, target_date: str, protocol: str = PROTOCOL_FULL) -> Optional[str]:
+        """
+        Subscribe sid to target_date. Returns the protocol it was previously
+        subscribed with for that date, or None if it was not subscribed.
+        """
+        with self._lock:
+            dates = self._client_dates.setdefault(sid, {})
+            previous = dates.get(target_date)
+            if previous is not None and previous != protocol:
+                self._discard(target_date, previous, sid)
+            dates[target_date] = protocol
+            self._date_clients.setdefault(target_date, {}).setdefault(protocol, set()).add(sid)
+            return previous
+
+    def unsubscribe(self, sid: str, target_date: str) -> Optional[str]:
+        """Returns the protocol sid was subscribed with, or None."""
+        with self._lock:
+            dates = self._client_dates.get(sid)
+            if not dates or target_date not in dates:
+                return None
+            protocol = dates.pop(target_date)
+            self._discard(target_date, protocol, sid)
+            return protocol
+
+    def client_dates(self, sid: str) -> List[str]:
+        with self._lock:
+            return sorted(self._client_dates.get(sid, ()))
+
+    def client_protocol(self, sid: str, target_date: str) -> Optional[str]:
+        """Protocol sid is subscribed to target_date with, or None."""
+        with self._lock:
+            return self._client_dates.get(sid, {}).get(target_date)
+
+    def active_dates(self) -> List[str]:
+        """Dates with at least one subscribed client."""
+        with self._lock:
+            return sorted(self._date_clients)
+
+    def subscriber_count(self, target_date: str, protocol: Optional[str] = None) -> int:
+        with self._lock:
+            by_protocol = self._date_clients.get(target_date, {})
+            if protocol is not None:
+                return len(by_protocol.get(protocol, ()))
+            return sum(len(sids) for sids in by_protocol.values())
+
+    def stats(self) -> Tuple[int, int]:
+        """(connected clients, active dates)"""
+        with self._lock:
+            return len(self._client_dates), len(self._date_clients)
+
+    def _discard(self, target_date: str, protocol: str, sid: str):
+        by_protocol = self._date_clients.get(target_date)
+        if by_protocol is None:
+            return
+        sids = by_protocol.get(protocol)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del by_protocol[protocol]
+        if not by_protocol:
+            del self._date_clients[target_date]
@@ -0,0 +1,198 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from app.utils.raw_json import RawJSON
+
+
+def diff_desks(old: Dict[int, Dict], new: Dict[int, Dict]) -> Dict:
+    """
+    Describe how to turn old into new. Desks not in old are sent whole; for
+    existing desks only the changed top-level fields and the changed slots
+    (matched on slot_id) are sent.
+    Returns {"desks": [...], "removed": [desk_id, ...]}
+    """
+    changed = []
+    for desk_id in sorted(new):
+        desk = new[desk_id]
+        previous = old.get(desk_id)
+        if previous is None:
+            changed.append(desk)
+            continue
+        if previous == desk:
+            continue
+
+        patch = {'desk_id': desk_id}
+        for key, value in desk.items():
+            if key != 'slots' and previous.get(key) != value:
+                patch[key] = value
+
+        old_slots = {slot['slot_id']: slot for slot in previous.get('slots') or []}
+        new_slots = {slot['slot_id']: slot for slot in desk.get('slots') or []}
+        slots = [slot for slot_id, slot in new_slots.items() if old_slots.get(slot_id) != slot]
+        removed_slots = sorted(slot_id for slot_id in old_slots if slot_id not in new_slots)
+        if slots:
+            patch['slots'] = slots
+        if removed_slots:
+            patch['removed_slots'] = removed_slots
+        changed.append(patch)
+
+    removed = sorted(desk_id for desk_id in old if desk_id not in new)
+    return {'desks': changed, 'removed': removed}
+
+
+class _DateState:
+    __slots__ = ('version', 'desks', 'snapshot_json', 'deltas', 'fresh', 'last_active', 'refreshed_at')
+
+    def __init__(self, history: int):
+        self.version = 0
+        self.desks: Dict[int, str] = {}
+        self.snapshot_json: Optional[RawJSON] = None
+        self.deltas = deque(maxlen=history)
+        self.fresh = False
+        self.last_active = time.monotonic()
+        self.refreshed_at = 0.0
+
+
+class DeskVersionStore:
+    """
+    Latest desk list per date plus a bounded history of deltas, so a client
+    can be brought up to date from the version it last saw.
+
+    Versions come from one counter seeded with the wall clock in
+    milliseconds. They only ever increase, including across dates and
+    restarts, so a version a client kept from an earlier process is never
+    mistaken for a current one.
+
+    A date that loses all its subscribers is marked stale: it stops being
+    recomputed, so it cannot be the base for a partial refresh. Its state is
+    kept for `retention` seconds. A later full refresh is diffed against it,
+    so a client that comes back in that window still only gets a delta.
+
+    Desks are kept as the JSON text Postgres produced for each of them.
+    Unchanged desks are recognised by comparing text and never decoded;
+    snapshots are sent as RawJSON built once per version.
+    """
+
+    def __init__(self, history: int = 50, retention: float = 300):
+        self.history = history
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._states: Dict[str, _DateState] = {}
+        self._counter = itertools.count(int(time.time() * 1000))
+
+    def update(self, target_date: str, desks: Dict[int, str], as_of: Optional[float] = None) -> Optional[Dict]:
+        """
+        Record the full desk list for target_date as {desk_id: desk JSON text},
+        read from the database at as_of (epoch seconds, default now).
+        Returns the delta message if anything changed (or this is the first
+        state for the date), else None. A list read before the stored one
+        (a refresh that started earlier but finished later) is ignored, so
+        the state and the deltas sent never go back in time.
+        """
+        as_of = as_of if as_of is not None else time.time()
+        with self._lock:
+            state = self._states.get(target_date)
+            if state is None:
+                state = self._states[target_date] = _DateState(self.history)
+            elif as_of < state.refreshed_at:
+                return None
+            state.fresh = True
+            state.last_active = time.monotonic()
+            state.refreshed_at = as_of
+
+            old = state.desks
+            changed = [desk_id for desk_id, text in desks.items() if old.get(desk_id) != text]
+            removed = sorted(desk_id for desk_id in old if desk_id not in desks)
+            if state.version and not changed and not removed:
+                return None
+
+            diff = diff_desks(
+                {desk_id: json.loads(old[desk_id]) for desk_id in changed if desk_id in old},
+                {desk_id: json.loads(desks[desk_id]) for desk_id in changed}
+            )
+            base_version = state.version
+            state.version = next(self._counter)
+            state.desks = desks
+            state.snapshot_json = None
+            delta = {
+                'date': target_date,
+                'version': state.version,
+                'base_version': base_version,
+                'desks': diff['desks'],
+                'removed': removed
+            }
+            state.deltas.append(delta)
+            return delta
+
+    def desks(self, target_date: str, fresh_only: bool = True) -> Optional[Dict[int, str]]:
+        """Current desk JSON texts for target_date keyed by desk_id, or None."""
+        with self._lock:
+            state = self._states.get(target_date)
+            if state is None or not state.version or (fresh_only and not state.fresh):
+                return None
+            return state.desks
+
+    def refreshed_at(self, target_date: str) -> Optional[float]:
+        """When the stored state for target_date was last read (epoch seconds), or None if it is not fresh."""
+        with self._lock:
+            state = self._states.get(target_date)
+            if state is None or not state.version or not state.fresh:
+                return None
+            return state.refreshed_at
+
+    def version(self, target_date: str) -> int:
+        with self._lock:
+            state = self._states.get(target_date)
+            return state.version if state else 0
+
+    def snapshot(self, target_date: str) -> Optional[Dict]:
+        """Full state message for target_date, or None if nothing is stored."""
+        with self._lock:
+            state = self._states.get(target_date)
+            if state is None or not state.version:
+                return None
+            if state.snapshot_json is None:
+                state.snapshot_json = RawJSON(
+                    '[' + ','.join(state.desks[desk_id] for desk_id in sorted(state.desks)) + ']')
+            return {
+                'date': target_date,
+                'version': state.version,
+                'desks': state.snapshot_json
+            }
+
+    def deltas_since(self, target_date: str, version: int) -> Optional[List[Dict]]:
+        """
+        Deltas a client at `version` has missed, oldest first. Returns None
+        when the history does not reach back that far and a snapshot is needed.
+        """
+        with self._lock:
+            state = self._states.get(target_date)
+            if state is None or not state.version:
+                return None
+            if version == state.version:
+                return []
+            missed = [delta for delta in state.deltas if delta['version'] > version]
+            if not missed or missed[0]['base_version'] != version:
+                return None
+            return missed
+
+    def prune(self, active_dates: Iterable[str]):
+        """Mark dates without subscribers stale and forget them after the retention period."""
+        active = set(active_dates)
+        now = time.monotonic()
+        with self._lock:
+            for target_date, state in list(self._states.items()):
+                if target_date in active:
+                    state.last_active = now
+                    continue
+                state.fresh = False
+                if now - state.last_active > self.retention:
+                    del self._states[target_date]
+
+    def dates(self) -> List[str]:
+        with self._lock:
+            return sorted(self._states)
@@ -0,0 +1,120 @@
+import gzip
+import time
+import zlib
+from functools import wraps
+from typing import Callable, NamedTuple, Optional
+
+from flask import Response, make_response, request
+
+from app.config.cache import HTTP_COMPRESSION_CONFIG
+from app.utils.coalesce import fresh_since
+
+# Content codings we produce, in order of preference
+_ENCODINGS = ('gzip', 'deflate')
+
+
+class Validator(NamedTuple):
+    """
+    etag: opaque version of the data a view would return
+    changed_at: unix time the data last changed, if known (drives Last-Modified)
+    """
+    etag: str
+    changed_at: Optional[float] = None
+
+
+def conditional_response(get_validator: Callable[[], Optional[Validator]]):
+    """
+    Answer If-None-Match / If-Modified-Since from a validator computed before
+    the view runs, so a 304 never does the view's work. get_validator returns
+    None when no version is available, in which case the view always runs.
+    The validator must be read before the data it describes, so that a
+    change racing with the view can only make the response newer than its tag;
+    coalesced reads in the view only share a query started at or after
+    the validator's changed_at, never one that predates the change.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            validator = get_validator()
+            if validator is None:
+                return view(*args, **kwargs)
+
+            # Last-Modified has one-second resolution: only advertise the second
+            # after the last change once that second has passed, so a later
+            # change can never fall inside the second a client echoes back.
+            last_modified = None
+            if validator.changed_at is not None:
+                last_modified = int(validator.changed_at) + 1
+                if last_modified > time.time():
+                    last_modified = None
+
+            matched = _matching_tag(validator)
+            if matched is not None:
+                response = Response(status=304)
+                response.set_etag(matched)
+            else:
+                with fresh_since(validator.changed_at):
+                    response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(validator.etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
+
+
+def _matching_tag(validator: Validator) -> Optional[str]:
+    """The client's cached tag if its copy is still current, else None."""
+    if request.if_none_match:
+        # Compressed representations carry an encoding suffix on the tag.
+        # If-None-Match compares weakly, so a tag a proxy marked W/ still matches.
+        for tag in [validator.etag] + [f"{validator.etag}-{encoding}" for encoding in _ENCODINGS]:
+            if request.if_none_match.contains_weak(tag):
+                return tag
+        return None
+    if request.if_modified_since and validator.changed_at is not None:
+        if validator.changed_at < request.if_modified_since.timestamp():
+            return validator.etag
+    return None
+
+
+def compressed(view):
+    """
+    Compress the view's response with the best coding the client accepts
+    (gzip, then deflate) once it is larger than HTTP_COMPRESSION_MIN_SIZE.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return compress_response(make_response(view(*args, **kwargs)))
+    return wrapper
+
+
+def compress_response(response: Response) -> Response:
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    encoding = request.accept_encodings.best_match(_ENCODINGS)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < HTTP_COMPRESSION_CONFIG['min_size']:
+        return response
+
+    level = HTTP_COMPRESSION_CONFIG['level']
+    if encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=level, mtime=0)
+    else:
+        body = zlib.compress(body, level)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
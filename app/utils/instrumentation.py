@@ -0,0 +1,111 @@
+"""
+Request and Socket.IO instrumentation feeding app.utils.metrics.
+
+    instrument_app(app)                          # every blueprint's routes
+    SocketIO(client_manager=InstrumentedManager())
+"""
+import threading
+import time
+
+import socketio
+from flask import Flask, g, request
+
+from app.utils import metrics
+
+HTTP_REQUEST_DURATION = metrics.Histogram(
+    'http_request_duration_seconds', 'HTTP request latency',
+    ['blueprint', 'endpoint', 'method', 'status'])
+HTTP_REQUEST_EXCEPTIONS = metrics.Counter(
+    'http_request_exceptions_total', 'Requests that raised an unhandled exception',
+    ['blueprint', 'endpoint'])
+
+SOCKETIO_EMIT_DURATION = metrics.Histogram(
+    'socketio_emit_duration_seconds', 'Time to encode and queue one emit for every recipient', ['event'])
+SOCKETIO_EMIT_RECIPIENTS = metrics.Histogram(
+    'socketio_emit_recipients', 'Clients reached by one emit', ['event'], buckets=metrics.FANOUT_BUCKETS)
+SOCKETIO_EMIT_PAYLOAD = metrics.Histogram(
+    'socketio_emit_payload_bytes', 'Encoded size of one emitted packet', ['event'], buckets=metrics.SIZE_BUCKETS)
+SOCKETIO_EMIT_BYTES = metrics.Counter(
+    'socketio_emit_bytes_total', 'Bytes queued to clients (packet size x recipients)', ['event'])
+
+
+def instrument_app(app: Flask):
+    """Time every request, labelled by blueprint, endpoint, method and status."""
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            HTTP_REQUEST_DURATION.labels(
+                request.blueprint or '', request.endpoint or 'unmatched', request.method, str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def _record_unhandled(exc):
+        if exc is not None:
+            record_request_exception()
+
+
+def record_request_exception():
+    """Count an exception raised by the current request's view; call from error handlers."""
+    HTTP_REQUEST_EXCEPTIONS.labels(request.blueprint or '', request.endpoint or 'unmatched').inc()
+
+
+class EmitMetricsMixin:
+    """
+    Client manager mixin that measures each emit: recipients, encoded packet
+    size and total bytes queued. Counting happens where the server hands each
+    recipient its packet, so rooms and skip_sid are accounted for (emits
+    with ack callbacks, which this app does not use, are only timed). With a
+    message queue each process counts the recipients connected to it,
+    including for emits relayed from other processes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._emit = threading.local()
+
+    def initialize(self):
+        super().initialize()
+        send_eio_packet = self.server._send_eio_packet
+
+        def counting_send_eio_packet(eio_sid, eio_pkt):
+            state = getattr(self._emit, 'state', None)
+            if state is not None:
+                state[0] += 1
+                state[1] = len(eio_pkt.data) if eio_pkt.data is not None else 0
+            return send_eio_packet(eio_sid, eio_pkt)
+
+        self.server._send_eio_packet = counting_send_eio_packet
+
+    def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, **kwargs):
+        return self._measure(event, super().emit, event, data, namespace, room=room, skip_sid=skip_sid,
+                             callback=callback, **kwargs)
+
+    def _handle_emit(self, message):
+        # Message queue managers deliver emits relayed from other processes here
+        if getattr(self._emit, 'state', None) is not None:
+            return super()._handle_emit(message)
+        return self._measure(message.get('event'), super()._handle_emit, message)
+
+    def _measure(self, event, send, *args, **kwargs):
+        state = self._emit.state = [0, 0]  # recipients, packet size
+        started = time.perf_counter()
+        try:
+            return send(*args, **kwargs)
+        finally:
+            self._emit.state = None
+            recipients, size = state
+            SOCKETIO_EMIT_DURATION.labels(event).observe(time.perf_counter() - started)
+            SOCKETIO_EMIT_RECIPIENTS.labels(event).observe(recipients)
+            if recipients:
+                SOCKETIO_EMIT_PAYLOAD.labels(event).observe(size)
+                SOCKETIO_EMIT_BYTES.labels(event).inc(size * recipients)
+
+class InstrumentedManager(EmitMetricsMixin, socketio.Manager):
+    """The default in-process client manager, with emit metrics."""
@@ -0,0 +1,188 @@
+"""
+Load scraped jobs into sena.jobs (migrations/008) from naukriScrapper CSVs.
+
+    python -m app.utils.job_loader job_listings.csv [more.csv ...]
+    python -m app.utils.job_loader - < job_listings.csv
+
+Rows are streamed, --batch at a time, into a temporary staging table with
+COPY and merged from there with one INSERT ... ON CONFLICT (url) per batch,
+so memory stays flat however large the input and each batch is a single
+round trip for the rows plus one statement for the merge. Within a batch
+the last row for a URL wins, as a later batch's does over an earlier one.
+A description that could not be scraped does not replace one already stored.
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+from app.config.database import DB_CONFIG
+from app.utils.db_utils import get_db_connection
+# The key the scraper dedupes and resumes by, so a job is the same row here
+from helper.crawl_state import job_key
+
+# What the scraper writes when a job has no usable description
+NO_DESCRIPTION = ('', 'N/A', 'None', 'Job description not found.')
+
+STAGING_COLUMNS = ('url', 'title', 'company', 'salary', 'location', 'skills', 'description')
+
+CREATE_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS jobs_staging (
+        ord BIGSERIAL,
+        url TEXT NOT NULL,
+        title TEXT,
+        company TEXT,
+        salary TEXT,
+        location TEXT,
+        skills TEXT,
+        description TEXT
+    ) ON COMMIT DELETE ROWS
+"""
+
+MERGE_STAGING = """
+    WITH upserted AS (
+        INSERT INTO sena.jobs AS j (url, title, company, salary, location, skills, description)
+        SELECT DISTINCT ON (url)
+               url, title, company, salary, location,
+               COALESCE(string_to_array(NULLIF(skills, ''), ', '), '{}'), description
+        FROM jobs_staging
+        ORDER BY url, ord DESC
+        ON CONFLICT (url) DO UPDATE SET
+            title = excluded.title,
+            company = excluded.company,
+            salary = excluded.salary,
+            location = excluded.location,
+            skills = excluded.skills,
+            description = COALESCE(excluded.description, j.description),
+            last_seen_at = now(),
+            updated_at = CASE
+                WHEN (j.title, j.company, j.salary, j.location, j.skills, j.description)
+                     IS DISTINCT FROM (excluded.title, excluded.company, excluded.salary, excluded.location,
+                                       excluded.skills, COALESCE(excluded.description, j.description))
+                THEN now() ELSE j.updated_at END
+        RETURNING xmax = 0 AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+
+def staging_rows(csv_rows: Iterable[Dict], skipped: Optional[list] = None) -> Iterator[Sequence]:
+    """STAGING_COLUMNS tuples for scraper CSV rows; rows without a job URL are counted in skipped[0]."""
+    for row in csv_rows:
+        url = (row.get('URL') or '').strip()
+        if not url.startswith('http'):
+            if skipped is not None:
+                skipped[0] += 1
+            continue
+        description = row.get('Description')
+        yield (job_key(url), row.get('Title') or None, row.get('Company') or None, row.get('Salary') or None,
+               row.get('Location') or None, row.get('Skills') or None,
+               None if description is None or description.strip() in NO_DESCRIPTION else description)
+
+
+class CopyStream:
+    """
+    A file-like object COPY ... FROM STDIN reads: up to `limit` rows from an
+    iterator, formatted as CSV only as COPY asks for more.
+    """
+
+    def __init__(self, rows: Iterator[Sequence], limit: int):
+        self._rows = rows
+        self.limit = limit
+        self.count = 0
+        self.exhausted = False
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator='\n')
+
+    def read(self, size: int = -1) -> str:
+        while (size < 0 or self._buffer.tell() < size) and self.count < self.limit:
+            row = next(self._rows, None)
+            if row is None:
+                self.exhausted = True
+                break
+            self._writer.writerow(row)
+            self.count += 1
+        data = self._buffer.getvalue()
+        if 0 <= size < len(data):
+            data, rest = data[:size], data[size:]
+        else:
+            rest = ''
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._buffer.write(rest)
+        return data
+
+
+def load_jobs(conn, rows: Iterator[Sequence], batch: int = 50000, progress=None) -> Dict:
+    """
+    Upsert staging rows into sena.jobs, one transaction per batch.
+    Returns: Dict with rows, inserted, updated and seconds
+    """
+    cursor = conn.cursor()
+    cursor.execute(CREATE_STAGING)
+    conn.commit()
+    copy_sql = f"COPY jobs_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    totals = {'rows': 0, 'inserted': 0, 'updated': 0}
+    started = time.perf_counter()
+    while True:
+        stream = CopyStream(rows, batch)
+        try:
+            cursor.copy_expert(copy_sql, stream, size=64 * 1024)
+            if stream.count:
+                cursor.execute(MERGE_STAGING)
+                inserted, updated = cursor.fetchone()
+                totals['inserted'] += inserted
+                totals['updated'] += updated
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        totals['rows'] += stream.count
+        if progress is not None and stream.count:
+            progress(totals, time.perf_counter() - started)
+        if stream.exhausted or stream.count < batch:
+            break
+    totals['seconds'] = time.perf_counter() - started
+    return totals
+
+
+def _read_csvs(paths: Sequence[str]) -> Iterator[Dict]:
+    for path in paths:
+        if path == '-':
+            yield from csv.DictReader(io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline=''))
+            continue
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='+', help="scraper CSV files, or - for stdin")
+    parser.add_argument('--batch', type=int, default=50000, help='rows per COPY and merge (one transaction)')
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        return 1
+    skipped = [0]
+
+    def progress(totals, seconds):
+        print(f"{totals['rows']} rows, {totals['rows'] / seconds:.0f} rows/s")
+
+    try:
+        totals = load_jobs(conn, staging_rows(_read_csvs(args.files), skipped), max(args.batch, 1), progress)
+    except Exception as e:
+        print(f"Loading jobs failed: {e}")
+        return 1
+    finally:
+        conn.close()
+    print(f"Loaded {totals['rows']} rows in {totals['seconds']:.1f}s "
+          f"({totals['rows'] / max(totals['seconds'], 1e-9):.0f} rows/s): {totals['inserted']} new jobs, "
+          f"{totals['updated']} updated; {skipped[0]} rows without a job URL skipped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from app.config.database import DB_CONFIG
+from app.utils.db_utils import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    Elect one process among all those using the same database by holding a
+    session-level advisory lock on a dedicated connection. The lock is
+    released when the holder's session ends, so if the leader dies another
+    process takes over on its next attempt (within retry_interval).
+
+    The leader checks its connection every check_interval seconds and steps
+    down as soon as it is lost, since the lock went with it. The session's
+    idle_session_timeout (Postgres 14+) is set to three check intervals, so a
+    leader whose host vanished without closing the connection is dropped by
+    the server instead of holding the lock until TCP gives up.
+
+    The other side of a network split: a check that does not complete within
+    check_interval makes the leader step down at once (well before the
+    server frees the lock for someone else), and the connection is given up.
+    TCP keepalives, tcp_user_timeout and statement_timeout on the election
+    connection make the stuck check fail instead of blocking indefinitely.
+
+    Each election starts a new term; the watch thread and any step-down it
+    asks for belong to the term they were started in, so a watcher left over
+    from an earlier term exits instead of acting on a later one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        on_elected: Optional[Callable[[], None]] = None,
+        on_demoted: Optional[Callable[[], None]] = None,
+        retry_interval: float = 5,
+        check_interval: float = 5
+    ):
+        self.name = name
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.retry_interval = retry_interval
+        self.check_interval = check_interval
+        self._leader = threading.Event()
+        self._lock = threading.Lock()
+        self._check_started: Optional[float] = None
+        self._term = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.is_set() and not self._check_overdue()
+
+    def _holds(self, term: int) -> bool:
+        return self._leader.is_set() and self._term == term
+
+    def _check_overdue(self) -> bool:
+        started = self._check_started
+        return started is not None and time.monotonic() - started > self.check_interval
+
+    def _connect(self):
+        interval = max(int(self.check_interval), 1)
+        return get_db_connection(
+            DB_CONFIG,
+            keepalives=1, keepalives_idle=interval, keepalives_interval=interval, keepalives_count=2,
+            tcp_user_timeout=int(self.check_interval * 2 * 1000),
+            options=f"-c statement_timeout={int(self.check_interval * 1000)}"
+        )
+
+    def run(self):
+        while True:
+            conn = self._connect()
+            if conn:
+                try:
+                    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                    self._campaign(conn)
+                except Exception as e:
+                    logger.warning("Leader election connection lost: %s", e)
+                finally:
+                    self._step_down()
+                    conn.close()
+            time.sleep(self.retry_interval)
+
+    def _campaign(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SET idle_session_timeout = %s", (int(self.check_interval * 3 * 1000),))
+        except Exception:
+            pass  # Postgres < 14
+        while True:
+            cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", (self.name,))
+            if cursor.fetchone()[0]:
+                break
+            time.sleep(self.retry_interval)
+
+        logger.info("Elected leader for %s", self.name)
+        term = self._elect()
+        threading.Thread(target=self._watch, args=(term,), daemon=True).start()
+        self._notify(self.on_elected)
+        while True:
+            time.sleep(self.check_interval)
+            self._check_started = time.monotonic()
+            cursor.execute("SELECT 1")
+            if not self._leader.is_set():
+                raise RuntimeError("health check did not complete within check_interval")
+            self._check_started = None
+
+    def _elect(self) -> int:
+        with self._lock:
+            self._term += 1
+            self._check_started = None
+            self._leader.set()
+            return self._term
+
+    def _watch(self, term: int):
+        """Step down while a health check is stuck; the campaign gives the connection up when it returns."""
+        while self._holds(term):
+            time.sleep(self.check_interval / 4)
+            if self._holds(term) and self._check_overdue():
+                logger.warning("Leader health check for %s did not complete within %ss",
+                               self.name, self.check_interval)
+                self._step_down(term)
+
+    def _step_down(self, term: Optional[int] = None):
+        """Give up leadership, or only the given term's if one is passed."""
+        with self._lock:
+            if not self._leader.is_set() or (term is not None and term != self._term):
+                return
+            self._leader.clear()
+        logger.warning("No longer leader for %s", self.name)
+        self._notify(self.on_demoted)
+
+    @staticmethod
+    def _notify(callback):
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            logger.exception("Error in leader election callback: %s", e)
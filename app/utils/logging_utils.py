@@ -0,0 +1,59 @@
+import logging
+import threading
+import time
+from typing import Dict, Tuple
+
+from app.config.observability import LOGGING_CONFIG
+
+_configured = False
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let each message through at most `burst` times per `period` seconds.
+    Messages are told apart by logger, level and format string (not the
+    formatted text), so a failure repeated every few seconds with a changing
+    detail is still one message. The first record after a window in which
+    repeats were dropped says how many were dropped.
+    """
+
+    def __init__(self, burst: int = 5, period: float = 60):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple, list] = {}  # key -> [window_start, passed, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def configure_logging():
+    """
+    Send application logs to stderr at LOG_LEVEL, rate limited per message.
+    Safe to call more than once.
+    """
+    global _configured
+    if _configured:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handler.addFilter(RateLimitFilter(LOGGING_CONFIG['rate_limit_burst'], LOGGING_CONFIG['rate_limit_period']))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(LOGGING_CONFIG['level'])
+    _configured = True
@@ -0,0 +1,194 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Counters and histograms are recorded with one lock and a few dict lookups,
+cheap enough to leave on in production. Gauges that mirror state kept
+elsewhere (pool sizes) are read by a callback when /metrics is scraped.
+
+    REQUESTS = Counter('app_requests_total', 'Requests handled', ['route'])
+    REQUESTS.labels('/api/desks').inc()
+
+    LATENCY = Histogram('app_latency_seconds', 'Latency', ['route'])
+    LATENCY.labels('/api/desks').observe(0.012)
+"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from app.config.observability import METRICS_CONFIG
+
+# Latency buckets in seconds, from 1ms to 10s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Recipients of one Socket.IO emit
+FANOUT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Payload sizes in bytes, from 256B to 4MiB
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: List = []
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels_text(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple, object] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values):
+        """The child for one set of label values, created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self) -> List[Tuple[Tuple, object]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self, lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild(self._lock)
+
+    def inc(self, amount: float = 1):
+        """Increment the unlabelled counter."""
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterable[str]:
+        for values, child in self._items():
+            yield f"{self.name}{_labels_text(self.labelnames, values)} {_format(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', '_upper_bounds', 'counts', 'sum')
+
+    def __init__(self, lock, upper_bounds):
+        self._lock = lock
+        self._upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self._lock, self.buckets)
+
+    def observe(self, value: float):
+        """Observe into the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def samples(self) -> Iterable[str]:
+        for values, child in self._items():
+            with self._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _format(bound) + '"'
+                yield f"{self.name}_bucket{_labels_text(self.labelnames, values, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels_text(self.labelnames, values)} {_format(total)}"
+            yield f"{self.name}_count{_labels_text(self.labelnames, values)} {cumulative}"
+
+
+class CallbackMetric(_Metric):
+    """
+    Values read from `collect` at scrape time, as [(label_values, value), ...].
+    For state that is already counted elsewhere, e.g. connection pool stats.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Tuple, float]]],
+                 type: str = 'gauge', registry: Registry = REGISTRY):
+        self.type = type
+        self.collect = collect
+        super().__init__(name, documentation, labelnames, registry)
+
+    def samples(self) -> Iterable[str]:
+        try:
+            collected = list(self.collect())
+        except Exception:
+            return
+        for values, value in collected:
+            yield f"{self.name}{_labels_text(self.labelnames, values)} {_format(value)}"
+
+
+def enabled() -> bool:
+    return METRICS_CONFIG['enabled']
+
+
+def render() -> str:
+    return REGISTRY.render()
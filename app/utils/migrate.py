@@ -0,0 +1,85 @@
+"""
+Apply the SQL files in migrations/ in filename order.
+
+Applied files are recorded in sena.schema_migrations, so the command is safe
+to rerun:
+
+    python -m app.utils.migrate            # apply pending migrations
+    python -m app.utils.migrate --list     # show applied / pending
+"""
+import argparse
+import os
+import sys
+from typing import List
+
+from app.config.database import DB_CONFIG
+from app.utils.db_utils import get_db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'migrations')
+
+
+def migration_files() -> List[str]:
+    return sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql'))
+
+
+def applied_migrations(conn) -> List[str]:
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sena.schema_migrations (
+            filename TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    conn.commit()
+    cursor.execute("SELECT filename FROM sena.schema_migrations")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def apply_pending(conn) -> List[str]:
+    """Apply every pending migration, each in its own transaction."""
+    done = set(applied_migrations(conn))
+    applied = []
+    for filename in migration_files():
+        if filename in done:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding='utf-8') as f:
+            sql = f.read()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql)
+            cursor.execute("INSERT INTO sena.schema_migrations (filename) VALUES (%s)", (filename,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied {filename}")
+        applied.append(filename)
+    return applied
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--list', action='store_true', help='list applied and pending migrations')
+    args = parser.parse_args(argv)
+
+    conn = get_db_connection(DB_CONFIG)
+    if not conn:
+        return 1
+    try:
+        if args.list:
+            done = set(applied_migrations(conn))
+            for filename in migration_files():
+                print(f"{'applied' if filename in done else 'pending'}  {filename}")
+            return 0
+        if not apply_pending(conn):
+            print("No pending migrations")
+        return 0
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return 1
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
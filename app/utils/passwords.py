@@ -0,0 +1,129 @@
+"""
+Password hashing and verification without stalling the event loop.
+
+A slow hash costs tens of milliseconds of CPU by design. Run inline in the
+eventlet worker it would hold up every other green thread, including the
+desk broadcaster, for that long per login. Here the hash runs on a real OS
+thread (eventlet's tpool when the process is monkey patched, a thread pool
+otherwise); hashlib's scrypt and pbkdf2 release the GIL, so the hub keeps
+serving while it runs. At most PASSWORD_HASH_CONFIG['workers'] hashes run at
+once, and callers beyond max_pending get PasswordHashingBusy rather than
+queueing without bound.
+
+Stored values are werkzeug.security hashes ('scrypt:n:r:p$salt$hash').
+Rows from before hashing hold the plaintext; they still verify, and
+verify_password reports that they need rehashing, as it does for hashes
+made with a method other than the configured one.
+"""
+import hmac
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from flask import jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.config.auth import PASSWORD_HASH_CONFIG
+from app.utils import metrics
+
+HASH_METHODS = ('scrypt:', 'pbkdf2:')
+
+PASSWORD_HASH_DURATION = metrics.Histogram(
+    'password_hash_duration_seconds', 'Time to hash or verify a password on the pool', ['operation'])
+PASSWORD_HASH_WAIT = metrics.Histogram(
+    'password_hash_wait_seconds', 'Time a password operation waited for a free worker')
+PASSWORD_HASH_REJECTED = metrics.Counter(
+    'password_hash_rejected_total', 'Password operations refused because too many were waiting')
+
+_lock = threading.Lock()
+_pending = 0
+_workers = threading.BoundedSemaphore(PASSWORD_HASH_CONFIG['workers'])
+_executor: Optional[ThreadPoolExecutor] = None
+_dummy_hash: Optional[str] = None
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when more than max_pending password operations are already waiting."""
+
+
+def is_hashed(stored: str) -> bool:
+    return stored.startswith(HASH_METHODS) and stored.count('$') == 2
+
+
+def hash_password(password: str) -> str:
+    return _offload('hash', generate_password_hash, password, PASSWORD_HASH_CONFIG['method'])
+
+
+def verify_password(stored: Optional[str], password: str) -> Tuple[bool, bool]:
+    """
+    Check password against a stored value.
+    Returns: Tuple of (matches, needs_rehash); needs_rehash is only True on a match
+    """
+    if not stored:
+        # Unknown user: spend the same time as for a real one
+        _offload('verify', check_password_hash, _get_dummy_hash(), password)
+        return False, False
+    if not is_hashed(stored):
+        matches = hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+        return matches, matches
+    matches = _offload('verify', check_password_hash, stored, password)
+    return matches, matches and stored.split('$', 1)[0] != PASSWORD_HASH_CONFIG['method']
+
+
+def busy_response():
+    """503 for a login or signup refused with PasswordHashingBusy."""
+    response = jsonify({'error': 'Too many logins in progress, please retry'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
+def _get_dummy_hash() -> str:
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password('not a password')
+    return _dummy_hash
+
+
+def _offload(operation: str, fn: Callable, *args):
+    global _pending
+    with _lock:
+        if _pending >= PASSWORD_HASH_CONFIG['max_pending']:
+            PASSWORD_HASH_REJECTED.labels().inc()
+            raise PasswordHashingBusy()
+        _pending += 1
+    try:
+        queued = time.perf_counter()
+        with _workers:
+            started = time.perf_counter()
+            PASSWORD_HASH_WAIT.labels().observe(started - queued)
+            try:
+                return _run_on_thread(fn, *args)
+            finally:
+                PASSWORD_HASH_DURATION.labels(operation).observe(time.perf_counter() - started)
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+def _run_on_thread(fn: Callable, *args):
+    try:
+        from eventlet import patcher, tpool
+        if patcher.is_monkey_patched('thread'):
+            return tpool.execute(fn, *args)
+    except ImportError:
+        pass
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONFIG['workers'],
+                                           thread_name_prefix='password-hash')
+    return _executor.submit(fn, *args).result()
+
+
+def pending() -> int:
+    return _pending
+
+
+metrics.CallbackMetric('password_hash_pending', 'Password operations running or waiting for a worker',
+                       [], lambda: [((), pending())])
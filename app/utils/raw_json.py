@@ -0,0 +1,51 @@
+"""
+JSON encoding with pre-encoded fragments.
+
+Postgres already builds the desk payloads as JSON text. Wrapping that text
+in RawJSON lets it be embedded in a larger message without decoding and
+re-encoding it. This module has the dumps/loads pair Flask-SocketIO expects
+for its `json` option, so Socket.IO packets can carry RawJSON values too.
+"""
+import json
+import uuid
+from typing import Any
+
+# Stand-in for a fragment while the surrounding object is encoded; random so
+# it cannot collide with real data
+_MARKER = f"raw-json-{uuid.uuid4().hex}"
+
+
+class RawJSON:
+    """Already-encoded JSON text, inserted into the output verbatim."""
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self):
+        return f"RawJSON({self.text[:40]!r}{'...' if len(self.text) > 40 else ''})"
+
+
+def dumps(obj: Any, **kwargs) -> str:
+    """json.dumps that writes RawJSON values as their text."""
+    if isinstance(obj, RawJSON):
+        return obj.text
+
+    fragments = []
+    fallback = kwargs.pop('default', None)
+
+    def default(value):
+        if isinstance(value, RawJSON):
+            fragments.append(value.text)
+            return f"{_MARKER}:{len(fragments) - 1}"
+        if fallback is not None:
+            return fallback(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    text = json.dumps(obj, default=default, **kwargs)
+    for index, fragment in enumerate(fragments):
+        text = text.replace(f'"{_MARKER}:{index}"', fragment, 1)
+    return text
+
+
+loads = json.loads
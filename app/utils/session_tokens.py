@@ -0,0 +1,218 @@
+"""
+Signed, expiring session tokens.
+
+Login issues a token carrying the user's identity claims, signed with
+SESSION_TOKEN_CONFIG['secrets'] (itsdangerous, HMAC-SHA256). Checking one
+is a signature and expiry check plus a lookup in the in-memory revocation
+list, so it needs no connection:
+
+    @auth_bp.route('/api/things')
+    @login_required
+    def things():
+        user_id = g.user['sub']
+
+Logging out records the token's id in sena.revoked_tokens (migrations/007).
+The process that handled the logout rejects the token at once; the others
+read the tokens revoked since they last looked every
+SESSION_REVOCATION_REFRESH seconds, which bounds how long a revoked token
+keeps working elsewhere.
+"""
+import functools
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from app.config.auth import ADMIN_API_CONFIG, SESSION_TOKEN_CONFIG
+from app.config.database import DB_CONFIG
+from app.config.realtime import DESK_CLUSTER_CONFIG
+from app.utils import metrics
+from app.utils.db_utils import db_connection
+
+logger = logging.getLogger(__name__)
+
+USER_CLAIMS = ('email', 'first_name', 'last_name', 'phone', 'is_active')
+
+SESSION_TOKEN_CHECKS = metrics.Counter(
+    'session_token_checks_total', 'Session tokens checked, by outcome', ['result'])
+
+
+class RevocationList:
+    """
+    Ids of revoked tokens that have not expired yet, kept in memory and
+    kept in step with sena.revoked_tokens by run(). The first refresh loads
+    every live row; later ones only read the rows revoked since the one
+    before (by revoked_at, less OVERLAP for revocations committed after
+    their timestamp was taken). Rows are never un-revoked, and expired ones
+    are dropped here as they expire.
+    """
+
+    OVERLAP = 60
+
+    def __init__(self, refresh_interval: float = 30):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, float] = {}  # jti -> expires_at (epoch seconds)
+        self._read_until: Optional[float] = None  # database time of the last refresh
+        self.refreshed_at: Optional[float] = None
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def revoke(self, jti: str, user_id: Optional[str], expires_at: float) -> bool:
+        """
+        Revoke a token here at once and record it for the other processes.
+        Returns False if it could not be recorded.
+        """
+        with self._lock:
+            self._revoked[jti] = expires_at
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return False
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO sena.revoked_tokens (jti, user_id, expires_at)
+                    VALUES (%s, %s, to_timestamp(%s))
+                    ON CONFLICT (jti) DO NOTHING
+                """, (jti, user_id, expires_at))
+                cursor.execute("DELETE FROM sena.revoked_tokens WHERE expires_at < now()")
+                conn.commit()
+                return True
+            except Exception as e:
+                conn.rollback()
+                logger.error("Could not record revoked token: %s", e)
+                return False
+
+    def refresh(self) -> bool:
+        since = self._read_until - self.OVERLAP if self._read_until is not None else None
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                return False
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT EXTRACT(EPOCH FROM now())::float8")
+                read_until = cursor.fetchone()[0]
+                if since is None:
+                    condition, params = "", ()
+                else:
+                    condition, params = "AND revoked_at > to_timestamp(%s)", (since,)
+                cursor.execute(f"""
+                    SELECT jti, EXTRACT(EPOCH FROM expires_at)::float8
+                    FROM sena.revoked_tokens
+                    WHERE expires_at > now() {condition}
+                """, params)
+                rows = cursor.fetchall()
+            except Exception as e:
+                logger.warning("Could not reload revoked tokens: %s", e)
+                return False
+        now = time.time()
+        with self._lock:
+            # Keep what was read before and local revocations that have not reached the table
+            revoked = {jti: expires for jti, expires in self._revoked.items() if expires > now}
+            revoked.update(rows)
+            self._revoked = revoked
+            self._read_until = read_until
+            self.refreshed_at = now
+        return True
+
+    def run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.refresh_interval)
+
+    def stats(self) -> Dict:
+        return {
+            'revoked': len(self._revoked),
+            'age': time.time() - self.refreshed_at if self.refreshed_at else None
+        }
+
+
+def _signing_secrets():
+    if SESSION_TOKEN_CONFIG['secrets']:
+        return SESSION_TOKEN_CONFIG['secrets']
+    if int(os.getenv('WEB_CONCURRENCY', 1)) > 1 or DESK_CLUSTER_CONFIG['message_queue']:
+        # Each process would sign with its own secret and reject the others' tokens
+        raise RuntimeError("SESSION_TOKEN_SECRETS must be set when more than one process serves requests")
+    logger.warning("SESSION_TOKEN_SECRETS is not set; session tokens stop working when this process restarts")
+    return [secrets.token_hex(32)]
+
+
+_serializer = URLSafeTimedSerializer(_signing_secrets(), salt='sena.session')
+revocations = RevocationList(SESSION_TOKEN_CONFIG['revocation_refresh'])
+
+
+def issue_token(user: Dict) -> Tuple[str, int]:
+    """A session token for a user dict (as returned by login); returns (token, expires_at)."""
+    claims = {'sub': str(user['id']), 'jti': uuid.uuid4().hex}
+    claims.update((name, user.get(name)) for name in USER_CLAIMS)
+    return _serializer.dumps(claims), int(time.time()) + SESSION_TOKEN_CONFIG['ttl']
+
+
+def verify_token(token: Optional[str]) -> Optional[Dict]:
+    """The token's claims, with exp added, or None if it is missing, invalid, expired or revoked."""
+    if not token:
+        return None
+    try:
+        claims, signed_at = _serializer.loads(token, max_age=SESSION_TOKEN_CONFIG['ttl'], return_timestamp=True)
+    except BadSignature:
+        SESSION_TOKEN_CHECKS.labels('invalid').inc()
+        return None
+    if revocations.is_revoked(claims.get('jti')):
+        SESSION_TOKEN_CHECKS.labels('revoked').inc()
+        return None
+    SESSION_TOKEN_CHECKS.labels('valid').inc()
+    claims['exp'] = int(signed_at.timestamp()) + SESSION_TOKEN_CONFIG['ttl']
+    return claims
+
+
+def bearer_token() -> Optional[str]:
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token.strip() if scheme.lower() == 'bearer' else None
+
+
+def login_required(view):
+    """Reject requests without a valid Bearer token; the view finds its claims in g.user."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        claims = verify_token(bearer_token())
+        if claims is None:
+            response = jsonify({'error': 'Authentication required'})
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response, 401
+        g.user = claims
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def admin_required(view):
+    """Reject requests whose Bearer token is not one of ADMIN_API_TOKENS."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        token = bearer_token()
+        if not token:
+            response = jsonify({'error': 'Authentication required'})
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response, 401
+        if not any(hmac.compare_digest(token.encode('utf-8'), admin.encode('utf-8'))
+                   for admin in ADMIN_API_CONFIG['tokens']):
+            return jsonify({'error': 'Not allowed'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def start_revocation_sync() -> threading.Thread:
+    thread = threading.Thread(target=revocations.run, daemon=True)
+    thread.start()
+    return thread
+
+
+metrics.CallbackMetric('session_tokens_revoked', 'Revoked session tokens not yet expired, as known here',
+                       [], lambda: [((), revocations.stats()['revoked'])])
@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'started_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.started_at = time.time()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one: the first caller
+    runs the function, callers arriving while it runs wait for it and share
+    its result (or its exception). Nothing is kept once the call returns.
+
+    A caller that needs data read after some moment passes it as not_before
+    (epoch seconds): it only joins a call that started at or after it, and
+    otherwise runs its own, which callers arriving later join instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, not_before: Optional[float] = None,
+           **kwargs) -> Tuple[Any, bool]:
+        """Returns (result, shared); shared is True for callers that waited on another's call."""
+        with self._lock:
+            call = self._calls.get(key)
+            running = call is not None and (not_before is None or call.started_at >= not_before)
+            if not running:
+                call = self._calls[key] = _Call()
+
+        if running:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,259 @@
+"""
+Per-client backpressure for Socket.IO emits.
+
+Engine.IO queues every packet for a client until its transport takes it, so
+a client on a slow network accumulates every desk list broadcast while it
+is behind. BackpressureMixin sits where the server hands each recipient its
+packet: a client that keeps up is sent packets directly; one that is behind
+gets an outbox that a background task feeds to it as its queue drains.
+
+The application says how emits relate to each other:
+
+    manager.classify_packet = lambda event, data: (key, kind)
+
+kind 'state' is a complete state for key (it supersedes every packet with
+that key still in the outbox), 'chain' is an incremental change to key that
+needs all its predecessors, None is neither and is never dropped. When the
+outbox is over its limits, chained packets are dropped and on_resync(sid,
+key) is called so the client can be sent a state instead; further chained
+packets for key are dropped until that state is emitted.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.config.realtime import SOCKETIO_BACKPRESSURE_CONFIG
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+STATE = 'state'
+CHAIN = 'chain'
+
+Classification = Tuple[Optional[Hashable], Optional[str]]
+
+SOCKETIO_BACKPRESSURE_EVENTS = metrics.Counter(
+    'socketio_backpressure_events_total',
+    'Packets buffered, coalesced or dropped for slow clients, resyncs and disconnects', ['event'])
+
+_managers: List["BackpressureMixin"] = []
+
+
+class _Outbox:
+    __slots__ = ('packets', 'bytes', 'resyncing', 'last_progress')
+
+    def __init__(self):
+        self.packets: List[Tuple[Optional[Hashable], Optional[str], object, int]] = []
+        self.bytes = 0
+        self.resyncing = set()
+        self.last_progress = time.monotonic()
+
+    def remove(self, should_remove: Callable[[Optional[Hashable], Optional[str]], bool]) -> int:
+        kept = [entry for entry in self.packets if not should_remove(entry[0], entry[1])]
+        removed = len(self.packets) - len(kept)
+        if removed:
+            self.packets = kept
+            self.bytes = sum(entry[3] for entry in kept)
+        return removed
+
+
+class BackpressureMixin:
+    """Client manager mixin bounding what is queued for each client; see the module docstring."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.backpressure = dict(SOCKETIO_BACKPRESSURE_CONFIG)
+        self.classify_packet: Callable[[str, object], Classification] = lambda event, data: (None, None)
+        self.on_resync: Optional[Callable[[str, Hashable], None]] = None
+        self._current = threading.local()
+        self._outbox_lock = threading.Lock()
+        self._outboxes: Dict[str, _Outbox] = {}
+        self._events = Counter()
+        self._send_now: Optional[Callable] = None
+        _managers.append(self)
+
+    def initialize(self):
+        super().initialize()
+        if self._send_now is not None:
+            return  # Flask-SocketIO's test client initializes the manager again
+        self._send_now = self.server._send_eio_packet
+        self.server._send_eio_packet = self._send_or_buffer
+        self.server.start_background_task(self._pump)
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None, callback=None, **kwargs):
+        return self._classified(self.classify_packet(event, data), super().emit, event, data, namespace,
+                                room=room, skip_sid=skip_sid, callback=callback, **kwargs)
+
+    def _handle_emit(self, message):
+        # Message queue managers deliver emits relayed from other processes here
+        if getattr(self._current, 'classification', None) is not None:
+            return super()._handle_emit(message)
+        return self._classified(self.classify_packet(message.get('event'), message.get('data')),
+                                super()._handle_emit, message)
+
+    def _classified(self, classification: Classification, send, *args, **kwargs):
+        self._current.classification = classification
+        try:
+            return send(*args, **kwargs)
+        finally:
+            self._current.classification = None
+
+    def stats(self) -> Dict:
+        with self._outbox_lock:
+            outboxes = list(self._outboxes.values())
+            events = dict(self._events)
+        return {
+            'slow_clients': len(outboxes),
+            'buffered_packets': sum(len(outbox.packets) for outbox in outboxes),
+            'buffered_bytes': sum(outbox.bytes for outbox in outboxes),
+            'max_buffered_bytes': max((outbox.bytes for outbox in outboxes), default=0),
+            'events': events
+        }
+
+    def _count(self, event: str, amount: int = 1):
+        # Called with _outbox_lock held
+        self._events[event] += amount
+        SOCKETIO_BACKPRESSURE_EVENTS.labels(event).inc(amount)
+
+    def _queued(self, eio_sid: str) -> Optional[int]:
+        """Packets waiting in the client's Engine.IO queue, or None if it is gone."""
+        try:
+            return self.server.eio._get_socket(eio_sid).queue.qsize()
+        except KeyError:
+            return None
+
+    def _send_or_buffer(self, eio_sid, eio_pkt):
+        classification = getattr(self._current, 'classification', None)
+        if classification is None:
+            # Not an emit (connect/disconnect/ack packets): never held back
+            return self._send_now(eio_sid, eio_pkt)
+
+        with self._outbox_lock:
+            outbox = self._outboxes.get(eio_sid)
+            if outbox is None:
+                queued = self._queued(eio_sid)
+                if queued is not None and queued >= self.backpressure['max_queued']:
+                    outbox = self._outboxes[eio_sid] = _Outbox()
+            if outbox is not None:
+                resyncs, disconnect = self._buffer(outbox, classification, eio_pkt)
+        if outbox is None:
+            return self._send_now(eio_sid, eio_pkt)
+        self._after_buffer(eio_sid, resyncs, disconnect)
+
+    def _buffer(self, outbox: _Outbox, classification: Classification, eio_pkt) -> Tuple[List[Hashable], bool]:
+        """Add a packet to an outbox; returns (keys to resync, whether to disconnect)."""
+        key, kind = classification
+        if kind == STATE:
+            superseded = outbox.remove(lambda k, _: k == key)
+            if superseded:
+                self._count('coalesced', superseded)
+            outbox.resyncing.discard(key)
+        elif kind == CHAIN and key in outbox.resyncing:
+            self._count('dropped_awaiting_resync')
+            return [], False
+
+        size = len(eio_pkt.data) if eio_pkt.data is not None else 0
+        outbox.packets.append((key, kind, eio_pkt, size))
+        outbox.bytes += size
+        self._count('buffered')
+        if not self._over_limits(outbox):
+            return [], False
+
+        # Chains cannot be merged; drop them and send their clients a state instead
+        resyncs = sorted({k for k, kind, _, _ in outbox.packets if kind == CHAIN}, key=str)
+        if resyncs:
+            self._count('dropped_for_resync', outbox.remove(lambda k, kind: kind == CHAIN))
+            outbox.resyncing.update(resyncs)
+            self._count('resyncs', len(resyncs))
+        if not self._over_limits(outbox):
+            return resyncs, False
+        if self.backpressure['policy'] == 'disconnect':
+            return resyncs, True
+        # 'keep': only unkeyed packets can still pile up; drop the oldest
+        while self._over_limits(outbox) and len(outbox.packets) > 1:
+            _, _, _, dropped_size = outbox.packets.pop(0)
+            outbox.bytes -= dropped_size
+            self._count('dropped_overflow')
+        return resyncs, False
+
+    def _over_limits(self, outbox: _Outbox) -> bool:
+        return (len(outbox.packets) > self.backpressure['max_buffer_packets']
+                or outbox.bytes > self.backpressure['max_buffer_bytes'])
+
+    def _after_buffer(self, eio_sid: str, resyncs: List[Hashable], disconnect: bool):
+        if disconnect:
+            self._disconnect(eio_sid, 'overflow')
+            return
+        if resyncs and self.on_resync is not None:
+            sid = self.sid_from_eio_sid(eio_sid, '/')
+            if sid is not None:
+                for key in resyncs:
+                    self.server.start_background_task(self.on_resync, sid, key)
+
+    def _disconnect(self, eio_sid: str, reason: str):
+        with self._outbox_lock:
+            outbox = self._outboxes.pop(eio_sid, None)
+            self._count('disconnected_' + reason)
+        logger.warning("Disconnecting slow Socket.IO client %s (%s, %d bytes buffered)",
+                       eio_sid, reason, outbox.bytes if outbox else 0)
+        try:
+            self.server.eio.disconnect(eio_sid)
+        except Exception as e:
+            logger.warning("Could not disconnect slow client %s: %s", eio_sid, e)
+
+    def _pump(self):
+        """Feed outboxes to their clients as their transport queues drain."""
+        while True:
+            time.sleep(self.backpressure['pump_interval'])
+            try:
+                self._pump_once()
+            except Exception as e:
+                logger.exception("Error sending buffered Socket.IO packets: %s", e)
+
+    def _pump_once(self):
+        now = time.monotonic()
+        stuck = []
+        with self._outbox_lock:
+            items = list(self._outboxes.items())
+        for eio_sid, outbox in items:
+            sendable = []
+            with self._outbox_lock:
+                queued = self._queued(eio_sid)
+                if queued is None:
+                    self._outboxes.pop(eio_sid, None)
+                    continue
+                while outbox.packets and queued + len(sendable) < self.backpressure['max_queued']:
+                    _, _, eio_pkt, size = outbox.packets.pop(0)
+                    outbox.bytes -= size
+                    sendable.append(eio_pkt)
+                if sendable:
+                    outbox.last_progress = now
+                stalled = now - outbox.last_progress > self.backpressure['stuck_timeout']
+                if not outbox.packets:
+                    # Kept while a resync is pending so chained packets are dropped
+                    # until its state arrives, unless that never happens
+                    if not outbox.resyncing or stalled:
+                        del self._outboxes[eio_sid]
+                elif stalled and self.backpressure['policy'] == 'disconnect':
+                    stuck.append(eio_sid)
+            for eio_pkt in sendable:
+                self._send_now(eio_sid, eio_pkt)
+        for eio_sid in stuck:
+            self._disconnect(eio_sid, 'stuck')
+
+
+def _collect(field: str):
+    def collect():
+        for manager in _managers:
+            yield (), manager.stats()[field]
+    return collect
+
+
+metrics.CallbackMetric('socketio_slow_clients', 'Clients with an outbox (behind on their transport)',
+                       [], _collect('slow_clients'))
+metrics.CallbackMetric('socketio_buffered_packets', 'Packets held in slow clients\' outboxes',
+                       [], _collect('buffered_packets'))
+metrics.CallbackMetric('socketio_buffered_bytes', 'Bytes held in slow clients\' outboxes',
+                       [], _collect('buffered_bytes'))
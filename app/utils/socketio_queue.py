@@ -0,0 +1,215 @@
+"""
+Socket.IO client managers for running several app processes.
+
+python-socketio relays emits between processes through a PubSubManager:
+every process delivers an emit to its own clients in the target room. This
+module picks the backend from SOCKETIO_MESSAGE_QUEUE (Redis, or Postgres so
+no extra service is needed) and lets the app exchange its own messages
+between processes over the same channel:
+
+    manager = create_client_manager('postgres', 'sena_socketio')
+    manager.on_cluster_message('ping', lambda body: ...)
+    manager.publish_cluster_message('ping', {'from': manager.host_id})
+"""
+import logging
+import pickle
+import select
+import time
+from typing import Callable, Dict, Optional
+
+import psycopg2
+import socketio
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from app.config.database import DB_CONFIG
+from app.utils.db_utils import db_connection, get_db_connection
+from app.utils.instrumentation import EmitMetricsMixin, InstrumentedManager
+from app.utils.socketio_backpressure import BackpressureMixin
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_SQL = """
+    WITH message AS (
+        INSERT INTO sena.socketio_messages (channel, host_id, payload)
+        VALUES (%(channel)s, %(host_id)s, %(payload)s)
+        RETURNING id
+    )
+    SELECT pg_notify(%(channel)s, id::text) FROM message
+"""
+
+
+class ClusterMessagesMixin:
+    """
+    Application messages on the manager's pub/sub channel. They are handled
+    in the manager's listener thread by the handler registered for their
+    kind, in every process but the sender, and never reach Socket.IO.
+
+    Emits addressed to one client connected to this process (to=sid, such
+    as a snapshot for a subscribing client) are delivered here without going
+    through the queue, so a reconnect storm does not write a row per client.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cluster_handlers: Dict[str, Callable[[Dict], None]] = {}
+
+    def emit(self, event, data, namespace=None, room=None, skip_sid=None, callback=None, **kwargs):
+        if isinstance(room, str) and self.is_connected(room, namespace or '/'):
+            kwargs['ignore_queue'] = True
+        return super().emit(event, data, namespace=namespace, room=room, skip_sid=skip_sid,
+                            callback=callback, **kwargs)
+
+    def on_cluster_message(self, kind: str, handler: Callable[[Dict], None]):
+        self._cluster_handlers[kind] = handler
+
+    def publish_cluster_message(self, kind: str, body: Dict):
+        self._publish({'method': 'cluster', 'kind': kind, 'body': body, 'host_id': self.host_id})
+
+    def _listen(self):
+        for message in super()._listen():
+            data = message
+            if isinstance(message, bytes):
+                try:
+                    data = pickle.loads(message)
+                except Exception:
+                    yield message
+                    continue
+            if isinstance(data, dict) and data.get('method') == 'cluster':
+                if data.get('host_id') != self.host_id:
+                    self._handle_cluster_message(data)
+                continue
+            yield data
+
+    def _handle_cluster_message(self, data: Dict):
+        handler = self._cluster_handlers.get(data.get('kind'))
+        if handler is None:
+            return
+        try:
+            handler(data.get('body') or {})
+        except Exception as e:
+            logger.exception("Error handling cluster message %s: %s", data.get('kind'), e)
+
+
+class PostgresManager(socketio.PubSubManager):
+    """
+    Pub/sub over Postgres: messages are rows in sena.socketio_messages and
+    NOTIFY on the channel carries their id. A process that loses its LISTEN
+    connection reads the messages it missed when it reconnects, as long as
+    they are within the retention period.
+    """
+    name = 'postgres'
+
+    def __init__(self, channel: str = 'socketio', write_only: bool = False, logger=None,
+                 retention: float = 60, reconnect_delay: float = 5, keepalive_interval: float = 60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.retention = retention
+        self.reconnect_delay = reconnect_delay
+        self.keepalive_interval = keepalive_interval
+        self._last_id: Optional[int] = None
+        self._last_prune = 0.0
+
+    def _publish(self, data):
+        payload = psycopg2.Binary(pickle.dumps(data))
+        with db_connection(DB_CONFIG) as conn:
+            if not conn:
+                logger.error("Could not publish Socket.IO message: database connection failed")
+                return
+            try:
+                cursor = conn.cursor()
+                cursor.execute(PUBLISH_SQL, {'channel': self.channel, 'host_id': self.host_id, 'payload': payload})
+                if time.monotonic() - self._last_prune > self.retention / 2:
+                    self._last_prune = time.monotonic()
+                    cursor.execute(
+                        "DELETE FROM sena.socketio_messages WHERE created_at < now() - make_interval(secs => %s)",
+                        (self.retention,))
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error("Could not publish Socket.IO message: %s", e)
+
+    def _listen(self):
+        while True:
+            conn = get_db_connection(DB_CONFIG)
+            if conn:
+                try:
+                    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                    cursor = conn.cursor()
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                    if self._last_id is None:
+                        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sena.socketio_messages")
+                        self._last_id = cursor.fetchone()[0]
+                    else:
+                        # Whatever was published while this process was not listening
+                        cursor.execute("""
+                            SELECT id, payload FROM sena.socketio_messages
+                            WHERE id > %s AND channel = %s AND host_id <> %s
+                            ORDER BY id
+                        """, (self._last_id, self.channel, self.host_id))
+                        yield from self._read(cursor.fetchall())
+                    yield from self._receive(conn, cursor)
+                except Exception as e:
+                    logger.warning("Socket.IO queue connection lost: %s", e)
+                finally:
+                    conn.close()
+            time.sleep(self.reconnect_delay)
+
+    def _receive(self, conn, cursor):
+        while True:
+            readable, _, _ = select.select([conn], [], [], self.keepalive_interval)
+            if not readable:
+                cursor.execute("SELECT 1")
+            conn.poll()
+            ids = []
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                if notify.channel == self.channel and notify.payload.isdigit():
+                    ids.append(int(notify.payload))
+            if not ids:
+                continue
+            # Ids are read explicitly: a later id can commit before an earlier one
+            cursor.execute("""
+                SELECT id, payload FROM sena.socketio_messages
+                WHERE id = ANY(%s) AND host_id <> %s
+                ORDER BY id
+            """, (ids, self.host_id))
+            self._last_id = max([self._last_id] + ids)
+            yield from self._read(cursor.fetchall())
+
+    def _read(self, rows):
+        for message_id, payload in rows:
+            self._last_id = max(self._last_id, message_id)
+            yield bytes(payload)
+
+
+class PostgresClusterManager(ClusterMessagesMixin, PostgresManager):
+    pass
+
+
+class RedisClusterManager(ClusterMessagesMixin, socketio.RedisManager):
+    pass
+
+
+def create_client_manager(message_queue: str, channel: str, retention: float = 60,
+                          instrumented: bool = False, backpressure: bool = False) -> Optional[socketio.Manager]:
+    """
+    The client manager for SocketIO(client_manager=...): a message queue
+    manager with cluster messages when message_queue is set, else the
+    default in-process manager, with emit metrics and per-client
+    backpressure mixed in as requested. None means the SocketIO default.
+    """
+    if not message_queue:
+        base, kwargs = socketio.Manager, {}
+    elif message_queue == 'postgres':
+        base, kwargs = PostgresClusterManager, {'channel': channel, 'retention': retention}
+    elif message_queue.startswith(('redis://', 'rediss://', 'unix://')):
+        base, kwargs = RedisClusterManager, {'url': message_queue, 'channel': channel}
+    else:
+        raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE: {message_queue!r}")
+
+    mixins = ([EmitMetricsMixin] if instrumented else []) + ([BackpressureMixin] if backpressure else [])
+    if not mixins:
+        return base(**kwargs) if message_queue else None
+    if base is socketio.Manager and mixins == [EmitMetricsMixin]:
+        return InstrumentedManager()
+    prefix = ''.join('Instrumented' if mixin is EmitMetricsMixin else 'Backpressure' for mixin in mixins)
+    return type(f'{prefix}{base.__name__}', (*mixins, base), {})(**kwargs)
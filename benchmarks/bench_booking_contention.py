@@ -0,0 +1,222 @@
+"""
+Booking throughput and correctness under contention.
+
+Many workers book the same few desks at once through Booking.create_bookings
+(the code behind /api/bookings). Successful bookings are cancelled again
+with probability --cancel-rate so the hot slots keep changing hands. Runs
+against a throwaway Postgres: the sena schema is dropped and recreated.
+
+    python benchmarks/bench_booking_contention.py \\
+        --dsn postgresql://postgres@localhost/sena_bench \\
+        --workers 32 --hot-desks 5 --duration 10
+
+At the end every desk/slot/date must have at most one live booking, and the
+number of live bookings must equal bookings made minus bookings cancelled.
+--baseline also runs the same load with a read-then-write insert and the
+unique index dropped, to show the double bookings it lets through.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+from bench_desk_availability import PRODUCTION_HOST, reset_schema
+
+BASELINE_SQL = """
+    INSERT INTO sena.booking_transactions (desk_id, slot_id, user_id, status, booking_date)
+    SELECT %(desk_id)s, %(slot_id)s, %(user_id)s, 'booked', %(booking_date)s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM sena.booking_transactions
+        WHERE desk_id = %(desk_id)s AND slot_id = %(slot_id)s
+            AND booking_date = %(booking_date)s AND status <> 'cancelled'
+    )
+    RETURNING id
+"""
+
+DOUBLE_BOOKINGS_SQL = """
+    SELECT COUNT(*), COALESCE(SUM(n - 1), 0)
+    FROM (
+        SELECT COUNT(*) AS n
+        FROM sena.booking_transactions
+        WHERE status <> 'cancelled'
+        GROUP BY desk_id, slot_id, booking_date
+        HAVING COUNT(*) > 1
+    ) AS dup
+"""
+
+
+def run_load(book, cancel, cells, workers: int, duration: float, items: int, cancel_rate: float, user_ids) -> dict:
+    counters = {'requests': 0, 'booked': 0, 'conflicts': 0, 'cancelled': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        rng = random.Random()
+        local = dict.fromkeys(counters, 0)
+        while time.monotonic() < deadline:
+            user_id = rng.choice(user_ids)
+            wanted = rng.sample(cells, items)
+            booked, conflicts, ok = book(user_id, wanted)
+            local['requests'] += 1
+            if not ok:
+                local['errors'] += 1
+                continue
+            local['booked'] += len(booked)
+            local['conflicts'] += conflicts
+            for booking_id in booked:
+                if rng.random() < cancel_rate and cancel(booking_id, user_id):
+                    local['cancelled'] += 1
+        with lock:
+            for key, value in local.items():
+                counters[key] += value
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    counters['elapsed_s'] = round(elapsed, 2)
+    counters['bookings_per_s'] = round(counters['booked'] / elapsed, 1)
+    counters['requests_per_s'] = round(counters['requests'] / elapsed, 1)
+    return counters
+
+
+def verify(conn, result: dict) -> dict:
+    cursor = conn.cursor()
+    cursor.execute(DOUBLE_BOOKINGS_SQL)
+    slots, extra = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) FROM sena.booking_transactions WHERE status <> 'cancelled'")
+    live = cursor.fetchone()[0]
+    conn.rollback()
+    result.update({
+        'double_booked_slots': slots,
+        'extra_bookings': int(extra),
+        'live_bookings': live,
+        'consistent': live == result['booked'] - result['cancelled']
+    })
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.getenv('BENCH_DATABASE_URL'), help='throwaway database (BENCH_DATABASE_URL)')
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--hot-desks', type=int, default=5, help='desks everyone competes for')
+    parser.add_argument('--days', type=int, default=3, help='dates booked, from today')
+    parser.add_argument('--items', type=int, default=1, help='slots per request (bulk, all or nothing)')
+    parser.add_argument('--duration', type=float, default=10, help='seconds')
+    parser.add_argument('--cancel-rate', type=float, default=0.5)
+    parser.add_argument('--baseline', action='store_true', help='also run read-then-write without the unique index')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        parser.error('--dsn or BENCH_DATABASE_URL is required')
+    params = parse_dsn(args.dsn)
+    if params.get('host') == PRODUCTION_HOST:
+        parser.error('refusing to drop the sena schema on the production host')
+
+    # Point the app's pool at the benchmark database before importing it
+    os.environ.update({
+        'DB_HOST': params.get('host', 'localhost'),
+        'DB_PORT': params.get('port', '5432'),
+        'DB_NAME': params.get('dbname', 'postgres'),
+        'DB_USER': params.get('user', 'postgres'),
+        'DB_PASSWORD': params.get('password', ''),
+        'DB_POOL_MAX': str(args.workers)
+    })
+    from app.models.booking_model import Booking, BookingItem
+
+    conn = psycopg2.connect(args.dsn)
+    reset_schema(conn, max(args.hot_desks, 1), 0, 0.0)
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM sena.slot_master ORDER BY id")
+    slot_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT id::text FROM sena.users")
+    user_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("SELECT id FROM sena.desks ORDER BY id LIMIT %s", (args.hot_desks,))
+    desk_ids = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    dates = [(date.today() + timedelta(days=offset)).isoformat() for offset in range(args.days)]
+    cells = [BookingItem(desk_id, slot_id, day) for desk_id in desk_ids for slot_id in slot_ids for day in dates]
+    if args.items > len(cells):
+        parser.error('--items is larger than the number of hot slots')
+
+    def book(user_id, wanted):
+        result, status_code = Booking.create_bookings(user_id, wanted)
+        if status_code >= 500:
+            return [], 0, False
+        return [b['booking_id'] for b in result['bookings']], len(result['conflicts']), True
+
+    def cancel(booking_id, user_id):
+        return Booking.cancel_booking(booking_id, user_id)[1] == 200
+
+    print(f"{len(cells)} hot slots, {args.workers} workers, {args.items} slot(s) per request, {args.duration}s")
+    results = {'constraint': verify(conn, run_load(
+        book, cancel, cells, args.workers, args.duration, args.items, args.cancel_rate, user_ids))}
+
+    if args.baseline:
+        cursor.execute("TRUNCATE sena.booking_transactions")
+        cursor.execute("DROP INDEX sena.uq_booking_transactions_live_slot")
+        conn.commit()
+        local = threading.local()
+
+        def baseline_conn():
+            if not hasattr(local, 'conn'):
+                local.conn = psycopg2.connect(args.dsn)
+            return local.conn
+
+        def baseline_book(user_id, wanted):
+            worker_conn = baseline_conn()
+            try:
+                worker_cursor = worker_conn.cursor()
+                booked = []
+                for item in wanted:
+                    worker_cursor.execute(BASELINE_SQL, {
+                        'desk_id': item.desk_id, 'slot_id': item.slot_id,
+                        'booking_date': item.booking_date, 'user_id': user_id
+                    })
+                    row = worker_cursor.fetchone()
+                    if row is None:
+                        worker_conn.rollback()
+                        return [], 1, True
+                    booked.append(row[0])
+                worker_conn.commit()
+                return booked, 0, True
+            except Exception:
+                worker_conn.rollback()
+                return [], 0, False
+
+        def baseline_cancel(booking_id, user_id):
+            worker_conn = baseline_conn()
+            worker_cursor = worker_conn.cursor()
+            worker_cursor.execute("UPDATE sena.booking_transactions SET status = 'cancelled' WHERE id = %s", (booking_id,))
+            worker_conn.commit()
+            return worker_cursor.rowcount == 1
+
+        results['read_then_write'] = verify(conn, run_load(
+            baseline_book, baseline_cancel, cells, args.workers, args.duration, args.items, args.cancel_rate, user_ids))
+    conn.close()
+
+    print(f"{'mode':>16} {'bookings/s':>11} {'requests/s':>11} {'conflicts':>10} {'double-booked':>14} {'consistent':>11}")
+    for mode, row in results.items():
+        print(f"{mode:>16} {row['bookings_per_s']:>11} {row['requests_per_s']:>11} {row['conflicts']:>10} "
+              f"{row['double_booked_slots']:>14} {str(row['consistent']):>11}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'booking_contention', 'args': vars(args), 'results': results}, f, indent=2)
+    return 0 if results['constraint']['double_booked_slots'] == 0 and results['constraint']['consistent'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Desk availability query latency as the desk count grows, legacy vs current.
+
+Runs against a throwaway Postgres: the sena schema in the target database is
+dropped and recreated for every desk count.
+
+    python benchmarks/bench_desk_availability.py \\
+        --dsn postgresql://postgres@localhost/sena_bench \\
+        --desks 250 500 1000 2000 4000 --repeat 5
+
+"legacy" is the query as it shipped before the rewrite (correlated desk type
+lookup, ::date filter, per-desk correlated JSON_AGG); "current" goes through
+DeskData.get_desk_availability with the indexes from migrations/ applied;
+"read model" is the same call served from sena.desk_daily_availability.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PRODUCTION_HOST = 'dpg-ctlpcvrqf0us7389o680-a.singapore-postgres.render.com'
+
+LEGACY_SQL = """
+    WITH desk_details AS (
+        SELECT d.id AS desk_id, d.name AS desk_name, d.floor_number, d.capacity, d.description,
+               d.status AS desk_status, b.name AS building_name, b.address AS building_address,
+               b.amenities, b.operating_hours, l.name AS city, d.desk_type_id
+        FROM sena.desks AS d
+        LEFT JOIN sena.buildings AS b ON b.id = d.building_id
+        LEFT JOIN sena.locations AS l ON l.id = d.location_id
+    ),
+    slot_status AS (
+        SELECT sm.id AS slot_id, sm.slot_type, sm.start_time, sm.end_time, sm.time_zone,
+               d.id AS desk_id, COALESCE(bt.status, 'available') AS slot_status
+        FROM sena.slot_master AS sm
+        CROSS JOIN sena.desks AS d
+        LEFT JOIN sena.booking_transactions AS bt
+            ON sm.id = bt.slot_id AND d.id = bt.desk_id
+            AND bt.updated_at::date = '{target_date}'
+    ),
+    desk_pricing AS (
+        SELECT dp.desk_type_id, dp.slot_id, dp.price
+        FROM sena.desk_pricing AS dp
+        WHERE dp.is_active = true
+    ),
+    slots_with_pricing AS (
+        SELECT ss.slot_id, ss.slot_type, ss.start_time, ss.end_time, ss.time_zone,
+               ss.desk_id, ss.slot_status, dp.price
+        FROM slot_status AS ss
+        LEFT JOIN desk_pricing AS dp
+            ON dp.slot_id = ss.slot_id
+            AND dp.desk_type_id = (SELECT desk_type_id FROM sena.desks WHERE id = ss.desk_id)
+    )
+    SELECT JSON_AGG(JSON_BUILD_OBJECT(
+        'desk_id', dd.desk_id, 'desk_name', dd.desk_name, 'floor_number', dd.floor_number,
+        'capacity', dd.capacity, 'description', dd.description, 'desk_status', dd.desk_status,
+        'building_name', dd.building_name, 'building_address', dd.building_address,
+        'amenities', dd.amenities, 'operating_hours', dd.operating_hours, 'city', dd.city,
+        'slots', (
+            SELECT JSON_AGG(JSON_BUILD_OBJECT(
+                'slot_id', sp.slot_id, 'slot_type', sp.slot_type, 'start_time', sp.start_time,
+                'end_time', sp.end_time, 'time_zone', sp.time_zone, 'status', sp.slot_status,
+                'price', sp.price))
+            FROM slots_with_pricing AS sp
+            WHERE sp.desk_id = dd.desk_id
+        )
+    )) AS desks_json
+    FROM desk_details AS dd;
+"""
+
+SEED_SQL = """
+    INSERT INTO sena.locations (name)
+    SELECT 'City ' || g FROM generate_series(1, 5) AS g;
+
+    INSERT INTO sena.buildings (name, address, amenities, operating_hours, location_id)
+    SELECT 'Building ' || g, g || ' Main Road', '["wifi", "parking", "cafeteria"]'::jsonb,
+           '09:00-21:00', (g %% 5) + 1
+    FROM generate_series(1, GREATEST(%(desks)s / 200, 1)) AS g;
+
+    INSERT INTO sena.desk_type_master (type, capacity)
+    VALUES ('Hot Desk', 1), ('Dedicated Desk', 1), ('Cabin', 4);
+
+    INSERT INTO sena.slot_master (slot_type, start_time, end_time, time_zone)
+    VALUES ('Morning', '09:00', '13:00', 'Asia/Kolkata'),
+           ('Afternoon', '13:00', '17:00', 'Asia/Kolkata'),
+           ('Evening', '17:00', '21:00', 'Asia/Kolkata'),
+           ('Full Day', '09:00', '21:00', 'Asia/Kolkata');
+
+    INSERT INTO sena.desk_pricing (desk_type_id, slot_id, price, is_active)
+    SELECT t.id, s.id, 100 * t.id + 10 * s.id, true
+    FROM sena.desk_type_master AS t CROSS JOIN sena.slot_master AS s;
+
+    INSERT INTO sena.desks (name, floor_number, capacity, description, status,
+                            building_id, location_id, desk_type_id)
+    SELECT 'Desk ' || g, (g %% 10) + 1, 1, 'Benchmark desk', 'active',
+           b.id, b.location_id, (g %% 3) + 1
+    FROM generate_series(1, %(desks)s) AS g
+    JOIN sena.buildings AS b ON b.id = (g %% GREATEST(%(desks)s / 200, 1)) + 1;
+
+    INSERT INTO sena.users (email, first_name, last_name, password)
+    SELECT 'user' || g || '@example.com', 'User', g::text, 'secret'
+    FROM generate_series(1, 100) AS g;
+
+    INSERT INTO sena.booking_transactions (desk_id, slot_id, user_id, status, updated_at)
+    SELECT d.id, s.id, (SELECT id FROM sena.users ORDER BY random() LIMIT 1), 'booked',
+           %(today)s::date + day_offset + TIME '08:00'
+    FROM sena.desks AS d
+    CROSS JOIN sena.slot_master AS s
+    CROSS JOIN generate_series(-%(days)s, %(days)s) AS day_offset
+    WHERE random() < %(occupancy)s;
+"""
+
+
+def reset_schema(conn, desks: int, days: int, occupancy: float):
+    cursor = conn.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS sena CASCADE")
+    with open(os.path.join(ROOT, 'benchmarks', 'schema.sql'), encoding='utf-8') as f:
+        cursor.execute(f.read())
+    cursor.execute(SEED_SQL, {
+        'desks': desks, 'days': days, 'occupancy': occupancy, 'today': date.today().isoformat()
+    })
+    conn.commit()
+
+    from app.utils import migrate
+    migrate.apply_pending(conn)
+    conn.autocommit = True
+    cursor.execute("ANALYZE")
+    conn.autocommit = False
+
+
+def time_calls(fn, repeat: int) -> dict:
+    fn()  # warm up caches and the connection pool
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': round(statistics.median(samples), 2),
+        'min_ms': round(min(samples), 2),
+        'max_ms': round(max(samples), 2)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.getenv('BENCH_DATABASE_URL'), help='throwaway database (BENCH_DATABASE_URL)')
+    parser.add_argument('--desks', type=int, nargs='+', default=[250, 500, 1000, 2000, 4000])
+    parser.add_argument('--days', type=int, default=30, help='bookings are generated for today +/- DAYS')
+    parser.add_argument('--occupancy', type=float, default=0.3)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        parser.error('--dsn or BENCH_DATABASE_URL is required')
+    params = parse_dsn(args.dsn)
+    if params.get('host') == PRODUCTION_HOST:
+        parser.error('refusing to drop the sena schema on the production host')
+
+    # Point the app's pool at the benchmark database before importing it
+    os.environ.update({
+        'DB_HOST': params.get('host', 'localhost'),
+        'DB_PORT': params.get('port', '5432'),
+        'DB_NAME': params.get('dbname', 'postgres'),
+        'DB_USER': params.get('user', 'postgres'),
+        'DB_PASSWORD': params.get('password', '')
+    })
+    from app.models.desk_model import DeskData
+    from app.config.realtime import DESK_READ_MODEL_CONFIG
+    from app.utils import availability_read_model
+
+    target_date = date.today().isoformat()
+    conn = psycopg2.connect(args.dsn)
+    results = []
+    print(f"{'desks':>7} {'legacy ms':>11} {'current ms':>11} {'read model ms':>14} {'speedup':>8}")
+    try:
+        for desks in args.desks:
+            reset_schema(conn, desks, args.days, args.occupancy)
+
+            def legacy():
+                cursor = conn.cursor()
+                cursor.execute(LEGACY_SQL.format(target_date=target_date))
+                cursor.fetchone()
+                conn.rollback()
+
+            def current():
+                _, status_code = DeskData.get_desk_availability(target_date)
+                assert status_code == 200
+
+            row = {
+                'desks': desks,
+                'legacy': time_calls(legacy, args.repeat),
+                'current': time_calls(current, args.repeat)
+            }
+            availability_read_model.rebuild(conn, date.today(), date.today())
+            DESK_READ_MODEL_CONFIG['enabled'] = True
+            try:
+                row['read_model'] = time_calls(current, args.repeat)
+            finally:
+                DESK_READ_MODEL_CONFIG['enabled'] = False
+            results.append(row)
+            speedup = row['legacy']['median_ms'] / max(row['read_model']['median_ms'], 0.001)
+            print(f"{desks:>7} {row['legacy']['median_ms']:>11} {row['current']['median_ms']:>11} "
+                  f"{row['read_model']['median_ms']:>14} {speedup:>7.1f}x")
+    finally:
+        conn.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'desk_availability', 'date': target_date, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
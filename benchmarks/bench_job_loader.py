@@ -0,0 +1,111 @@
+"""
+Rows per second loading scraped jobs into sena.jobs: app.utils.job_loader
+(COPY into staging plus one merge per batch) against one INSERT ... ON
+CONFLICT per row, the way a per-job insert from the scraper would write.
+
+    python benchmarks/bench_job_loader.py --dsn postgresql://postgres@localhost/sena_bench \\
+        --rows 10000 100000 --batch 50000
+
+Runs against a throwaway Postgres: migrations/008 is applied and sena.jobs
+truncated before each run. Each size is loaded twice per method, into an
+empty table and again over the loaded rows (every row an update). The
+row-by-row method commits every --commit-every rows and is only run up to
+--max-row-by-row rows, as it is slow by design.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+from bench_desk_availability import PRODUCTION_HOST, ROOT
+
+from app.utils import job_loader
+
+INSERT_ONE = """
+    INSERT INTO sena.jobs AS j (url, title, company, salary, location, skills, description)
+    VALUES (%s, %s, %s, %s, %s, COALESCE(string_to_array(NULLIF(%s, ''), ', '), '{}'), %s)
+    ON CONFLICT (url) DO UPDATE SET
+        title = excluded.title, company = excluded.company, salary = excluded.salary,
+        location = excluded.location, skills = excluded.skills,
+        description = COALESCE(excluded.description, j.description), last_seen_at = now()
+"""
+
+
+def scraped_rows(count: int):
+    """CSV rows as naukriScrapper writes them."""
+    for i in range(count):
+        yield {
+            'Title': f'Software Developer {i % 97}', 'Company': f'Company {i % 500} Pvt. Ltd.',
+            'Salary': 'Not Disclosed' if i % 3 else '5-10 Lacs PA', 'Location': 'Chennai, Bengaluru',
+            'Skills': 'Python, SQL, AWS, Django', 'URL': f'https://www.naukri.com/job-listings-developer-{i}?src=srp',
+            'Description': ('Design, build and run services. ' * 25) if i % 10 else 'Job description not found.'
+        }
+
+
+def load_copy(conn, count: int, batch: int, commit_every: int) -> None:
+    job_loader.load_jobs(conn, job_loader.staging_rows(scraped_rows(count)), batch)
+
+
+def load_row_by_row(conn, count: int, batch: int, commit_every: int) -> None:
+    cursor = conn.cursor()
+    for n, row in enumerate(job_loader.staging_rows(scraped_rows(count)), 1):
+        cursor.execute(INSERT_ONE, row)
+        if n % commit_every == 0:
+            conn.commit()
+    conn.commit()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.getenv('BENCH_DATABASE_URL'), help='throwaway database (BENCH_DATABASE_URL)')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--batch', type=int, default=50000)
+    parser.add_argument('--commit-every', type=int, default=1000)
+    parser.add_argument('--max-row-by-row', type=int, default=100000)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        parser.error('--dsn or BENCH_DATABASE_URL is required')
+    if parse_dsn(args.dsn).get('host') == PRODUCTION_HOST:
+        parser.error('refusing to truncate sena.jobs on the production host')
+
+    conn = psycopg2.connect(args.dsn)
+    results = []
+    try:
+        cursor = conn.cursor()
+        cursor.execute("CREATE SCHEMA IF NOT EXISTS sena")
+        with open(os.path.join(ROOT, 'migrations', '008_jobs.sql'), encoding='utf-8') as f:
+            cursor.execute(f.read())
+        conn.commit()
+
+        print(f"{'rows':>8} {'method':>12} {'insert rows/s':>14} {'update rows/s':>14}")
+        for count in args.rows:
+            for method, load in (('copy', load_copy), ('row-by-row', load_row_by_row)):
+                if method == 'row-by-row' and count > args.max_row_by_row:
+                    continue
+                cursor.execute("TRUNCATE sena.jobs")
+                conn.commit()
+                rates = []
+                for _ in ('insert', 'update'):
+                    started = time.perf_counter()
+                    load(conn, count, args.batch, args.commit_every)
+                    rates.append(round(count / (time.perf_counter() - started)))
+                results.append({'rows': count, 'method': method, 'insert_rows_per_s': rates[0],
+                                'update_rows_per_s': rates[1]})
+                print(f"{count:>8} {method:>12} {rates[0]:>14} {rates[1]:>14}")
+    finally:
+        conn.close()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'job_loader', 'config': vars(args), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+CPU time and peak memory of serving Postgres-built desk JSON, decoded and
+re-encoded versus passed through as RawJSON. Needs no database: the payload
+is generated in the shape and text format JSON_BUILD_OBJECT produces.
+
+    python benchmarks/bench_json_passthrough.py --desks 250 1000 4000 --repeat 20
+
+Paths compared, per desk count:
+  http       /api/desks body: json.loads + jsonify vs raw_json.dumps
+  broadcast  Socket.IO desk_update packet: stdlib json vs raw_json
+  refresh    recording a new desk list in DeskVersionStore when one desk
+             changed: decoded dicts (as before) vs per-desk text
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask, jsonify
+from socketio import packet
+
+from app.utils import raw_json
+from app.utils.desk_versions import DeskVersionStore, diff_desks
+from app.utils.raw_json import RawJSON
+
+
+def pg_json(value) -> str:
+    """JSON text the way Postgres' json type prints objects."""
+    return json.dumps(value, separators=(', ', ' : '))
+
+
+def make_desk(desk_id: int, booked: bool = False) -> dict:
+    return {
+        'desk_id': desk_id, 'desk_name': f'Desk {desk_id}', 'floor_number': desk_id % 10 + 1,
+        'capacity': 1, 'description': 'Benchmark desk', 'desk_status': 'active',
+        'building_name': f'Building {desk_id % 20}', 'building_address': f'{desk_id % 20} Main Road',
+        'amenities': ['wifi', 'parking', 'cafeteria'], 'operating_hours': '09:00-21:00', 'city': 'City 1',
+        'slots': [
+            {'slot_id': slot_id, 'slot_type': slot_type, 'start_time': start, 'end_time': end,
+             'time_zone': 'Asia/Kolkata', 'status': 'booked' if booked and slot_id == 1 else 'available',
+             'price': 100 * (desk_id % 3 + 1) + 10 * slot_id}
+            for slot_id, slot_type, start, end in (
+                (1, 'Morning', '09:00:00', '13:00:00'), (2, 'Afternoon', '13:00:00', '17:00:00'),
+                (3, 'Evening', '17:00:00', '21:00:00'), (4, 'Full Day', '09:00:00', '21:00:00'))
+        ]
+    }
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()
+    gc.collect()
+    cpu = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        cpu.append((time.process_time() - started) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'cpu_ms': round(statistics.median(cpu), 3), 'peak_kib': round(peak / 1024, 1)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--desks', type=int, nargs='+', default=[250, 1000, 4000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    results = []
+    print(f"{'desks':>6} {'path':>10} {'decoded ms':>11} {'raw ms':>8} {'decoded KiB':>12} {'raw KiB':>9}")
+    for desks in args.desks:
+        desk_texts = {desk_id: pg_json(make_desk(desk_id)) for desk_id in range(1, desks + 1)}
+        changed_texts = dict(desk_texts)
+        changed_texts[1] = pg_json(make_desk(1, booked=True))
+        array_text = '[' + ', '.join(desk_texts.values()) + ']'
+        decoded = json.loads(array_text)
+
+        def http_decoded():
+            with app.app_context():
+                jsonify({'desks': json.loads(array_text)}).get_data()
+
+        def http_raw():
+            raw_json.dumps({'desks': RawJSON(array_text)}, separators=(',', ':')).encode('utf-8')
+
+        def broadcast_decoded():
+            packet.Packet.json = json
+            packet.Packet(packet.EVENT, ['desk_update', {'date': '2025-01-01', 'version': 1, 'desks': decoded}]).encode()
+
+        def broadcast_raw():
+            packet.Packet.json = raw_json
+            packet.Packet(packet.EVENT, ['desk_update', {'date': '2025-01-01', 'version': 1,
+                                                         'desks': RawJSON(array_text)}]).encode()
+
+        def refresh_decoded():
+            # Before: every desk decoded by psycopg2, then the whole list diffed
+            old = {desk['desk_id']: desk for desk in json.loads(array_text)}
+            new = {desk['desk_id']: desk for desk in json.loads('[' + ', '.join(changed_texts.values()) + ']')}
+            diff_desks(old, new)
+
+        store = DeskVersionStore()
+        store.update('2025-01-01', desk_texts)
+        flip = [False]
+
+        def refresh_raw():
+            # The store already holds the previous list; alternate between the two
+            flip[0] = not flip[0]
+            store.update('2025-01-01', changed_texts if flip[0] else desk_texts)
+
+        for path, decoded_fn, raw_fn in (
+            ('http', http_decoded, http_raw),
+            ('broadcast', broadcast_decoded, broadcast_raw),
+            ('refresh', refresh_decoded, refresh_raw),
+        ):
+            row = {'desks': desks, 'path': path,
+                   'decoded': measure(decoded_fn, args.repeat), 'raw': measure(raw_fn, args.repeat)}
+            results.append(row)
+            print(f"{desks:>6} {path:>10} {row['decoded']['cpu_ms']:>11} {row['raw']['cpu_ms']:>8} "
+                  f"{row['decoded']['peak_kib']:>12} {row['raw']['peak_kib']:>9}")
+    packet.Packet.json = json
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'json_passthrough', 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Parse time of Naukri search results pages with extract_job_details as it
+was (BeautifulSoup over the whole page with html.parser) against the faster
+paths in helper/naukriScrapper.py, checking every page gives the same jobs.
+
+    python benchmarks/bench_listing_parser.py --corpus captured/ --workers 4
+    python benchmarks/bench_listing_parser.py --synthetic 200
+
+--corpus takes the *.html pages in a directory, e.g. ones saved with
+naukriScrapper.py --save-pages (job detail pages in it list no jobs and are
+compared all the same). Without it, --synthetic pages are generated in the
+markup the scraper expects, padded with the scripts and styles a real page
+carries. Parsers compared, per page:
+  soup-full   BeautifulSoup, whole page (the reference)
+  soup-jobs   BeautifulSoup building only the job tuples
+  lxml        lxml with compiled XPath (what extract_job_details uses)
+and the whole corpus parsed by parse_saved_pages on --workers processes.
+Exits 1 if any parser's output differs from the reference.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'helper'))
+
+import naukriScrapper
+from loadtest import summarize
+
+PARSERS = {
+    'soup-full': lambda page, base: naukriScrapper.extract_job_details_soup(page, base, only_listings=False),
+    'soup-jobs': lambda page, base: naukriScrapper.extract_job_details_soup(page, base),
+    'lxml': naukriScrapper.extract_job_details,
+}
+
+
+def synthetic_page(rng: random.Random, jobs: int = 20) -> str:
+    """A results page in the markup extract_job_details reads, with a real page's bulk around it."""
+    tuples = []
+    for _ in range(jobs):
+        job_id = rng.randrange(10 ** 11, 10 ** 12)
+        salary = (f'<span class="sal-wrap ver-line"><span title="{rng.randint(3, 9)}-{rng.randint(10, 20)} Lacs PA">'
+                  f'<span>{rng.randint(3, 9)}-{rng.randint(10, 20)} Lacs PA</span></span></span>'
+                  if rng.random() < 0.4 else '')
+        skills = ''.join(f'<li class="dot-gt tag-li ">{skill}</li>'
+                         for skill in rng.sample(['Python', 'Java', 'SQL', 'AWS', 'React', 'C&amp;C++', 'Django',
+                                                  'Kubernetes', 'Node.js', 'Git'], rng.randint(2, 6)))
+        href = (f'https://www.naukri.com/job-listings-software-developer-{job_id}?src=jobsearchDesk&amp;sid=1'
+                if rng.random() < 0.8 else f'/job-listings-engineer-{job_id}')
+        tuples.append(f'''
+<div class="srp-jobtuple-wrapper" data-job-id="{job_id}">
+  <div class="cust-job-tuple layout-wrapper lay-2 sjw__tuple ">
+    <div class=" row1"><h2><a class="title " title="Software Developer" href="{href}" target="_blank">
+      Software Developer &ndash; Team {rng.randint(1, 99)}</a></h2></div>
+    <div class=" row2"><span class=" comp-dtls-wrap"><a class=" comp-name mw-25" href="/company-{job_id}">
+      Company {rng.randint(1, 500)} Pvt. Ltd.</a><a class="rating"><span class="main-2">{rng.randint(30, 45) / 10}</span></a></span></div>
+    <div class=" row3"><div class="job-details "><span class="exp-wrap"><span class="ni-job-tuple-icon">
+      {rng.randint(0, 5)}-{rng.randint(6, 10)} Yrs</span></span>{salary}
+      <span class="loc-wrap ver-line"><span class="ni-job-tuple-icon"><span class="locWdth" title="Chennai">
+      Chennai, Bengaluru</span></span></span></div></div>
+    <div class=" row4"><span class="job-desc ni-job-tuple-icon ">Design &amp; build services...</span></div>
+    <div class=" row5"><ul class="tags-gt ">{skills}</ul></div>
+    <div class=" row6"><span class="job-post-day ">{rng.randint(1, 30)} Days Ago</span></div>
+  </div>
+</div>''')
+    bulk_script = '<script>window.__STATE__ = ' + json.dumps({'filters': [{'id': i, 'label': f'Filter <{i}>'}
+                                                                         for i in range(400)]}) + ';</script>'
+    bulk_style = '<style>' + ''.join(f'.c{i}{{margin:{i}px}}' for i in range(1500)) + '</style>'
+    navigation = '<ul class="nav">' + ''.join(f'<li><a href="/jobs-{i}">Jobs {i}</a></li>' for i in range(300)) + '</ul>'
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Jobs</title>{bulk_style}{bulk_script}</head>'
+            f'<body><div id="root">{navigation}<div class="styles_jlc__main">{"".join(tuples)}</div>'
+            f'<footer>{navigation}</footer></div></body></html>')
+
+
+def load_corpus(args) -> list:
+    if args.corpus:
+        return sorted(glob.glob(os.path.join(args.corpus, '*.html')))
+    directory = tempfile.mkdtemp(prefix='listing-pages-')
+    rng = random.Random(args.seed)
+    paths = []
+    for i in range(args.synthetic):
+        path = os.path.join(directory, f'results-{i}.html')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_page(rng))
+        paths.append(path)
+    return paths
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='directory of saved pages (*.html)')
+    parser.add_argument('--synthetic', type=int, default=200, help='pages to generate without --corpus')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--base-url', default=naukriScrapper.BASE_URL, help='URL relative job links resolve against')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='processes for the batch run')
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    paths = load_corpus(args)
+    if not paths:
+        print("No pages to parse")
+        return 1
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    reference = [PARSERS['soup-full'](page, args.base_url) for page in pages]
+    print(f"{len(pages)} pages, {sum(map(len, reference))} jobs, {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB "
+          f"per page; lxml {'available' if naukriScrapper.lxml_html is not None else 'NOT installed'}")
+
+    print(f"{'parser':>10} {'pages/s':>8} {'mean ms':>8} {'p50 ms':>7} {'p99 ms':>7} {'speedup':>8} {'mismatches':>11}")
+    results = []
+    baseline = None
+    for name, parse in PARSERS.items():
+        timings, mismatches = [], 0
+        for page, expected in zip(pages, reference):
+            started = time.perf_counter()
+            jobs = parse(page, args.base_url)
+            timings.append((time.perf_counter() - started) * 1000)
+            mismatches += jobs != expected
+        total = sum(timings) / 1000
+        baseline = baseline or total
+        result = {'parser': name, 'pages_per_s': round(len(pages) / total, 1), 'page_ms': summarize(timings),
+                  'speedup': round(baseline / total, 2), 'mismatches': mismatches}
+        results.append(result)
+        print(f"{name:>10} {result['pages_per_s']:>8} {result['page_ms']['mean']:>8} {result['page_ms']['p50']:>7} "
+              f"{result['page_ms']['p99']:>7} {result['speedup']:>8} {mismatches:>11}")
+
+    started = time.perf_counter()
+    mismatches = 0
+    for (path, jobs), expected in zip(naukriScrapper.parse_saved_pages(paths, args.base_url, args.workers), reference):
+        mismatches += jobs != expected
+    total = time.perf_counter() - started
+    result = {'parser': f'lxml x{args.workers}', 'pages_per_s': round(len(pages) / total, 1),
+              'speedup': round(baseline / total, 2), 'mismatches': mismatches}
+    results.append(result)
+    print(f"{result['parser']:>10} {result['pages_per_s']:>8} {'':>8} {'':>7} {'':>7} {result['speedup']:>8} "
+          f"{mismatches:>11}  (process pool, including start-up)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'listing_parser', 'pages': len(pages), 'results': results}, f, indent=2)
+    return 1 if any(result['mismatches'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Login throughput and event-loop jitter while passwords are being verified,
+with the hash run inline in the green thread (as a plain slow hash would
+be) versus offloaded by app.utils.passwords. Needs no database: the process
+is monkey patched like gunicorn's eventlet worker and logins are password
+verifications against one stored hash.
+
+    python benchmarks/bench_password_hashing.py --concurrency 1 8 32 --duration 5
+
+While the logins run, a green thread wakes every --tick-ms like the desk
+broadcaster and heartbeats do; its lateness is how long Socket.IO emits
+would be held up. For the whole HTTP path, run benchmarks/loadtest.py with
+the login scenario alongside its Socket.IO clients.
+"""
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.config.auth import PASSWORD_HASH_CONFIG
+from app.utils import passwords
+from datagen import USER_PASSWORD
+from loadtest import summarize
+
+
+def run(mode: str, stored: str, concurrency: int, duration: float, tick_ms: float) -> dict:
+    verify = {
+        'inline': lambda: check_password_hash(stored, USER_PASSWORD),
+        'pool': lambda: passwords.verify_password(stored, USER_PASSWORD)[0]
+    }[mode]
+    deadline = time.perf_counter() + duration
+    logins, lateness = [], []
+
+    def login_loop():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = verify()
+            except passwords.PasswordHashingBusy:
+                ok = False
+            logins.append((ok, (time.perf_counter() - started) * 1000))
+            eventlet.sleep(0)
+
+    def ticker():
+        interval = tick_ms / 1000
+        while time.perf_counter() < deadline:
+            expected = time.perf_counter() + interval
+            eventlet.sleep(interval)
+            lateness.append(max(time.perf_counter() - expected, 0) * 1000)
+
+    pool = eventlet.GreenPool(concurrency + 1)
+    pool.spawn(ticker)
+    for _ in range(concurrency):
+        pool.spawn(login_loop)
+    pool.waitall()
+
+    succeeded = [elapsed for ok, elapsed in logins if ok]
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'logins': len(logins),
+        'errors': len(logins) - len(succeeded),
+        'throughput_rps': round(len(succeeded) / duration, 1),
+        'login_ms': summarize(succeeded),
+        'tick_lateness_ms': summarize(lateness)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=5, help='seconds per run')
+    parser.add_argument('--tick-ms', type=float, default=10)
+    parser.add_argument('--modes', nargs='+', choices=['inline', 'pool'], default=['inline', 'pool'])
+    parser.add_argument('--json', help='also write results to this file')
+    args = parser.parse_args(argv)
+
+    stored = generate_password_hash(USER_PASSWORD, PASSWORD_HASH_CONFIG['method'])
+    print(f"method {PASSWORD_HASH_CONFIG['method']}, {PASSWORD_HASH_CONFIG['workers']} workers")
+    print(f"{'mode':>7} {'conc':>5} {'logins/s':>9} {'login p50':>10} {'login p99':>10} "
+          f"{'tick p50':>9} {'tick p99':>9} {'tick max':>9}")
+    results = []
+    for concurrency in args.concurrency:
+        for mode in args.modes:
+            result = run(mode, stored, concurrency, args.duration, args.tick_ms)
+            results.append(result)
+            login, tick = result['login_ms'], result['tick_lateness_ms']
+            print(f"{mode:>7} {concurrency:>5} {result['throughput_rps']:>9} {login['p50']:>10} "
+                  f"{login['p99']:>10} {tick['p50']:>9} {tick['p99']:>9} {tick['max']:>9}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'password_hashing', 'config': dict(PASSWORD_HASH_CONFIG), 'results': results},
+                      f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
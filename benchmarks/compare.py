@@ -0,0 +1,86 @@
+"""
+Compare two load test results (benchmarks/loadtest.py --json) and flag
+regressions.
+
+    python benchmarks/compare.py results/before.json results/after.json --threshold 0.10
+
+Throughput regresses when it drops by more than --threshold, latencies
+(any *_ms percentile) when they grow by more than --threshold, and error
+rates when they grow by more than --max-error-rate-increase (absolute).
+Exits with 1 if anything regressed, so it can gate a deploy.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+
+LATENCY_KEYS = ('p50', 'p95', 'p99')
+
+
+def metrics(scenario: Dict) -> Iterable[Tuple[str, Optional[float], str]]:
+    """(name, value, better) for each compared metric; better is 'higher' or 'lower'."""
+    if 'throughput_rps' in scenario:
+        yield 'throughput_rps', scenario['throughput_rps'], 'higher'
+    if 'error_rate' in scenario:
+        yield 'error_rate', scenario['error_rate'], 'lower'
+    for key, value in scenario.items():
+        if key.endswith('_ms') and isinstance(value, dict):
+            for percentile in LATENCY_KEYS:
+                yield f'{key}.{percentile}', value.get(percentile), 'lower'
+    if 'updates_missed' in scenario:
+        yield 'updates_missed', scenario['updates_missed'], 'lower'
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float, max_error_rate_increase: float):
+    """Rows of (scenario, metric, baseline, candidate, change, regressed)."""
+    rows = []
+    for name, before in baseline['scenarios'].items():
+        after = candidate['scenarios'].get(name)
+        if after is None:
+            continue
+        after_metrics = {metric: value for metric, value, _ in metrics(after)}
+        for metric, old, better in metrics(before):
+            new = after_metrics.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else None
+            if metric == 'error_rate':
+                regressed = new - old > max_error_rate_increase
+            elif metric == 'updates_missed':
+                regressed = new > old
+            elif better == 'higher':
+                regressed = change is not None and change < -threshold
+            else:
+                regressed = change is not None and change > threshold
+            rows.append((name, metric, old, new, change, regressed))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change that counts as a regression')
+    parser.add_argument('--max-error-rate-increase', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline.get('commit') or '?'} {baseline.get('label', '')} {baseline.get('started_at', '')}")
+    print(f"candidate: {candidate.get('commit') or '?'} {candidate.get('label', '')} {candidate.get('started_at', '')}")
+    print(f"{'scenario':>12} {'metric':>16} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    rows = compare(baseline, candidate, args.threshold, args.max_error_rate_increase)
+    for name, metric, old, new, change, regressed in rows:
+        change_text = f'{change:+.1%}' if change is not None else ''
+        print(f"{name:>12} {metric:>16} {old:>10} {new:>10} {change_text:>8}{'  REGRESSION' if regressed else ''}")
+
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
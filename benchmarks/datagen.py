@@ -0,0 +1,189 @@
+"""
+Synthetic sena dataset at a configurable scale, for load tests and benchmarks.
+
+Runs against a throwaway Postgres: the sena schema in the target database is
+dropped, recreated from benchmarks/schema.sql, filled and migrated. The same
+--seed always produces the same rows (ids, emails and bookings).
+
+    python benchmarks/datagen.py --dsn postgresql://postgres@localhost/sena_load \\
+        --cities 5 --buildings 4 --desks 50 --slots 4 --months 3 --days-ahead 30
+
+Users are user1@example.com .. userN@example.com, all with USER_PASSWORD, so
+benchmarks/loadtest.py can log in as any of them. It is stored hashed (one
+hash shared by every user), or as plaintext with --plaintext-passwords to
+exercise the rehash on first login. Bookings cover the last
+--months months and the next --days-ahead days at --occupancy; a share of them
+(--cancel-rate) is cancelled.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+from bench_desk_availability import PRODUCTION_HOST, ROOT
+from werkzeug.security import generate_password_hash
+
+from app.config.auth import PASSWORD_HASH_CONFIG
+
+USER_PASSWORD = 'load-test-secret'
+
+# Slots split the operating day into equal parts; a full-day slot is added on top
+DAY_START_HOUR = 8
+DAY_HOURS = 12
+
+SEED_SQL = """
+    INSERT INTO sena.locations (name)
+    SELECT 'City ' || c FROM generate_series(1, %(cities)s) AS c;
+
+    INSERT INTO sena.buildings (name, address, amenities, operating_hours, location_id)
+    SELECT 'Building ' || c || '-' || b, b || ' Main Road, City ' || c,
+           (ARRAY['["wifi"]', '["wifi", "parking"]', '["wifi", "parking", "cafeteria"]'])[1 + (b %% 3)]::jsonb,
+           '08:00-20:00', c
+    FROM generate_series(1, %(cities)s) AS c
+    CROSS JOIN generate_series(1, %(buildings)s) AS b;
+
+    INSERT INTO sena.desk_type_master (type, capacity)
+    VALUES ('Hot Desk', 1), ('Dedicated Desk', 1), ('Cabin', 4);
+
+    INSERT INTO sena.slot_master (slot_type, start_time, end_time, time_zone)
+    SELECT 'Slot ' || s,
+           make_time(0, 0, 0) + make_interval(mins => %(day_start)s * 60 + (s - 1) * %(slot_minutes)s),
+           make_time(0, 0, 0) + make_interval(mins => %(day_start)s * 60 + s * %(slot_minutes)s),
+           'Asia/Kolkata'
+    FROM generate_series(1, %(slots)s) AS s;
+
+    INSERT INTO sena.slot_master (slot_type, start_time, end_time, time_zone)
+    SELECT 'Full Day', make_time(%(day_start)s, 0, 0), make_time(%(day_start)s + %(day_hours)s, 0, 0), 'Asia/Kolkata'
+    WHERE %(full_day)s;
+
+    INSERT INTO sena.desk_pricing (desk_type_id, slot_id, price, is_active)
+    SELECT t.id, s.id, 100 * t.id + 10 * s.id, true
+    FROM sena.desk_type_master AS t CROSS JOIN sena.slot_master AS s;
+
+    INSERT INTO sena.desks (name, floor_number, capacity, description, status,
+                            building_id, location_id, desk_type_id)
+    SELECT 'Desk ' || b.id || '-' || g, 1 + (g %% %(floors)s), CASE WHEN g %% 3 = 2 THEN 4 ELSE 1 END,
+           'Generated desk', CASE WHEN random() < 0.02 THEN 'maintenance' ELSE 'active' END,
+           b.id, b.location_id, 1 + (g %% 3)
+    FROM sena.buildings AS b
+    CROSS JOIN generate_series(1, %(desks)s) AS g
+    ORDER BY b.id, g;
+
+    INSERT INTO sena.users (id, email, first_name, last_name, phone, password)
+    SELECT md5('user' || g)::uuid, 'user' || g || '@example.com', 'User', g::text,
+           '+91' || lpad(g::text, 10, '0'), %(password)s
+    FROM generate_series(1, %(users)s) AS g;
+
+    INSERT INTO sena.booking_transactions (desk_id, slot_id, user_id, status, created_at, updated_at)
+    SELECT d.id, s.id, md5('user' || (1 + floor(random() * %(users)s))::int)::uuid,
+           CASE WHEN random() < %(cancel_rate)s THEN 'cancelled' ELSE 'booked' END,
+           day::date + TIME '08:00' - interval '3 days', day::date + TIME '08:00'
+    FROM sena.desks AS d
+    CROSS JOIN sena.slot_master AS s
+    CROSS JOIN generate_series(%(first_day)s::date, %(last_day)s::date, interval '1 day') AS day
+    WHERE random() < %(occupancy)s
+    ORDER BY day, d.id, s.id;
+"""
+
+
+def generate(conn, cities: int = 5, buildings: int = 4, desks: int = 50, floors: int = 5, slots: int = 4,
+             full_day: bool = True, users: int = 1000, months: int = 3, days_ahead: int = 30,
+             occupancy: float = 0.3, cancel_rate: float = 0.05, seed: float = 0.42,
+             today: date = None, plaintext_passwords: bool = False) -> dict:
+    """
+    Recreate the sena schema and fill it; `buildings` is per city and `desks`
+    per building. Returns row counts per table.
+    """
+    today = today or date.today()
+    cursor = conn.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS sena CASCADE")
+    with open(os.path.join(ROOT, 'benchmarks', 'schema.sql'), encoding='utf-8') as f:
+        cursor.execute(f.read())
+    # Triggers from migrations/ are created afterwards, so bulk inserts stay fast
+    cursor.execute("SELECT setseed(%s)", (seed,))
+    cursor.execute(SEED_SQL, {
+        'cities': cities, 'buildings': buildings, 'desks': desks, 'floors': max(floors, 1),
+        'slots': slots, 'full_day': full_day, 'day_start': DAY_START_HOUR, 'day_hours': DAY_HOURS,
+        'slot_minutes': DAY_HOURS * 60 // max(slots, 1), 'users': users,
+        'password': USER_PASSWORD if plaintext_passwords else generate_password_hash(
+            USER_PASSWORD, PASSWORD_HASH_CONFIG['method']),
+        'occupancy': occupancy, 'cancel_rate': cancel_rate,
+        'first_day': (today - timedelta(days=30 * months)).isoformat(),
+        'last_day': (today + timedelta(days=days_ahead)).isoformat()
+    })
+    conn.commit()
+
+    from app.utils import migrate
+    migrate.apply_pending(conn)
+    conn.autocommit = True
+    cursor.execute("ANALYZE")
+    conn.autocommit = False
+
+    counts = {}
+    for table in ('locations', 'buildings', 'desks', 'slot_master', 'users', 'booking_transactions'):
+        cursor.execute(f"SELECT COUNT(*) FROM sena.{table}")
+        counts[table] = cursor.fetchone()[0]
+    conn.rollback()
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.getenv('BENCH_DATABASE_URL'), help='throwaway database (BENCH_DATABASE_URL)')
+    parser.add_argument('--cities', type=int, default=5)
+    parser.add_argument('--buildings', type=int, default=4, help='per city')
+    parser.add_argument('--desks', type=int, default=50, help='per building')
+    parser.add_argument('--floors', type=int, default=5, help='desks are spread over this many floors')
+    parser.add_argument('--slots', type=int, default=4, help='slots per day, plus a full-day slot')
+    parser.add_argument('--no-full-day', dest='full_day', action='store_false')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--months', type=int, default=3, help='months of past bookings')
+    parser.add_argument('--days-ahead', type=int, default=30, help='days of future bookings')
+    parser.add_argument('--occupancy', type=float, default=0.3, help='share of desk/slot/days booked')
+    parser.add_argument('--cancel-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=float, default=0.42, help='Postgres setseed() value, -1 to 1')
+    parser.add_argument('--plaintext-passwords', action='store_true',
+                        help='store passwords as before hashing, to be rehashed on login')
+    parser.add_argument('--read-model', action='store_true',
+                        help='also build sena.desk_daily_availability for the generated days')
+    parser.add_argument('--json', help='also write the row counts to this file')
+    args = parser.parse_args(argv)
+
+    if not args.dsn:
+        parser.error('--dsn or BENCH_DATABASE_URL is required')
+    if parse_dsn(args.dsn).get('host') == PRODUCTION_HOST:
+        parser.error('refusing to drop the sena schema on the production host')
+
+    conn = psycopg2.connect(args.dsn)
+    started = time.perf_counter()
+    try:
+        counts = generate(
+            conn, cities=args.cities, buildings=args.buildings, desks=args.desks, floors=args.floors,
+            slots=args.slots, full_day=args.full_day, users=args.users, months=args.months,
+            days_ahead=args.days_ahead, occupancy=args.occupancy, cancel_rate=args.cancel_rate, seed=args.seed,
+            plaintext_passwords=args.plaintext_passwords
+        )
+        if args.read_model:
+            from app.utils import availability_read_model
+            today = date.today()
+            counts['desk_daily_availability'] = availability_read_model.rebuild(
+                conn, today - timedelta(days=30 * args.months), today + timedelta(days=args.days_ahead))
+    finally:
+        conn.close()
+
+    for table, count in counts.items():
+        print(f"{table:>24} {count:>10}")
+    print(f"generated in {time.perf_counter() - started:.1f}s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'datagen', 'config': vars(args), 'counts': counts}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""
+Load test of a running server: HTTP throughput and latency per endpoint, and
+how fast booking changes reach concurrent Socket.IO clients.
+
+Seed a throwaway database with benchmarks/datagen.py, start the app against
+it, then:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/loadtest.py --url http://localhost:5000 --concurrency 16 \\
+        --duration 15 --clients 200 --json results/before.json
+    python benchmarks/compare.py results/before.json results/after.json
+
+Scenarios (--scenarios picks a subset, run one after another):
+  desks        GET /api/desks, unfiltered and with city/limit/only_available filters
+  master-data  GET /api/master-data
+  login        POST /api/auth/login as random generated users
+  signup       POST /api/auth/signup with fresh e-mail addresses
+  socketio     --clients clients connect (today's desks arrive on connect),
+               then --bookings bookings are made for today over HTTP and the
+               time until each client receives the change is recorded
+
+Each HTTP scenario runs --concurrency workers with keep-alive sessions for
+--duration seconds. Results: requests, errors, throughput and p50/p95/p99
+latency in milliseconds.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timezone
+
+import requests
+import socketio
+
+from datagen import USER_PASSWORD
+
+HTTP_SCENARIOS = ('desks', 'master-data', 'login', 'signup')
+
+
+def summarize(samples_ms) -> dict:
+    """Mean and nearest-rank percentiles of latency samples in milliseconds."""
+    if not samples_ms:
+        return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    ordered = sorted(samples_ms)
+
+    def percentile(p):
+        return round(ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)], 2)
+
+    return {'mean': round(statistics.fmean(ordered), 2), 'p50': percentile(50), 'p95': percentile(95),
+            'p99': percentile(99), 'max': round(ordered[-1], 2)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+class HttpScenarios:
+    """One request per call; returns the response so the runner can time and check it."""
+
+    def __init__(self, url: str, users: int, cities: int):
+        self.url = url.rstrip('/')
+        self.users = users
+        self.cities = cities
+        self.run_id = uuid.uuid4().hex[:8]
+        self._signups = itertools.count(1)
+
+    def desks(self, session, rng):
+        params = rng.choice([{}, {'city': f'City {rng.randint(1, self.cities)}'}, {'limit': 50},
+                             {'only_available': 'true'}])
+        return session.get(f'{self.url}/api/desks', params=params), 200
+
+    def master_data(self, session, rng):
+        return session.get(f'{self.url}/api/master-data'), 200
+
+    def login(self, session, rng):
+        email = f'user{rng.randint(1, self.users)}@example.com'
+        return session.post(f'{self.url}/api/auth/login', json={'email': email, 'password': USER_PASSWORD}), 200
+
+    def signup(self, session, rng):
+        email = f'load-{self.run_id}-{next(self._signups)}@example.com'
+        return session.post(f'{self.url}/api/auth/signup', json={
+            'email': email, 'password': USER_PASSWORD, 'first_name': 'Load', 'last_name': 'Test'
+        }), 201
+
+
+def run_http(call, concurrency: int, duration: float, seed: int) -> dict:
+    latencies, statuses = [], Counter()
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        session = requests.Session()
+        local_latencies, local_statuses, local_errors = [], Counter(), 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response, expected = call(session, rng)
+                response.content
+            except requests.RequestException:
+                local_errors += 1
+                local_statuses['exception'] += 1
+                continue
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            local_statuses[str(response.status_code)] += 1
+            if response.status_code != expected:
+                local_errors += 1
+        session.close()
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    total = sum(statuses.values())
+    return {
+        'requests': total,
+        'errors': errors[0],
+        'error_rate': round(errors[0] / total, 4) if total else 0.0,
+        'throughput_rps': round(total / elapsed, 1),
+        'latency_ms': summarize(latencies),
+        'statuses': dict(statuses)
+    }
+
+
+class LoadClient:
+    """A Socket.IO client that notes when desk data for today reaches it."""
+
+    def __init__(self, url: str, protocol: str):
+        self.url = url
+        self.protocol = protocol
+        self.client = socketio.Client(reconnection=False)
+        self.first_update = threading.Event()
+        self.updated_at = None
+        self.lock = threading.Lock()
+        for event in ('desk_update', 'desk_snapshot', 'desk_delta'):
+            self.client.on(event, self._on_update)
+
+    def _on_update(self, data):
+        if not isinstance(data, dict) or data.get('date') != date.today().isoformat():
+            return
+        with self.lock:
+            if self.updated_at is None:
+                self.updated_at = time.perf_counter()
+        self.first_update.set()
+
+    def connect(self, timeout: float) -> bool:
+        """Connect and wait for today's desks; False if they did not arrive in time."""
+        self.client.connect(self.url, transports=['websocket'])
+        if not self.first_update.wait(timeout):
+            return False
+        if self.protocol == 'delta':
+            # Clients start on full lists; switch and wait for the delta snapshot
+            self.first_update.clear()
+            self.client.emit('subscribe_desks', {'dates': [date.today().isoformat()]})
+            if not self.first_update.wait(timeout):
+                return False
+        self.take_update()
+        return True
+
+    def take_update(self):
+        with self.lock:
+            updated_at, self.updated_at = self.updated_at, None
+        return updated_at
+
+
+def run_socketio(url: str, clients: int, bookings: int, protocol: str, timeout: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    session = requests.Session()
+    # A user to book as, and today's desks and slots to book
+    response = session.post(f'{url}/api/auth/login', json={'email': 'user1@example.com', 'password': USER_PASSWORD})
+    response.raise_for_status()
+    user_id = response.json()['user']['id']
+    desks = session.get(f'{url}/api/desks').json()['desks']
+    cells = [(desk['desk_id'], slot['slot_id']) for desk in desks for slot in desk['slots']
+             if slot['status'] == 'available']
+
+    load_clients = [LoadClient(url, protocol) for _ in range(clients)]
+    connect_ms, connected = [], []
+    lock = threading.Lock()
+
+    def connect(load_client):
+        started = time.perf_counter()
+        try:
+            ready = load_client.connect(timeout)
+        except socketio.exceptions.ConnectionError:
+            ready = False
+        with lock:
+            if ready:
+                connect_ms.append((time.perf_counter() - started) * 1000)
+                connected.append(load_client)
+
+    # Connect in waves of 50 so the test measures the server, not a thundering herd
+    for offset in range(0, clients, 50):
+        wave = [threading.Thread(target=connect, args=(c,)) for c in load_clients[offset:offset + 50]]
+        for thread in wave:
+            thread.start()
+        for thread in wave:
+            thread.join()
+
+    update_ms, missed, made = [], 0, 0
+    for _ in range(bookings):
+        if not cells:
+            break
+        desk_id, slot_id = cells.pop(rng.randrange(len(cells)))
+        for load_client in connected:
+            load_client.take_update()
+        sent = time.perf_counter()
+        response = session.post(f'{url}/api/bookings', json={
+            'user_id': user_id, 'desk_id': desk_id, 'slot_id': slot_id, 'date': date.today().isoformat()
+        })
+        if response.status_code != 201:
+            continue
+        made += 1
+        deadline = sent + timeout
+        pending = list(connected)
+        while pending and time.perf_counter() < deadline:
+            time.sleep(0.005)
+            still_pending = []
+            for load_client in pending:
+                updated_at = load_client.take_update()
+                if updated_at is None:
+                    still_pending.append(load_client)
+                else:
+                    update_ms.append((updated_at - sent) * 1000)
+            pending = still_pending
+        missed += len(pending)
+
+    for load_client in load_clients:
+        if load_client.client.connected:
+            load_client.client.disconnect()
+    session.close()
+    return {
+        'clients': clients,
+        'connected': len(connected),
+        'connect_errors': clients - len(connected),
+        'connect_ms': summarize(connect_ms),
+        'bookings': made,
+        'updates_received': len(update_ms),
+        'updates_missed': missed,
+        'update_ms': summarize(update_ms)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--scenarios', nargs='+', default=list(HTTP_SCENARIOS) + ['socketio'],
+                        choices=list(HTTP_SCENARIOS) + ['socketio'])
+    parser.add_argument('--concurrency', type=int, default=16, help='HTTP workers per scenario')
+    parser.add_argument('--duration', type=float, default=15, help='seconds per HTTP scenario')
+    parser.add_argument('--clients', type=int, default=100, help='concurrent Socket.IO clients')
+    parser.add_argument('--protocol', choices=['full', 'delta'], default='full',
+                        help='Socket.IO clients take full lists or versioned deltas')
+    parser.add_argument('--bookings', type=int, default=20, help='bookings whose broadcast is timed')
+    parser.add_argument('--update-timeout', type=float, default=10, help='seconds to wait for each broadcast')
+    parser.add_argument('--users', type=int, default=1000, help='users generated by datagen.py')
+    parser.add_argument('--cities', type=int, default=5, help='cities generated by datagen.py')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='', help='free text stored with the results, e.g. a branch name')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args(argv)
+
+    url = args.url.rstrip('/')
+    http = HttpScenarios(url, args.users, args.cities)
+    results = {}
+    print(f"{'scenario':>12} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for scenario in args.scenarios:
+        if scenario == 'socketio':
+            result = run_socketio(url, args.clients, args.bookings, args.protocol, args.update_timeout, args.seed)
+            results[scenario] = result
+            print(f"{'sio connect':>12} {result['connected']:>9} {result['connect_errors']:>7} {'':>8} "
+                  f"{result['connect_ms']['p50']!s:>8} {result['connect_ms']['p95']!s:>8} "
+                  f"{result['connect_ms']['p99']!s:>8}")
+            print(f"{'sio update':>12} {result['updates_received']:>9} {result['updates_missed']:>7} {'':>8} "
+                  f"{result['update_ms']['p50']!s:>8} {result['update_ms']['p95']!s:>8} "
+                  f"{result['update_ms']['p99']!s:>8}")
+            continue
+        result = run_http(getattr(http, scenario.replace('-', '_')), args.concurrency, args.duration, args.seed)
+        results[scenario] = result
+        latency = result['latency_ms']
+        print(f"{scenario:>12} {result['requests']:>9} {result['errors']:>7} {result['throughput_rps']:>8} "
+              f"{latency['p50']!s:>8} {latency['p95']!s:>8} {latency['p99']!s:>8}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'benchmark': 'load',
+                'label': args.label,
+                'commit': git_commit(),
+                'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'config': vars(args),
+                'scenarios': results
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
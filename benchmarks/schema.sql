@@ -0,0 +1,74 @@
+-- Minimal copy of the sena schema used by the app, for throwaway benchmark
+-- databases only. Column types follow what the queries in app/ rely on.
+
+CREATE SCHEMA IF NOT EXISTS sena;
+
+CREATE TABLE IF NOT EXISTS sena.locations (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sena.buildings (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    address TEXT,
+    amenities JSONB,
+    operating_hours TEXT,
+    location_id INTEGER REFERENCES sena.locations (id)
+);
+
+CREATE TABLE IF NOT EXISTS sena.desk_type_master (
+    id SERIAL PRIMARY KEY,
+    type TEXT NOT NULL,
+    capacity INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS sena.slot_master (
+    id SERIAL PRIMARY KEY,
+    slot_type TEXT NOT NULL,
+    start_time TIME,
+    end_time TIME,
+    time_zone TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sena.desks (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    floor_number INTEGER,
+    capacity INTEGER,
+    description TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    building_id INTEGER REFERENCES sena.buildings (id),
+    location_id INTEGER REFERENCES sena.locations (id),
+    desk_type_id INTEGER REFERENCES sena.desk_type_master (id)
+);
+
+CREATE TABLE IF NOT EXISTS sena.desk_pricing (
+    id SERIAL PRIMARY KEY,
+    desk_type_id INTEGER REFERENCES sena.desk_type_master (id),
+    slot_id INTEGER REFERENCES sena.slot_master (id),
+    price NUMERIC(10, 2),
+    is_active BOOLEAN NOT NULL DEFAULT true
+);
+
+CREATE TABLE IF NOT EXISTS sena.users (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    email TEXT UNIQUE NOT NULL,
+    first_name TEXT,
+    last_name TEXT,
+    phone TEXT,
+    password TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    updated_at TIMESTAMP NOT NULL DEFAULT now(),
+    is_active BOOLEAN NOT NULL DEFAULT true
+);
+
+CREATE TABLE IF NOT EXISTS sena.booking_transactions (
+    id BIGSERIAL PRIMARY KEY,
+    desk_id INTEGER REFERENCES sena.desks (id),
+    slot_id INTEGER REFERENCES sena.slot_master (id),
+    user_id UUID REFERENCES sena.users (id),
+    status TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
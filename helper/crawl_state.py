@@ -0,0 +1,55 @@
+"""
+Which job pages a crawl has finished, kept in SQLite so reruns skip them.
+
+A job is done once its row is written out (a description or
+DESCRIPTION_NOT_FOUND, since the page has none). Jobs whose page could not
+be loaded are recorded as failed and tried again by the next run. Delete the
+file to crawl everything again.
+"""
+import sqlite3
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url         TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    attempts    INTEGER NOT NULL DEFAULT 1,
+    updated_at  REAL NOT NULL
+)
+"""
+
+
+def job_key(url):
+    """A job URL without its query and fragment, which only track where it was listed."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+
+
+class CrawlState:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+        self.conn.commit()
+
+    def is_done(self, url):
+        row = self.conn.execute("SELECT 1 FROM jobs WHERE url = ? AND status = 'done'", (job_key(url),)).fetchone()
+        return row is not None
+
+    def mark(self, url, done):
+        """Record a job as done, or failed; committed at once so a crash loses nothing written out."""
+        self.conn.execute("""
+            INSERT INTO jobs (url, status, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                status = excluded.status, attempts = jobs.attempts + 1, updated_at = excluded.updated_at
+        """, (job_key(url), 'done' if done else 'failed', time.time()))
+        self.conn.commit()
+
+    def counts(self):
+        return dict(self.conn.execute("SELECT status, count(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        self.conn.close()
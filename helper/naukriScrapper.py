@@ -1,21 +1,141 @@
+"""
+Scrape Naukri job search results and each listing's job description to CSV.
+
+    python helper/naukriScrapper.py --workers 4 --output job_listings.csv
+
+Result pages are crawled one at a time, up to --pages, and each job is
+appended to --output as soon as its description is scraped, so memory stays
+flat however many pages there are. Scraped jobs are recorded in --state
+(SQLite): a rerun, or a run resumed after a crash, skips them and retries
+the ones that failed.
+
+Pages are fetched over plain HTTP first, --http-workers at a time on one
+pooled session, and the description is read from the served HTML: the
+description div, the JobPosting JSON-LD, or the page's embedded state. Only
+pages where none of those has it (or that could not be fetched) are loaded
+in headless Chrome, by a pool of --workers drivers started on first use;
+each is waited on until its description is present, with a per-URL
+--timeout and up to --retries retries. How many pages each path served, and
+how long they took, is printed at the end.
+
+Saved pages can be scraped instead of the live site: serve the directory
+holding them and pass the listing page's URL; relative job links resolve
+against it. Pages captured with --save-pages are replayed by
+helper/replay_server.py.
+
+    python -m http.server 8000 -d saved_pages
+    python helper/naukriScrapper.py --url http://localhost:8000/listing.html
+"""
+import argparse
+import csv
+import html
+import json
 import os
+import queue
+import sys
+import threading
 import time
-import csv
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import repeat
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options as ChromeOptions
-from bs4 import BeautifulSoup
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from urllib3.util.retry import Retry
+
+from crawl_state import CrawlState, job_key
+from replay_server import PageArchive
 
-# Set ChromeDriver path
-chrome_driver_path = "C:/Users/SudharsanDS/Downloads/chromedriver-win64/chromedriver-win64/chromedriver.exe"
-os.environ["CHROME_DRIVER_PATH"] = chrome_driver_path
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# ChromeDriver to use; when the path does not exist Selenium Manager finds one
+CHROME_DRIVER_PATH = os.getenv(
+    "CHROME_DRIVER_PATH", "C:/Users/SudharsanDS/Downloads/chromedriver-win64/chromedriver-win64/chromedriver.exe")
 
 BASE_URL = "https://www.naukri.com"
+SEARCH_URL = "https://www.naukri.com/developer-engineer-it-jobs-in-chennai?k=developer%2C%20engineer%2C%20it&l=chennai&nignbevent_src=jobsearchDeskGNB&experience=0&jobAge=1"
 
-def extract_job_details(page_source):
-    """Extract job details from the page source using BeautifulSoup."""
-    soup = BeautifulSoup(page_source, 'html.parser')
+LISTING_SELECTOR = "div.srp-jobtuple-wrapper"
+# The class carries a build hash (styles_JDC__dang-inner-html__h0K4t), so match its stable part
+DESCRIPTION_SELECTOR = "div[class*='JDC__dang-inner-html']"
+
+DESCRIPTION_NOT_FOUND = "Job description not found."
+
+# Sent with plain HTTP requests, so they look like the browser the pages are built for
+HTTP_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+# Keys of the jobDetails object, in the state a job page embeds for its scripts, that hold the description
+EMBEDDED_DESCRIPTION_KEYS = ("jobDescription", "description")
+
+
+def _class_xpath(tag, class_name):
+    """XPath for tag elements having class_name among their classes, as BeautifulSoup's class_ matches."""
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+if lxml_html is not None:
+    _JOB_TUPLES = etree.XPath("//" + _class_xpath('div', 'srp-jobtuple-wrapper'))
+    _TITLE = etree.XPath("(.//" + _class_xpath('a', 'title') + ")[1]")
+    _COMPANY = etree.XPath("(.//" + _class_xpath('a', 'comp-name') + ")[1]")
+    _SALARY = etree.XPath("(.//" + _class_xpath('span', 'sal-wrap') + ")[1]")
+    _LOCATION = etree.XPath("(.//" + _class_xpath('span', 'loc-wrap') + ")[1]")
+    _SKILLS = etree.XPath(".//" + _class_xpath('li', 'tag-li'))
+
+
+def _first_text(xpath, element):
+    found = xpath(element)
+    return found[0].text_content().strip() if found else None
+
+
+def _extract_job_details_lxml(page_source, base_url):
+    jobs = []
+    for job in _JOB_TUPLES(lxml_html.fromstring(page_source)):
+        try:
+            title_tag = _TITLE(job)
+            title = title_tag[0].text_content().strip() if title_tag else None
+            job_url = title_tag[0].attrib['href'] if title_tag else None
+            if job_url and not job_url.startswith("http"):
+                job_url = urljoin(base_url, job_url)
+
+            salary = _first_text(_SALARY, job)
+            jobs.append({
+                'title': title,
+                'company': _first_text(_COMPANY, job),
+                'salary': salary if salary is not None else "Not Disclosed",
+                'location': _first_text(_LOCATION, job),
+                'skills': [skill.text_content() for skill in _SKILLS(job)],
+                'url': job_url
+            })
+        except Exception as e:
+            print(f"Error extracting job details: {e}")
+    return jobs
+
+
+def extract_job_details_soup(page_source, base_url=BASE_URL, only_listings=True):
+    """
+    Extract job details from the page source using BeautifulSoup. With
+    only_listings, only the job tuples are built into the tree.
+    """
+    parse_only = SoupStrainer('div', class_='srp-jobtuple-wrapper') if only_listings else None
+    soup = BeautifulSoup(page_source, 'html.parser', parse_only=parse_only)
     jobs = []
 
     job_wrappers = soup.find_all('div', class_='srp-jobtuple-wrapper')
@@ -25,26 +145,26 @@ def extract_job_details(page_source):
             title_tag = job.find('a', class_='title')
             title = title_tag.text.strip() if title_tag else None
             job_url = title_tag['href'] if title_tag else None
-            
+
             # Convert relative URLs to absolute URLs
             if job_url and not job_url.startswith("http"):
-                job_url = BASE_URL + job_url
-            
+                job_url = urljoin(base_url, job_url)
+
             # Extract company name
             company_tag = job.find('a', class_='comp-name')
             company = company_tag.text.strip() if company_tag else None
-            
+
             # Extract salary
             salary_tag = job.find('span', class_='sal-wrap')
             salary = salary_tag.text.strip() if salary_tag else "Not Disclosed"
-            
+
             # Extract location
             location_tag = job.find('span', class_='loc-wrap')
             location = location_tag.text.strip() if location_tag else None
-            
+
             # Extract skills
             skills = [skill.text for skill in job.find_all('li', class_='tag-li')]
-            
+
             # Add job details to list
             jobs.append({
                 'title': title,
@@ -56,76 +176,528 @@ def extract_job_details(page_source):
             })
         except Exception as e:
             print(f"Error extracting job details: {e}")
-    
+
     return jobs
 
 
-def scrape_job_description(driver, url):
-    """Scrape job description from the job detail page."""
+def extract_job_details(page_source, base_url=BASE_URL):
+    """
+    Job details of every listing on a search results page. Parsed with lxml
+    and compiled XPath when it is installed, else with BeautifulSoup building
+    only the job tuples; both give the same dicts.
+    """
+    if lxml_html is not None and page_source.strip():
+        try:
+            return _extract_job_details_lxml(page_source, base_url)
+        except (ValueError, etree.ParserError):
+            # e.g. a str page with an XML encoding declaration
+            pass
+    return extract_job_details_soup(page_source, base_url)
+
+
+def _parse_saved_page(path, base_url):
+    with open(path, encoding='utf-8') as f:
+        return path, extract_job_details(f.read(), base_url)
+
+
+def parse_saved_pages(paths, base_url=BASE_URL, workers=None, chunksize=4):
+    """
+    (path, jobs) for each saved listing page, in order, parsed on a pool of
+    `workers` processes (one per CPU by default).
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_parse_saved_page, paths, repeat(base_url), chunksize=chunksize)
+
+
+def _html_to_text(fragment):
+    return BeautifulSoup(html.unescape(fragment), 'html.parser').get_text(separator="\n").strip()
+
+
+def _json_ld_description(soup):
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except ValueError:
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and item.get('@type') == 'JobPosting' and item.get('description'):
+                return _html_to_text(item['description'])
+    return None
+
+
+def _find_key(value, key):
+    """The first value stored under key at any depth of a JSON value, or None."""
+    if isinstance(value, dict):
+        if key in value:
+            return value[key]
+        value = list(value.values())
+    if isinstance(value, list):
+        for item in value:
+            found = _find_key(item, key)
+            if found is not None:
+                return found
+    return None
+
+
+def _embedded_state_description(soup):
+    decoder = json.JSONDecoder()
+    for script in soup.find_all('script'):
+        text = script.string or ''
+        if script.get('type') == 'application/ld+json' or '"jobDetails"' not in text:
+            continue
+        # window._initialState = {...}; or a JSON script element
+        start = text.find('{')
+        while start != -1:
+            try:
+                state, end = decoder.raw_decode(text, start)
+            except ValueError:
+                start = text.find('{', start + 1)
+                continue
+            details = _find_key(state, 'jobDetails')
+            if isinstance(details, dict):
+                for key in EMBEDDED_DESCRIPTION_KEYS:
+                    if isinstance(details.get(key), str) and details[key].strip():
+                        return _html_to_text(details[key])
+            start = text.find('{', end)
+    return None
+
+
+def extract_job_description(page_source):
+    """
+    Job description text from a job detail page, or None if it has none.
+    Reads the rendered description div, else the JobPosting JSON-LD, else the
+    page's embedded state, so served HTML often has it without rendering.
+    """
+    soup = BeautifulSoup(page_source, 'html.parser')
+    job_description = soup.select_one(DESCRIPTION_SELECTOR)
+    if job_description:
+        return job_description.get_text(separator="\n").strip()
+    return _json_ld_description(soup) or _embedded_state_description(soup)
+
+
+class HttpFetcher:
+    """
+    Pages over plain HTTP on one session, keeping up to `workers` connections
+    per host alive. 429 and 5xx responses are retried with backoff.
+    """
+
+    def __init__(self, workers=16, timeout=10, retries=2):
+        self.workers = workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HTTP_HEADERS)
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url):
+        """The page's HTML, or None if it could not be fetched."""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+            print(f"Error fetching {url}: HTTP {response.status_code}")
+            return None
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+
+class PathStats:
+    """Pages each path (http, browser) was tried on, how many had the description, and the time taken."""
+
+    PATHS = ('http', 'browser')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tried = Counter()
+        self.found = Counter()
+        self.seconds = Counter()
+        self.missing = 0
+
+    def record(self, path, found, seconds):
+        with self._lock:
+            self.tried[path] += 1
+            self.found[path] += found
+            self.seconds[path] += seconds
+
+    def report(self):
+        lines = [f"{'path':>8} {'tried':>6} {'found':>6} {'hit rate':>9} {'mean ms':>8}"]
+        for path in self.PATHS:
+            tried = self.tried[path]
+            hit_rate = self.found[path] / tried if tried else 0
+            mean = self.seconds[path] / tried * 1000 if tried else 0
+            lines.append(f"{path:>8} {tried:>6} {self.found[path]:>6} {hit_rate:>9.1%} {mean:>8.0f}")
+        lines.append(f"{self.missing} pages without a description")
+        return "\n".join(lines)
+
+
+def create_driver(headless=True, driver_path=CHROME_DRIVER_PATH, page_load_timeout=30):
+    chrome_options = ChromeOptions()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1366,900")
+    service = ChromeService(executable_path=driver_path) if os.path.exists(driver_path) else ChromeService()
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.set_page_load_timeout(page_load_timeout)
+    return driver
+
+
+class DriverPool:
+    """
+    At most `size` Chrome drivers, started on first use and shared by the
+    scraping threads. A driver that fails is quit, and a new one is started
+    the next time one is needed.
+    """
+
+    def __init__(self, size, factory=create_driver):
+        self.size = size
+        self.factory = factory
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    @contextmanager
+    def driver(self):
+        with self._slots:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self.factory()
+            healthy = True
+            try:
+                yield driver
+            except WebDriverException as e:
+                # A page that timed out leaves the driver usable; anything else may not
+                healthy = isinstance(e, TimeoutException)
+                raise
+            finally:
+                if healthy:
+                    self._idle.put(driver)
+                else:
+                    self._quit(driver)
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def load_listing_page(driver, url, timeout=20):
+    """Open the search results page and wait until the listings are rendered."""
+    driver.get(url)
     try:
-        driver.get(url)
-        time.sleep(3)
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        job_description = soup.find('div', class_='styles_JDC__dang-inner-html__h0K4t')
-        if job_description:
-            return job_description.get_text(separator="\n").strip()
-        else:
-            return "Job description not found."
-    except Exception as e:
-        print(f"Error scraping job description: {e}")
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.CSS_SELECTOR, LISTING_SELECTOR)))
+    except TimeoutException:
+        print(f"No job listings appeared on {url} within {timeout}s")
+    return driver.page_source
+
+
+class _DescriptionOrSettled:
+    """
+    Wait condition: the description is rendered, or the document finished
+    loading `grace` seconds ago and it still is not (the page has none).
+    """
+
+    def __init__(self, grace):
+        self.grace = grace
+        self._loaded_at = None
+
+    def __call__(self, driver):
+        if driver.find_elements(By.CSS_SELECTOR, DESCRIPTION_SELECTOR):
+            return True
+        if self._loaded_at is None:
+            if driver.execute_script("return document.readyState") == "complete":
+                self._loaded_at = time.monotonic()
+            return False
+        return time.monotonic() - self._loaded_at >= self.grace
+
+
+def scrape_job_description(driver, url, timeout=20, grace=2):
+    """
+    Scrape job description from the job detail page once it is rendered.
+    Raises TimeoutException if the page neither shows a description nor
+    finishes loading within timeout seconds.
+    """
+    driver.get(url)
+    WebDriverWait(driver, timeout, poll_frequency=0.1).until(_DescriptionOrSettled(grace))
+    description = extract_job_description(driver.page_source)
+    return description if description is not None else DESCRIPTION_NOT_FOUND
+
+
+def fetch_description(pool, url, timeout=20, retries=2, backoff=1.0, archive=None):
+    """A job's description, retrying failed loads; None once every attempt failed."""
+    for attempt in range(retries + 1):
+        try:
+            with pool.driver() as driver:
+                description = scrape_job_description(driver, url, timeout)
+                if archive is not None:
+                    archive.save(url, driver.page_source)
+                return description
+        except Exception as e:
+            if attempt == retries:
+                print(f"Error scraping job description from {url}: {e}")
+                return None
+            time.sleep(backoff * 2 ** attempt)
+
+
+def fetch_description_http(fetcher, url, archive=None):
+    """
+    A job's description from the served page; None if the page could not be
+    fetched, DESCRIPTION_NOT_FOUND if it was but has no description in it.
+    """
+    page_source = fetcher.get(url)
+    if page_source is None:
         return None
+    if archive is not None:
+        archive.save(url, page_source)
+    description = extract_job_description(page_source)
+    return description if description is not None else DESCRIPTION_NOT_FOUND
+
+
+def _fetch_pass(jobs, path, fetch, workers, stats, on_job=None, last=False):
+    """
+    Run fetch(url) for the jobs, workers at a time, and return the jobs it
+    found no description for. on_job(job) is called, on this thread, for each
+    job as soon as it has a description, or as soon as it is fetched when this
+    is the last pass.
+    """
+    def timed(url):
+        started = time.perf_counter()
+        description = fetch(url)
+        stats.record(path, description not in (None, DESCRIPTION_NOT_FOUND), time.perf_counter() - started)
+        return description
+
+    missing = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(timed, job['url']): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            job['description'] = future.result()
+            found = job['description'] not in (None, DESCRIPTION_NOT_FOUND)
+            if not found:
+                missing.append(job)
+            if on_job is not None and (found or last):
+                on_job(job)
+    return missing
+
+
+def fetch_descriptions(jobs, pool, timeout=20, retries=2, fetcher=None, stats=None, archive=None, on_job=None):
+    """
+    Fill in job['description'] for every job: over HTTP first when a fetcher
+    is given, fetcher.workers pages at a time, then in the browser for the
+    pages that did not have it, pool.size at a time. With pool None the
+    browser is not used. on_job(job) is called for each job once its
+    description is final; it is None if the page could not be loaded.
+    """
+    stats = stats if stats is not None else PathStats()
+    pending = []
+    for job in jobs:
+        if job['url']:
+            pending.append(job)
+        else:
+            job['description'] = "URL not available"
+            if on_job is not None:
+                on_job(job)
+
+    passes = []
+    if fetcher is not None:
+        passes.append(('http', lambda url: fetch_description_http(fetcher, url, archive), fetcher.workers))
+    if pool is not None:
+        passes.append(('browser', lambda url: fetch_description(pool, url, timeout, retries, archive=archive),
+                       pool.size))
+    for i, (path, fetch, workers) in enumerate(passes):
+        if not pending:
+            break
+        pending = _fetch_pass(pending, path, fetch, workers, stats, on_job, last=i == len(passes) - 1)
+    stats.missing += len(pending)
+    return stats
+
+
+CSV_FIELDS = ["Title", "Company", "Salary", "Location", "Skills", "URL", "Description"]
+
+
+def _csv_row(job):
+    return {
+        "Title": job['title'],
+        "Company": job['company'],
+        "Salary": job['salary'],
+        "Location": job['location'],
+        "Skills": ', '.join(job['skills']),
+        "URL": job['url'],
+        "Description": job.get('description', "N/A")
+    }
+
+
+class CsvSink:
+    """
+    Job rows appended to a CSV file as they are scraped, flushed one by one
+    so a crash loses none that were written. The header is written only to
+    an empty file, so a resumed crawl continues the same file.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.rows = 0
+        self._file = open(filename, mode='a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+
+    def write(self, job):
+        self._writer.writerow(_csv_row(job))
+        self._file.flush()
+        self.rows += 1
+
+    def close(self):
+        self._file.close()
 
 
 def save_to_csv(jobs, filename):
     """Save job details to a CSV file."""
     try:
         with open(filename, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=["Title", "Company", "Salary", "Location", "Skills", "URL", "Description"])
+            writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
             writer.writeheader()
             for job in jobs:
-                writer.writerow({
-                    "Title": job['title'],
-                    "Company": job['company'],
-                    "Salary": job['salary'],
-                    "Location": job['location'],
-                    "Skills": ', '.join(job['skills']),
-                    "URL": job['url'],
-                    "Description": job.get('description', "N/A")
-                })
+                writer.writerow(_csv_row(job))
         print(f"Job details saved to {filename}")
     except Exception as e:
         print(f"Error saving to CSV: {e}")
 
 
-# Selenium setup
-chrome_options = ChromeOptions()
-# chrome_options.add_argument("--headless")  # Optional: Run in headless mode
-service = ChromeService(executable_path=chrome_driver_path)
-driver = webdriver.Chrome(service=service, options=chrome_options)
+def results_page_url(url, page):
+    """
+    The URL of a later page of search results. Naukri numbers them with a
+    suffix on the last path segment (/python-jobs-in-chennai-2?k=...); for a
+    saved page the number goes before the extension (listing-2.html).
+    """
+    if page == 1:
+        return url
+    parts = urlsplit(url)
+    head, _, segment = parts.path.rpartition('/')
+    stem, dot, extension = segment.rpartition('.') if '.' in segment else (segment, '', '')
+    return urlunsplit(parts._replace(path=f"{head}/{stem}-{page}{dot}{extension}"))
+
+
+def load_listings(url, fetcher, pool, timeout=20, archive=None):
+    """The jobs on the search results page, served over HTTP if it lists them, else rendered."""
+    if fetcher is not None:
+        page_source = fetcher.get(url)
+        jobs = extract_job_details(page_source, base_url=url) if page_source else []
+        if jobs or pool is None:
+            if archive is not None and page_source:
+                archive.save(url, page_source)
+            return jobs
+        print("The served listing page has no jobs; loading it in the browser")
+    with pool.driver() as driver:
+        page_source = load_listing_page(driver, url, timeout)
+    if archive is not None:
+        archive.save(url, page_source)
+    return extract_job_details(page_source, base_url=url)
 
-try:
-    # URL to scrape
-    url = "https://www.naukri.com/developer-engineer-it-jobs-in-chennai?k=developer%2C%20engineer%2C%20it&l=chennai&nignbevent_src=jobsearchDeskGNB&experience=0&jobAge=1"
-    print(f"Loading page: {url}")
-    driver.get(url)
-    time.sleep(5)  # Wait for page to load
 
-    # Extract job details from the main page
-    page_source = driver.page_source
-    job_listings = extract_job_details(page_source)
+def crawl(url, fetcher, pool, state, sink, max_pages=50, timeout=20, retries=2, stats=None, archive=None):
+    """
+    Scrape result pages 1..max_pages of a search, one page of jobs at a
+    time, writing each job to sink once scraped and skipping jobs state has
+    as done. Stops early at a page that lists no jobs not on the one before
+    (past the last page the site repeats it or lists none).
+    """
+    stats = stats if stats is not None else PathStats()
 
-    # Scrape each job's description
-    for job in job_listings:
+    def on_job(job):
+        done = job['description'] is not None
+        if done:
+            sink.write(job)
         if job['url']:
-            description = scrape_job_description(driver, job['url'])
-            job['description'] = description
-        else:
-            job['description'] = "URL not available"
+            state.mark(job['url'], done)
+
+    previous = set()
+    for page in range(1, max_pages + 1):
+        page_url = results_page_url(url, page)
+        print(f"Loading page {page}: {page_url}")
+        jobs = load_listings(page_url, fetcher, pool, timeout, archive)
+        listed = {job_key(job['url']) for job in jobs if job['url']}
+        if not listed - previous:
+            print(f"No new jobs on page {page}; stopping")
+            break
+        previous = listed
+
+        todo, seen = [], set()
+        for job in jobs:
+            key = job_key(job['url']) if job['url'] else None
+            if key is not None and (key in seen or state.is_done(job['url'])):
+                continue
+            seen.add(key)
+            todo.append(job)
+        print(f"Page {page}: {len(jobs)} jobs, {len(jobs) - len(todo)} already scraped")
+        fetch_descriptions(todo, pool, timeout, retries, fetcher, stats, archive, on_job)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=SEARCH_URL, help='first page of job search results')
+    parser.add_argument('--pages', type=int, default=50, help='most result pages to crawl')
+    parser.add_argument('--output', default='job_listings.csv', help='CSV file jobs are appended to')
+    parser.add_argument('--state', default='naukri_crawl.sqlite',
+                        help='SQLite file recording scraped jobs; delete it to scrape them again')
+    parser.add_argument('--http-workers', type=int, default=16, help='job pages fetched over HTTP at once')
+    parser.add_argument('--workers', type=int, default=4, help='Chrome drivers loading job pages at once')
+    parser.add_argument('--timeout', type=float, default=20, help='seconds to wait for each page')
+    parser.add_argument('--retries', type=int, default=2, help='retries per job page')
+    parser.add_argument('--no-http', dest='http', action='store_false', help='load every page in the browser')
+    parser.add_argument('--no-browser', dest='browser', action='store_false',
+                        help='only fetch over HTTP; pages without the description in them get none')
+    parser.add_argument('--save-pages', metavar='DIR', help='save every page fetched, for helper/replay_server.py')
+    parser.add_argument('--show-browser', dest='headless', action='store_false', help='run Chrome with a window')
+    parser.add_argument('--driver-path', default=CHROME_DRIVER_PATH)
+    args = parser.parse_args(argv)
+    if not (args.http or args.browser):
+        parser.error("--no-http and --no-browser leave nothing to fetch pages with")
+
+    fetcher = HttpFetcher(max(args.http_workers, 1), args.timeout, args.retries) if args.http else None
+    pool = DriverPool(max(args.workers, 1),
+                      lambda: create_driver(args.headless, args.driver_path, page_load_timeout=args.timeout)
+                      ) if args.browser else None
+    archive = PageArchive(args.save_pages) if args.save_pages else None
+    state = CrawlState(args.state)
+    sink = CsvSink(args.output)
+    stats = PathStats()
+    started = time.perf_counter()
+    try:
+        crawl(args.url, fetcher, pool, state, sink, args.pages, args.timeout, args.retries, stats, archive)
+    finally:
+        # Close the drivers, connections and files
+        if pool is not None:
+            pool.close()
+        if fetcher is not None:
+            fetcher.close()
+        sink.close()
+        counts = state.counts()
+        state.close()
+    elapsed = time.perf_counter() - started
+    print(stats.report())
+    print(f"Wrote {sink.rows} jobs to {args.output} in {elapsed:.1f}s "
+          f"({elapsed / max(sink.rows, 1) * 1000:.0f} ms per listing); "
+          f"{counts.get('done', 0)} done and {counts.get('failed', 0)} to retry in {args.state}")
+    return 0
 
-    # Save to CSV
-    save_to_csv(job_listings, "job_listings.csv")
 
-finally:
-    # Close the driver
-    driver.quit()
+if __name__ == '__main__':
+    sys.exit(main())
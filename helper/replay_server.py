@@ -0,0 +1,125 @@
+"""
+Replay captured Naukri pages over HTTP, to run the scraper offline.
+
+    python helper/naukriScrapper.py --save-pages captured/      # once, live
+    python helper/replay_server.py captured/ --port 8765 --delay 0.2
+    python helper/naukriScrapper.py --url "http://127.0.0.1:8765/<search path>?<query>"
+
+Pages are found by the path and query they were captured from, whatever the
+host. Links to the captured site inside them are rewritten to the replay
+server, so job pages are requested from it too. --delay adds latency to
+every response, like a remote server would.
+
+A page is stored as the scraper saw it: the served HTML when it was fetched
+over HTTP, the rendered DOM when it needed the browser.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def _path_and_query(url):
+    parts = urlsplit(url)
+    return (parts.path or '/') + ('?' + parts.query if parts.query else '')
+
+
+class PageArchive:
+    """Captured pages in a directory: one file per URL plus index.json mapping URLs to files."""
+
+    INDEX = 'index.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._index = {}
+        index_path = os.path.join(directory, self.INDEX)
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as f:
+                self._index = json.load(f)
+        self._by_path = {_path_and_query(url): filename for url, filename in self._index.items()}
+
+    def save(self, url, html):
+        filename = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16] + '.html'
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), 'w', encoding='utf-8') as f:
+            f.write(html)
+        with self._lock:
+            self._index[url] = filename
+            self._by_path[_path_and_query(url)] = filename
+            temporary = os.path.join(self.directory, self.INDEX + '.tmp')
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=1, sort_keys=True)
+            os.replace(temporary, os.path.join(self.directory, self.INDEX))
+
+    def lookup(self, path_and_query):
+        """The captured HTML for a request path (with query), or None."""
+        filename = self._by_path.get(path_and_query)
+        if filename is None:
+            return None
+        with open(os.path.join(self.directory, filename), encoding='utf-8') as f:
+            return f.read()
+
+    def origins(self):
+        return sorted({'{0.scheme}://{0.netloc}'.format(urlsplit(url)) for url in self._index})
+
+    def __len__(self):
+        return len(self._index)
+
+
+def make_handler(archive, delay=0.0):
+    origins = archive.origins()
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            html = archive.lookup(self.path)
+            if html is None:
+                self._send(404, b'Not captured')
+                return
+            base = f'http://{self.headers.get("Host") or "%s:%d" % self.server.server_address[:2]}'
+            for origin in origins:
+                html = html.replace(origin, base)
+            self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+
+        def _send(self, status, body, content_type='text/plain; charset=utf-8'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory', help='pages saved with naukriScrapper.py --save-pages')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds added to every response')
+    args = parser.parse_args(argv)
+
+    archive = PageArchive(args.directory)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(archive, args.delay))
+    print(f"Replaying {len(archive)} pages on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,37 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
+from app.utils.logging_utils import configure_logging
+from app.utils import metrics
+from app.utils.instrumentation import instrument_app, record_request_exception
+from app.utils.session_tokens import start_revocation_sync
 from app.routes.auth_routes import auth_bp
 from app.routes.signup_routes import signup_bp
-from app.routes.master_data_routes import master_data_bp
-from app.routes.desk_routes import desk_bp, socketio
+from app.routes.master_data_routes import master_data_bp, start_cache_invalidation
+from app.routes.desk_routes import desk_bp, socketio, start_cluster
+from app.routes.health_routes import health_bp
+from app.routes.booking_routes import booking_bp
 from werkzeug.exceptions import HTTPException
 
+configure_logging()
+
 app = Flask(__name__)
 CORS(app)
+if metrics.enabled():
+    instrument_app(app)
 
 # Register blueprints
 app.register_blueprint(auth_bp)
 app.register_blueprint(signup_bp)
 app.register_blueprint(master_data_bp)
 app.register_blueprint(desk_bp)
+app.register_blueprint(health_bp)
+app.register_blueprint(booking_bp)
 
 # Initialize SocketIO
 socketio.init_app(app, cors_allowed_origins="*")
+start_cluster()
+start_revocation_sync()
+start_cache_invalidation()
 
 # Error handlers
 @app.errorhandler(HTTPException)
@@ -29,6 +44,8 @@ def handle_exception(e):
 
 @app.errorhandler(Exception)
 def handle_unexpected_error(e):
+    record_request_exception()
+    app.logger.exception("Unhandled error: %s", e)
     response = {
         "error": "An unexpected error occurred",
         "status_code": 500
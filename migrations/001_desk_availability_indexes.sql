@@ -0,0 +1,17 @@
+-- Indexes backing DeskData.get_desk_availability.
+--
+-- Bookings for a day are looked up with a half-open range on updated_at;
+-- desk_id, slot_id and status are carried in the index so the lookup never
+-- touches the heap. Active prices are probed by (desk_type_id, slot_id).
+--
+-- On a busy production table build these by hand with CREATE INDEX
+-- CONCURRENTLY first; the IF NOT EXISTS guards make this file a no-op then.
+
+CREATE INDEX IF NOT EXISTS idx_booking_transactions_updated_at
+    ON sena.booking_transactions (updated_at, desk_id, slot_id)
+    INCLUDE (status);
+
+CREATE INDEX IF NOT EXISTS idx_desk_pricing_active_type_slot
+    ON sena.desk_pricing (desk_type_id, slot_id)
+    INCLUDE (price)
+    WHERE is_active = true;
@@ -0,0 +1,51 @@
+-- NOTIFY desk_changes whenever something that feeds desk availability changes.
+--
+-- Payload: {"table": ..., "desk_id": <id or null>, "date": <YYYY-MM-DD or null>}
+-- A null desk_id means every desk, a null date means every date. Postgres
+-- folds identical payloads raised within one transaction into one.
+
+CREATE OR REPLACE FUNCTION sena.notify_desk_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'booking_transactions' THEN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', OLD.desk_id, 'date', OLD.updated_at::date)::text);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', NEW.desk_id, 'date', NEW.updated_at::date)::text);
+        END IF;
+    ELSIF TG_TABLE_NAME = 'desks' THEN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', OLD.id, 'date', NULL)::text);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', NEW.id, 'date', NULL)::text);
+        END IF;
+    ELSE
+        -- Price changes apply to every desk of a type; they are rare, so
+        -- signal a full refresh once per statement.
+        PERFORM pg_notify('desk_changes', json_build_object(
+            'table', TG_TABLE_NAME, 'desk_id', NULL, 'date', NULL)::text);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS booking_transactions_notify_desk_change ON sena.booking_transactions;
+CREATE TRIGGER booking_transactions_notify_desk_change
+    AFTER INSERT OR UPDATE OR DELETE ON sena.booking_transactions
+    FOR EACH ROW EXECUTE FUNCTION sena.notify_desk_change();
+
+DROP TRIGGER IF EXISTS desks_notify_desk_change ON sena.desks;
+CREATE TRIGGER desks_notify_desk_change
+    AFTER INSERT OR UPDATE OR DELETE ON sena.desks
+    FOR EACH ROW EXECUTE FUNCTION sena.notify_desk_change();
+
+DROP TRIGGER IF EXISTS desk_pricing_notify_desk_change ON sena.desk_pricing;
+CREATE TRIGGER desk_pricing_notify_desk_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sena.desk_pricing
+    FOR EACH STATEMENT EXECUTE FUNCTION sena.notify_desk_change();
@@ -0,0 +1,6 @@
+-- Per-desk booking lookups for filtered / paginated desk availability:
+-- the only_available check probes one desk and one day at a time.
+
+CREATE INDEX IF NOT EXISTS idx_booking_transactions_desk_updated_at
+    ON sena.booking_transactions (desk_id, updated_at)
+    INCLUDE (slot_id, status);
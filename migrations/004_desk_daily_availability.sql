@@ -0,0 +1,157 @@
+-- Materialized desk x date x slot availability (read model).
+--
+-- sena.desk_availability_days lists the dates that are materialized;
+-- sena.desk_daily_availability holds one row per desk, slot and such date
+-- with the status and active price DeskData would derive live. Triggers keep
+-- it current as bookings, desks, pricing and slots change; a window of dates
+-- is (re)built in bulk with sena.rebuild_desk_daily_availability, usually via
+-- python -m app.utils.availability_read_model.
+--
+-- Locking: booking changes take a shared lock on the read model plus an
+-- exclusive lock per (desk, date); desk, pricing and slot changes take the
+-- read model lock exclusively. Every recompute therefore runs after the
+-- writes it could race with have committed and sees them.
+
+CREATE TABLE IF NOT EXISTS sena.desk_availability_days (
+    day DATE PRIMARY KEY,
+    built_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS sena.desk_daily_availability (
+    desk_id INTEGER NOT NULL REFERENCES sena.desks (id) ON DELETE CASCADE,
+    day DATE NOT NULL REFERENCES sena.desk_availability_days (day) ON DELETE CASCADE,
+    slot_id INTEGER NOT NULL REFERENCES sena.slot_master (id) ON DELETE CASCADE,
+    status TEXT NOT NULL,
+    price NUMERIC,
+    PRIMARY KEY (day, desk_id, slot_id)
+);
+
+-- The live derivation for every materialized date. The latest booking of a
+-- desk/slot on a date wins, as in DeskData; with several active prices for
+-- a desk type and slot the newest one is used.
+CREATE OR REPLACE VIEW sena.desk_daily_availability_source AS
+SELECT
+    d.id AS desk_id,
+    c.day,
+    sm.id AS slot_id,
+    COALESCE(bk.status, 'available') AS status,
+    dp.price
+FROM sena.desk_availability_days AS c
+CROSS JOIN sena.desks AS d
+CROSS JOIN sena.slot_master AS sm
+LEFT JOIN LATERAL (
+    SELECT bt.status
+    FROM sena.booking_transactions AS bt
+    WHERE bt.desk_id = d.id
+        AND bt.slot_id = sm.id
+        AND bt.updated_at >= c.day
+        AND bt.updated_at < c.day + 1
+    ORDER BY bt.updated_at DESC
+    LIMIT 1
+) AS bk ON true
+LEFT JOIN LATERAL (
+    SELECT p.price
+    FROM sena.desk_pricing AS p
+    WHERE p.desk_type_id = d.desk_type_id
+        AND p.slot_id = sm.id
+        AND p.is_active = true
+    ORDER BY p.id DESC
+    LIMIT 1
+) AS dp ON true;
+
+-- Recompute materialized rows for dates in [p_from, p_to], optionally only
+-- for some desks. Rows whose value is unchanged are not rewritten.
+CREATE OR REPLACE FUNCTION sena.refresh_desk_daily_availability(
+    p_from DATE,
+    p_to DATE,
+    p_desk_ids INTEGER[] DEFAULT NULL
+) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    changed INTEGER;
+BEGIN
+    INSERT INTO sena.desk_daily_availability AS a (desk_id, day, slot_id, status, price)
+    SELECT s.desk_id, s.day, s.slot_id, s.status, s.price
+    FROM sena.desk_daily_availability_source AS s
+    WHERE s.day BETWEEN p_from AND p_to
+        AND (p_desk_ids IS NULL OR s.desk_id = ANY(p_desk_ids))
+    ON CONFLICT (day, desk_id, slot_id) DO UPDATE
+        SET status = EXCLUDED.status, price = EXCLUDED.price
+        WHERE (a.status, a.price) IS DISTINCT FROM (EXCLUDED.status, EXCLUDED.price);
+    GET DIAGNOSTICS changed = ROW_COUNT;
+    RETURN changed;
+END
+$$;
+
+-- Materialize every date in [p_from, p_to] (adding dates that are missing)
+-- and rebuild their rows from the source tables.
+CREATE OR REPLACE FUNCTION sena.rebuild_desk_daily_availability(p_from DATE, p_to DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('sena.desk_daily_availability'));
+    INSERT INTO sena.desk_availability_days (day)
+    SELECT generate_series(p_from, p_to, interval '1 day')::date
+    ON CONFLICT (day) DO UPDATE SET built_at = now();
+    RETURN sena.refresh_desk_daily_availability(p_from, p_to);
+END
+$$;
+
+CREATE OR REPLACE FUNCTION sena.maintain_desk_daily_availability() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    cells RECORD;
+BEGIN
+    IF TG_TABLE_NAME = 'booking_transactions' THEN
+        PERFORM pg_advisory_xact_lock_shared(hashtext('sena.desk_daily_availability'));
+        FOR cells IN
+            SELECT DISTINCT v.desk_id, v.day
+            FROM (VALUES
+                (CASE WHEN TG_OP <> 'INSERT' THEN OLD.desk_id END, CASE WHEN TG_OP <> 'INSERT' THEN OLD.updated_at::date END),
+                (CASE WHEN TG_OP <> 'DELETE' THEN NEW.desk_id END, CASE WHEN TG_OP <> 'DELETE' THEN NEW.updated_at::date END)
+            ) AS v (desk_id, day)
+            JOIN sena.desk_availability_days AS c ON c.day = v.day
+            WHERE v.desk_id IS NOT NULL
+            ORDER BY v.desk_id, v.day
+        LOOP
+            -- Statements after the lock see bookings committed while waiting
+            PERFORM pg_advisory_xact_lock(cells.desk_id, cells.day - DATE '2000-01-01');
+            PERFORM sena.refresh_desk_daily_availability(cells.day, cells.day, ARRAY[cells.desk_id]);
+        END LOOP;
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('sena.desk_daily_availability'));
+    IF TG_TABLE_NAME = 'desks' AND TG_LEVEL = 'ROW' THEN
+        -- Deleted desks drop out through the foreign key
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM sena.refresh_desk_daily_availability('-infinity', 'infinity', ARRAY[NEW.id]);
+        END IF;
+    ELSE
+        -- Pricing and slot changes affect every desk of a type; rare, so
+        -- recompute everything once per statement
+        PERFORM sena.refresh_desk_daily_availability('-infinity', 'infinity');
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS booking_transactions_maintain_availability ON sena.booking_transactions;
+CREATE TRIGGER booking_transactions_maintain_availability
+    AFTER INSERT OR UPDATE OR DELETE ON sena.booking_transactions
+    FOR EACH ROW EXECUTE FUNCTION sena.maintain_desk_daily_availability();
+
+DROP TRIGGER IF EXISTS desks_maintain_availability ON sena.desks;
+CREATE TRIGGER desks_maintain_availability
+    AFTER INSERT OR UPDATE OF desk_type_id ON sena.desks
+    FOR EACH ROW EXECUTE FUNCTION sena.maintain_desk_daily_availability();
+
+DROP TRIGGER IF EXISTS desk_pricing_maintain_availability ON sena.desk_pricing;
+CREATE TRIGGER desk_pricing_maintain_availability
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sena.desk_pricing
+    FOR EACH STATEMENT EXECUTE FUNCTION sena.maintain_desk_daily_availability();
+
+DROP TRIGGER IF EXISTS slot_master_maintain_availability ON sena.slot_master;
+CREATE TRIGGER slot_master_maintain_availability
+    AFTER INSERT ON sena.slot_master
+    FOR EACH STATEMENT EXECUTE FUNCTION sena.maintain_desk_daily_availability();
@@ -0,0 +1,163 @@
+-- Bookings get an explicit booking_date, and at most one live booking per
+-- desk, slot and date is enforced by a partial unique index.
+--
+-- Until now the date a booking is for was read from updated_at::date, so a
+-- booking could only be written on the day it was for, and touching a row
+-- moved it to another day. booking_date is filled from updated_at::date when
+-- a writer does not set it, which keeps older writers working, and is not
+-- changed by later updates. Every reader switches to it here.
+--
+-- The unique index fails to build while the table holds double bookings;
+-- find them with
+--     SELECT desk_id, slot_id, booking_date, COUNT(*)
+--     FROM sena.booking_transactions WHERE status <> 'cancelled'
+--     GROUP BY 1, 2, 3 HAVING COUNT(*) > 1;
+-- and cancel the extra rows first. On a busy table backfill in batches and
+-- build the indexes CONCURRENTLY by hand; the guards below then skip them.
+
+ALTER TABLE sena.booking_transactions ADD COLUMN IF NOT EXISTS booking_date DATE;
+
+-- The backfill changes no availability, so skip the notify and read model triggers
+ALTER TABLE sena.booking_transactions DISABLE TRIGGER USER;
+UPDATE sena.booking_transactions
+SET booking_date = updated_at::date
+WHERE booking_date IS NULL;
+ALTER TABLE sena.booking_transactions ENABLE TRIGGER USER;
+
+CREATE OR REPLACE FUNCTION sena.set_booking_date() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        NEW.booking_date := COALESCE(NEW.booking_date, NEW.updated_at::date);
+    ELSE
+        NEW.booking_date := COALESCE(NEW.booking_date, OLD.booking_date);
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS booking_transactions_set_booking_date ON sena.booking_transactions;
+CREATE TRIGGER booking_transactions_set_booking_date
+    BEFORE INSERT OR UPDATE ON sena.booking_transactions
+    FOR EACH ROW EXECUTE FUNCTION sena.set_booking_date();
+
+ALTER TABLE sena.booking_transactions ALTER COLUMN booking_date SET NOT NULL;
+
+-- A desk/slot/date can be held by one booking at a time; cancelled rows are
+-- kept as history and do not count
+CREATE UNIQUE INDEX IF NOT EXISTS uq_booking_transactions_live_slot
+    ON sena.booking_transactions (desk_id, slot_id, booking_date)
+    WHERE status <> 'cancelled';
+
+-- Replace the updated_at lookups of 001 and 003
+CREATE INDEX IF NOT EXISTS idx_booking_transactions_booking_date
+    ON sena.booking_transactions (booking_date, desk_id, slot_id)
+    INCLUDE (status, updated_at);
+
+CREATE INDEX IF NOT EXISTS idx_booking_transactions_desk_booking_date
+    ON sena.booking_transactions (desk_id, booking_date)
+    INCLUDE (slot_id, status, updated_at);
+
+DROP INDEX IF EXISTS sena.idx_booking_transactions_updated_at;
+DROP INDEX IF EXISTS sena.idx_booking_transactions_desk_updated_at;
+
+-- 002: notify with the booking's date
+CREATE OR REPLACE FUNCTION sena.notify_desk_change() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'booking_transactions' THEN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', OLD.desk_id, 'date', OLD.booking_date)::text);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', NEW.desk_id, 'date', NEW.booking_date)::text);
+        END IF;
+    ELSIF TG_TABLE_NAME = 'desks' THEN
+        IF TG_OP <> 'INSERT' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', OLD.id, 'date', NULL)::text);
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM pg_notify('desk_changes', json_build_object(
+                'table', TG_TABLE_NAME, 'desk_id', NEW.id, 'date', NULL)::text);
+        END IF;
+    ELSE
+        -- Price changes apply to every desk of a type; they are rare, so
+        -- signal a full refresh once per statement.
+        PERFORM pg_notify('desk_changes', json_build_object(
+            'table', TG_TABLE_NAME, 'desk_id', NULL, 'date', NULL)::text);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- 004: derive and maintain the read model from booking_date
+CREATE OR REPLACE VIEW sena.desk_daily_availability_source AS
+SELECT
+    d.id AS desk_id,
+    c.day,
+    sm.id AS slot_id,
+    COALESCE(bk.status, 'available') AS status,
+    dp.price
+FROM sena.desk_availability_days AS c
+CROSS JOIN sena.desks AS d
+CROSS JOIN sena.slot_master AS sm
+LEFT JOIN LATERAL (
+    SELECT bt.status
+    FROM sena.booking_transactions AS bt
+    WHERE bt.desk_id = d.id
+        AND bt.slot_id = sm.id
+        AND bt.booking_date = c.day
+    ORDER BY bt.updated_at DESC
+    LIMIT 1
+) AS bk ON true
+LEFT JOIN LATERAL (
+    SELECT p.price
+    FROM sena.desk_pricing AS p
+    WHERE p.desk_type_id = d.desk_type_id
+        AND p.slot_id = sm.id
+        AND p.is_active = true
+    ORDER BY p.id DESC
+    LIMIT 1
+) AS dp ON true;
+
+CREATE OR REPLACE FUNCTION sena.maintain_desk_daily_availability() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    cells RECORD;
+BEGIN
+    IF TG_TABLE_NAME = 'booking_transactions' THEN
+        PERFORM pg_advisory_xact_lock_shared(hashtext('sena.desk_daily_availability'));
+        FOR cells IN
+            SELECT DISTINCT v.desk_id, v.day
+            FROM (VALUES
+                (CASE WHEN TG_OP <> 'INSERT' THEN OLD.desk_id END, CASE WHEN TG_OP <> 'INSERT' THEN OLD.booking_date END),
+                (CASE WHEN TG_OP <> 'DELETE' THEN NEW.desk_id END, CASE WHEN TG_OP <> 'DELETE' THEN NEW.booking_date END)
+            ) AS v (desk_id, day)
+            JOIN sena.desk_availability_days AS c ON c.day = v.day
+            WHERE v.desk_id IS NOT NULL
+            ORDER BY v.desk_id, v.day
+        LOOP
+            -- Statements after the lock see bookings committed while waiting
+            PERFORM pg_advisory_xact_lock(cells.desk_id, cells.day - DATE '2000-01-01');
+            PERFORM sena.refresh_desk_daily_availability(cells.day, cells.day, ARRAY[cells.desk_id]);
+        END LOOP;
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_advisory_xact_lock(hashtext('sena.desk_daily_availability'));
+    IF TG_TABLE_NAME = 'desks' AND TG_LEVEL = 'ROW' THEN
+        -- Deleted desks drop out through the foreign key
+        IF TG_OP <> 'DELETE' THEN
+            PERFORM sena.refresh_desk_daily_availability('-infinity', 'infinity', ARRAY[NEW.id]);
+        END IF;
+    ELSE
+        -- Pricing and slot changes affect every desk of a type; rare, so
+        -- recompute everything once per statement
+        PERFORM sena.refresh_desk_daily_availability('-infinity', 'infinity');
+    END IF;
+    RETURN NULL;
+END
+$$;
@@ -0,0 +1,20 @@
+-- Socket.IO message queue for running several app processes on Postgres
+-- alone (SOCKETIO_MESSAGE_QUEUE=postgres, see app/utils/socketio_queue.py).
+--
+-- A publisher inserts the pickled message and NOTIFYs its channel with the
+-- row id; every other process reads the row by id. Payloads go through the
+-- table because desk snapshots are far larger than the 8000 byte NOTIFY
+-- limit, and so a process that reconnects can catch up on what it missed.
+-- Rows are only needed for a few seconds, so the table is unlogged and
+-- pruned by the publishers.
+
+CREATE UNLOGGED TABLE IF NOT EXISTS sena.socketio_messages (
+    id BIGSERIAL PRIMARY KEY,
+    channel TEXT NOT NULL,
+    host_id TEXT NOT NULL,
+    payload BYTEA NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_socketio_messages_created_at
+    ON sena.socketio_messages (created_at);
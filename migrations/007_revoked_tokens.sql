@@ -0,0 +1,17 @@
+-- Revoked session tokens (see app/utils/session_tokens.py).
+--
+-- Session tokens are signed and checked without touching the database, so
+-- logging out cannot delete anything: the token's id is recorded here
+-- instead. Every process keeps the live rows in memory and reads the ones
+-- revoked since its last refresh every SESSION_REVOCATION_REFRESH seconds.
+-- A row is only needed until the token would have expired anyway.
+
+CREATE TABLE IF NOT EXISTS sena.revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    user_id UUID,
+    expires_at TIMESTAMPTZ NOT NULL,
+    revoked_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at
+    ON sena.revoked_tokens (revoked_at);
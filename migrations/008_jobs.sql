@@ -0,0 +1,23 @@
+-- Jobs scraped from Naukri (helper/naukriScrapper.py), loaded in bulk by
+-- python -m app.utils.job_loader.
+--
+-- One row per job page, keyed by its URL without the tracking query. A job
+-- listed again by a later crawl updates its row; updated_at only moves when
+-- the scraped fields changed, last_seen_at every time it is loaded.
+
+CREATE TABLE IF NOT EXISTS sena.jobs (
+    job_id BIGSERIAL PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    company TEXT,
+    salary TEXT,
+    location TEXT,
+    skills TEXT[] NOT NULL DEFAULT '{}',
+    description TEXT,
+    first_seen_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_seen_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_last_seen_at
+    ON sena.jobs (last_seen_at);
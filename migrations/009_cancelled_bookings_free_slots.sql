@@ -0,0 +1,38 @@
+-- A cancelled booking no longer holds its slot: the slot reads as
+-- 'available' again, as uq_booking_transactions_live_slot (005) already
+-- lets it be booked again. DeskData filters cancelled rows out of its live
+-- queries; here the read model's source does the same and every
+-- materialized date is recomputed.
+
+CREATE OR REPLACE VIEW sena.desk_daily_availability_source AS
+SELECT
+    d.id AS desk_id,
+    c.day,
+    sm.id AS slot_id,
+    COALESCE(bk.status, 'available') AS status,
+    dp.price
+FROM sena.desk_availability_days AS c
+CROSS JOIN sena.desks AS d
+CROSS JOIN sena.slot_master AS sm
+LEFT JOIN LATERAL (
+    SELECT bt.status
+    FROM sena.booking_transactions AS bt
+    WHERE bt.desk_id = d.id
+        AND bt.slot_id = sm.id
+        AND bt.booking_date = c.day
+        AND bt.status <> 'cancelled'
+    ORDER BY bt.updated_at DESC
+    LIMIT 1
+) AS bk ON true
+LEFT JOIN LATERAL (
+    SELECT p.price
+    FROM sena.desk_pricing AS p
+    WHERE p.desk_type_id = d.desk_type_id
+        AND p.slot_id = sm.id
+        AND p.is_active = true
+    ORDER BY p.id DESC
+    LIMIT 1
+) AS dp ON true;
+
+SELECT pg_advisory_xact_lock(hashtext('sena.desk_daily_availability'));
+SELECT sena.refresh_desk_daily_availability('-infinity', 'infinity');
@@ -0,0 +1,79 @@
+"""
+The tests run without Postgres: desk updates are polled (no LISTEN
+connection, and no poll within a test run) and the database settings point
+at a local address nothing listens on, never the deployed database.
+
+Tests that need Postgres take the `database` fixture and are skipped unless
+TEST_DATABASE_URL names a throwaway database; its sena schema is dropped and
+recreated from benchmarks/schema.sql and migrations/ once per run.
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/sena_test python -m pytest
+"""
+import os
+import sys
+
+import pytest
+from psycopg2.extensions import parse_dsn
+
+PRODUCTION_HOST = 'dpg-ctlpcvrqf0us7389o680-a.singapore-postgres.render.com'
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    _dsn = parse_dsn(TEST_DATABASE_URL)
+    if _dsn.get('host') == PRODUCTION_HOST:
+        raise pytest.UsageError('TEST_DATABASE_URL must not point at the production host')
+    os.environ.update({
+        'DB_HOST': _dsn.get('host', 'localhost'),
+        'DB_PORT': _dsn.get('port', '5432'),
+        'DB_NAME': _dsn.get('dbname', 'postgres'),
+        'DB_USER': _dsn.get('user', 'postgres'),
+        'DB_PASSWORD': _dsn.get('password', '')
+    })
+else:
+    os.environ.setdefault('DB_HOST', '127.0.0.1')
+    os.environ.setdefault('DB_PORT', '1')
+os.environ.setdefault('DB_CONNECT_TIMEOUT', '1')
+os.environ.setdefault('DESK_UPDATE_MODE', 'poll')
+os.environ.setdefault('DESK_POLL_INTERVAL', '3600')
+os.environ.setdefault('SESSION_TOKEN_SECRETS', 'test-secret')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SEED_SQL = """
+    INSERT INTO sena.locations (name) VALUES ('Chennai'), ('Bengaluru');
+    INSERT INTO sena.buildings (name, address, amenities, operating_hours, location_id)
+    VALUES ('Tower A', '1 Main Road', '["wifi"]', '09:00-21:00', 1),
+           ('Tower B', '2 Main Road', '["wifi", "parking"]', '09:00-21:00', 2);
+    INSERT INTO sena.desk_type_master (type, capacity) VALUES ('Hot Desk', 1), ('Cabin', 4);
+    INSERT INTO sena.slot_master (slot_type, start_time, end_time, time_zone)
+    VALUES ('Morning', '09:00', '13:00', 'Asia/Kolkata'), ('Afternoon', '13:00', '17:00', 'Asia/Kolkata');
+    INSERT INTO sena.desk_pricing (desk_type_id, slot_id, price)
+    SELECT t.id, s.id, 100 * t.id + 10 * s.id FROM sena.desk_type_master AS t CROSS JOIN sena.slot_master AS s;
+    INSERT INTO sena.desks (name, floor_number, capacity, description, status, building_id, location_id, desk_type_id)
+    VALUES ('A-101', 1, 1, 'Window', 'active', 1, 1, 1),
+           ('A-201', 2, 1, NULL, 'active', 1, 1, 1),
+           ('B-101', 1, 4, NULL, 'active', 2, 2, 2);
+    INSERT INTO sena.users (email, first_name, last_name, password)
+    VALUES ('ada@example.com', 'Ada', 'L', 'secret'), ('bob@example.com', 'Bob', 'M', 'secret');
+"""
+
+
+@pytest.fixture(scope='session')
+def database():
+    """A connection to the test database, freshly created and seeded: 3 desks, 2 slots, 2 users."""
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    import psycopg2
+    from app.utils import migrate
+
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    cursor = conn.cursor()
+    cursor.execute("DROP SCHEMA IF EXISTS sena CASCADE")
+    with open(os.path.join(ROOT, 'benchmarks', 'schema.sql'), encoding='utf-8') as f:
+        cursor.execute(f.read())
+    cursor.execute(SEED_SQL)
+    conn.commit()
+    migrate.apply_pending(conn)
+    yield conn
+    conn.close()
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+from flask import Flask
+
+from app.config.auth import SESSION_TOKEN_CONFIG
+from app.config.realtime import DESK_CLUSTER_CONFIG
+from app.routes import auth_routes
+from app.utils import session_tokens
+from app.utils.session_tokens import RevocationList, issue_token, verify_token
+
+USER = {'id': 7, 'email': 'a@example.com', 'first_name': 'Ada', 'last_name': 'L', 'phone': None,
+        'is_active': True, 'password': 'never in a token'}
+
+
+def test_token_carries_the_user_claims():
+    token, expires_at = issue_token(USER)
+    claims = verify_token(token)
+    assert claims['sub'] == '7' and claims['email'] == 'a@example.com' and 'password' not in claims
+    assert claims['exp'] == expires_at
+    assert verify_token(token[:-2] + 'xx') is None
+    assert verify_token(None) is None
+
+
+def test_token_expires_after_its_ttl(monkeypatch):
+    token, _ = issue_token(USER)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + SESSION_TOKEN_CONFIG['ttl'] + 1)
+    assert verify_token(token) is None
+
+
+def test_revoked_token_is_refused(monkeypatch):
+    monkeypatch.setattr(session_tokens, 'revocations', RevocationList())
+    token, expires_at = issue_token(USER)
+    claims = verify_token(token)
+    # no database here: recorded for other processes fails, this one refuses it at once
+    session_tokens.revocations.revoke(claims['jti'], claims['sub'], expires_at)
+    assert verify_token(token) is None
+    assert verify_token(issue_token(USER)[0]) is not None
+
+
+def test_several_processes_need_shared_secrets(monkeypatch):
+    monkeypatch.setitem(SESSION_TOKEN_CONFIG, 'secrets', [])
+    monkeypatch.setitem(DESK_CLUSTER_CONFIG, 'message_queue', None)
+    monkeypatch.setenv('WEB_CONCURRENCY', '1')
+    assert len(session_tokens._signing_secrets()) == 1
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    with pytest.raises(RuntimeError, match='SESSION_TOKEN_SECRETS'):
+        session_tokens._signing_secrets()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth_routes, 'legacy_lookups', auth_routes.LookupRateLimiter(2))
+    monkeypatch.setattr(auth_routes.User, 'get_user_by_email', lambda email: (dict(USER, password=None), 200))
+    app = Flask(__name__)
+    app.register_blueprint(auth_routes.auth_bp)
+    return app.test_client()
+
+
+def test_me_reads_the_token(client):
+    token, _ = issue_token(USER)
+    response = client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert response.get_json()['id'] == '7' and response.get_json()['email'] == 'a@example.com'
+    assert client.get('/api/auth/me', headers={'Authorization': 'Bearer nope'}).status_code == 401
+
+
+def test_legacy_email_lookup_is_deprecated_and_limited(client):
+    assert client.get('/api/auth/me').status_code == 401
+    for _ in range(2):
+        response = client.get('/api/auth/me?email=a@example.com')
+        assert response.status_code == 200
+        assert response.headers['Deprecation'] == 'true'
+        assert 'id' not in response.get_json()
+    response = client.get('/api/auth/me?email=a@example.com')
+    assert response.status_code == 429 and response.headers['Retry-After'] == '60'
+
+
+def test_other_processes_read_only_new_revocations(database):
+    cursor = database.cursor()
+    cursor.execute("TRUNCATE sena.revoked_tokens")
+    database.commit()
+    here, elsewhere = RevocationList(), RevocationList()
+    expires_at = time.time() + 3600
+
+    assert here.revoke('first', None, expires_at)
+    assert elsewhere.refresh() and elsewhere.is_revoked('first')
+
+    here.revoke('second', None, expires_at)
+    # Rows stamped before the last refresh, less the overlap, are not read again
+    cursor.execute("""
+        INSERT INTO sena.revoked_tokens (jti, expires_at, revoked_at)
+        VALUES ('in the overlap', now() + interval '1 hour', now() - interval '30 seconds'),
+               ('long before', now() + interval '1 hour', now() - interval '1 hour'),
+               ('expired', now() - interval '1 second', now())
+    """)
+    database.commit()
+    assert elsewhere.refresh()
+    assert [elsewhere.is_revoked(jti) for jti in ('first', 'second', 'in the overlap', 'long before', 'expired')] == [
+        True, True, True, False, False]
+
+    # A new process loads every live row
+    fresh = RevocationList()
+    assert fresh.refresh()
+    assert fresh.stats()['revoked'] == 4 and not fresh.is_revoked('expired')
+
+
+def test_expired_revocations_are_forgotten(database, monkeypatch):
+    revocations = RevocationList()
+    revocations.revoke('short lived', None, time.time() + 60)
+    assert revocations.refresh() and revocations.is_revoked('short lived')
+
+    # A minute later, for the database and for this process
+    cursor = database.cursor()
+    cursor.execute("UPDATE sena.revoked_tokens SET expires_at = expires_at - interval '61 seconds'")
+    database.commit()
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+    assert revocations.refresh()
+    assert not revocations.is_revoked('short lived')
@@ -0,0 +1,133 @@
+from datetime import date, timedelta
+
+import pytest
+from flask import Flask
+
+from app.config.booking import BOOKING_CONFIG
+from app.models.booking_model import Booking, BookingItem
+from app.models.desk_model import DeskData, DeskFilters
+from app.routes import booking_routes
+from app.routes.booking_routes import parse_bulk_items
+from app.utils.session_tokens import issue_token
+
+TODAY = date.today().isoformat()
+TOMORROW = (date.today() + timedelta(days=1)).isoformat()
+
+
+def test_items_are_booked_as_listed():
+    items = parse_bulk_items({'items': [{'desk_id': '3', 'slot_id': 1, 'date': TODAY},
+                                        {'desk_id': 4, 'slot_id': 2, 'date': TOMORROW}]})
+    assert items == [BookingItem(3, 1, TODAY), BookingItem(4, 2, TOMORROW)]
+
+
+def test_one_desk_is_booked_for_every_slot_and_date():
+    items = parse_bulk_items({'desk_id': 3, 'slot_ids': [1, 2], 'dates': [TODAY, TOMORROW]})
+    assert items == [BookingItem(3, 1, TODAY), BookingItem(3, 2, TODAY),
+                     BookingItem(3, 1, TOMORROW), BookingItem(3, 2, TOMORROW)]
+
+
+@pytest.mark.parametrize('data', [
+    {'items': 'desk 3'},
+    {'items': [{'desk_id': 3, 'slot_id': 1}]},
+    {'items': [{'desk_id': 3, 'slot_id': 1, 'date': TODAY}, 'desk 4']},
+    {'items': []},
+    {'desk_id': 3, 'slot_ids': [1]},
+    {'items': [{'desk_id': 3, 'slot_id': 1, 'date': (date.today() - timedelta(days=1)).isoformat()}]},
+])
+def test_bad_requests_are_rejected(data):
+    with pytest.raises(ValueError):
+        parse_bulk_items(data)
+
+
+def test_at_most_max_items_per_request(monkeypatch):
+    monkeypatch.setitem(BOOKING_CONFIG, 'max_items', 3)
+    with pytest.raises(ValueError, match='At most 3'):
+        parse_bulk_items({'desk_id': 3, 'slot_ids': [1, 2], 'dates': [TODAY, TOMORROW]})
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(booking_routes.booking_bp)
+    return app.test_client()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Booking model calls the routes make, as (method, args)."""
+    calls = []
+    monkeypatch.setattr(booking_routes.Booking, 'create_bookings',
+                        lambda *args: calls.append(('create', args)) or ({'bookings': [{'booking_id': 1}]}, 201))
+    monkeypatch.setattr(booking_routes.Booking, 'cancel_booking',
+                        lambda *args: calls.append(('cancel', args)) or ({'message': 'Booking cancelled'}, 200))
+    return calls
+
+
+def test_booking_needs_a_session_token(client, calls):
+    for path in ('/api/bookings', '/api/bookings/bulk', '/api/bookings/1/cancel'):
+        response = client.post(path, json={'user_id': '42', 'desk_id': 3, 'slot_id': 1, 'date': TODAY})
+        assert response.status_code == 401
+        assert response.headers['WWW-Authenticate'] == 'Bearer'
+    assert calls == []
+
+
+def test_bookings_are_made_and_cancelled_as_the_token_user(client, calls):
+    token, _ = issue_token({'id': 7, 'email': 'a@example.com'})
+    headers = {'Authorization': f'Bearer {token}'}
+    response = client.post('/api/bookings', headers=headers,
+                           json={'user_id': '42', 'desk_id': 3, 'slot_id': 1, 'date': TODAY})
+    assert response.status_code == 201
+    response = client.post('/api/bookings/1/cancel', headers=headers, json={'user_id': '42'})
+    assert response.status_code == 200
+    assert calls == [('create', ('7', [BookingItem(3, 1, TODAY)])), ('cancel', (1, '7'))]
+
+
+def slot_status(target_date, desk_id, slot_id, filters=None):
+    desk_data, status_code = DeskData.get_desk_availability(target_date, filters=filters)
+    assert status_code == 200
+    for desk in desk_data['desks']:
+        if desk['desk_id'] == desk_id:
+            return next(slot['status'] for slot in desk['slots'] if slot['slot_id'] == slot_id)
+    return None
+
+
+def range_status(target_date, desk_id, slot_id):
+    grid, status_code = DeskData.get_availability_range(target_date, target_date)
+    assert status_code == 200
+    desk = next(desk for desk in grid['desks'] if desk['desk_id'] == desk_id)
+    slot_idx = [slot['slot_id'] for slot in grid['slots']].index(slot_id)
+    return grid['statuses'][desk['grid'][0][slot_idx]]
+
+
+def test_cancelled_booking_frees_its_slot(database):
+    cursor = database.cursor()
+    cursor.execute("SELECT id FROM sena.users WHERE email = 'ada@example.com'")
+    user_id = str(cursor.fetchone()[0])
+    only_available = DeskFilters(only_available=True)
+
+    result, status_code = Booking.create_bookings(user_id, [BookingItem(1, 1, TOMORROW)])
+    assert status_code == 201
+    booking_id = result['bookings'][0]['booking_id']
+    assert slot_status(TOMORROW, 1, 1) == 'booked'
+    assert slot_status(TOMORROW, 1, 1, only_available) == 'booked'  # its other slot is free
+    assert range_status(TOMORROW, 1, 1) == 'booked'
+
+    assert Booking.cancel_booking(booking_id, user_id)[1] == 200
+    assert slot_status(TOMORROW, 1, 1) == 'available'
+    assert range_status(TOMORROW, 1, 1) == 'available'
+    filters = DeskFilters(only_available=True, slot_type='Morning')
+    assert slot_status(TOMORROW, 1, 1, filters) == 'available'
+    cursor.execute("SELECT sena.rebuild_desk_daily_availability(%s, %s)", (TOMORROW, TOMORROW))
+    cursor.execute("""
+        SELECT status FROM sena.desk_daily_availability WHERE desk_id = 1 AND slot_id = 1 AND day = %s
+    """, (TOMORROW,))
+    assert cursor.fetchone()[0] == 'available'
+    database.commit()
+
+    # and it can be booked again
+    assert Booking.create_bookings(user_id, [BookingItem(1, 1, TOMORROW)])[1] == 201
+    cursor.execute("""
+        SELECT status FROM sena.desk_daily_availability WHERE desk_id = 1 AND slot_id = 1 AND day = %s
+    """, (TOMORROW,))
+    assert cursor.fetchone()[0] == 'booked'
+    database.commit()
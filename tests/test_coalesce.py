@@ -0,0 +1,55 @@
+from app.config.database import DB_COALESCE_CONFIG
+from app.utils import coalesce as coalesce_module
+from app.utils.coalesce import coalesce, freeze, fresh_since
+
+
+class Filters:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def test_freeze_compares_arguments_by_value():
+    assert freeze({'b': [1, 2], 'a': {3}}) == freeze({'a': {3}, 'b': (1, 2)})
+    assert freeze(Filters(floor=2, desk_type='standing')) == freeze(Filters(desk_type='standing', floor=2))
+    assert freeze(Filters(floor=2)) != freeze(Filters(floor=3))
+    hash(freeze([{'desk_ids': [1, 2]}, Filters(tags={'window'})]))
+
+
+def test_calls_spelled_differently_share_a_key():
+    keys = []
+
+    @coalesce('test_keys')
+    def availability(target_date, desk_ids=None, filters=None):
+        keys.extend(coalesce_module._flights['test_keys']._calls)
+
+    availability('2025-01-01', [1, 2])
+    availability(target_date='2025-01-01', desk_ids=(1, 2), filters=None)
+    availability('2025-01-01', [1, 2], Filters(floor=2))
+    assert keys[0] == keys[1] != keys[2]
+
+
+def test_disabled_runs_every_call(monkeypatch):
+    monkeypatch.setitem(DB_COALESCE_CONFIG, 'enabled', False)
+    runs = []
+
+    @coalesce('test_disabled')
+    def availability(target_date):
+        runs.append(target_date)
+        return coalesce_module._flights['test_disabled'].in_flight()
+
+    assert availability('2025-01-01') == 0
+    availability('2025-01-01')
+    assert runs == ['2025-01-01'] * 2
+
+
+def test_fresh_since_keeps_the_latest_floor():
+    assert getattr(coalesce_module._floor, 'timestamp', None) is None
+    with fresh_since(100):
+        with fresh_since(50):
+            assert coalesce_module._floor.timestamp == 100
+        with fresh_since(None):
+            assert coalesce_module._floor.timestamp == 100
+        with fresh_since(200):
+            assert coalesce_module._floor.timestamp == 200
+        assert coalesce_module._floor.timestamp == 100
+    assert coalesce_module._floor.timestamp is None
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from app.utils import db_utils
+from app.utils.db_utils import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, vars=None):
+        if self.conn.broken:
+            raise db_utils.psycopg2.OperationalError("server closed the connection")
+
+    def fetchone(self):
+        return (1,)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Connections the pool opened, in order."""
+    connections = []
+
+    def connect(db_config, connect_timeout=None):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(db_utils, 'get_db_connection', connect)
+    return connections
+
+
+def make_pool(**kwargs):
+    return ConnectionPool({'host': 'test', 'dbname': 'test'}, **kwargs)
+
+
+def test_checkout_reuses_returned_connection(opened):
+    pool = make_pool(maxconn=2)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert len(opened) == 1
+    assert pool.stats()['in_use'] == 1
+
+
+def test_checkout_times_out_at_maxconn(opened):
+    pool = make_pool(maxconn=1)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn(timeout=0.05)
+    assert pool.stats()['checkout_timeouts'] == 1
+
+
+def test_open_transaction_is_rolled_back_on_return(opened):
+    pool = make_pool()
+    conn = pool.getconn()
+    conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(conn)
+    assert conn.rollbacks == 1
+    assert pool.getconn() is conn
+
+
+def test_discarded_connection_frees_its_slot(opened):
+    pool = make_pool(maxconn=1)
+    conn = pool.getconn()
+    pool.putconn(conn, discard=True)
+    assert conn.closed
+    replacement = pool.getconn(timeout=0.05)
+    assert replacement is not conn
+    assert pool.stats()['size'] == 1
+
+
+def test_broken_connection_is_replaced_on_checkout(opened):
+    pool = make_pool(health_check_interval=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.broken = True
+    replacement = pool.getconn()
+    assert replacement is not conn and conn.closed
+    assert pool.stats()['health_check_failures'] == 1
+
+
+def test_idle_connections_expire_down_to_minconn(opened):
+    pool = make_pool(minconn=2, maxconn=3, idle_timeout=0.05)
+    first, second, third = pool.getconn(), pool.getconn(), pool.getconn()
+    pool.putconn(first)
+    pool.putconn(second)
+    time.sleep(0.1)
+    pool.putconn(third)
+    assert first.closed and not second.closed and not third.closed
+    assert pool.stats()['size'] == 2
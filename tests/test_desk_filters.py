@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+
+import pytest
+from flask import Flask
+from werkzeug.datastructures import MultiDict
+
+from app.models.desk_model import DeskData, DeskFilters
+from app.routes import desk_routes
+
+# Far enough ahead that no other test books it
+DAY = (date.today() + timedelta(days=40)).isoformat()
+
+
+def test_no_filters_select_everything():
+    assert DeskFilters().to_sql() == ("true", "true", {})
+    assert not DeskFilters().has_slot_filters()
+
+
+def test_every_filter_is_a_bound_parameter():
+    filters = DeskFilters(city='Chennai', building="Tower 'A'", floor=2, desk_type_id=1, status='active',
+                          slot_type='Morning', max_price=150.0, desk_ids=(1, 2), after=1, limit=10)
+
+    desk_conditions, slot_conditions, params = filters.to_sql(price_column="da.price")
+
+    assert desk_conditions == (
+        "true AND LOWER(l.name) = LOWER(%(city)s) AND LOWER(b.name) = LOWER(%(building)s)"
+        " AND d.floor_number = %(floor)s AND d.desk_type_id = %(desk_type_id)s AND d.status = %(status)s"
+        " AND d.id = ANY(%(desk_ids)s) AND d.id > %(after)s")
+    assert slot_conditions == "true AND LOWER(sm.slot_type) = LOWER(%(slot_type)s) AND da.price <= %(max_price)s"
+    assert params == {'city': 'Chennai', 'building': "Tower 'A'", 'floor': 2, 'desk_type_id': 1, 'status': 'active',
+                      'desk_ids': [1, 2], 'after': 1, 'slot_type': 'Morning', 'max_price': 150.0}
+    # limit pages the result outside these conditions
+    assert 'limit' not in params
+
+
+def test_zero_values_are_filters_too():
+    desk_conditions, slot_conditions, params = DeskFilters(floor=0, max_price=0.0, desk_ids=[]).to_sql()
+
+    assert params == {'floor': 0, 'desk_ids': [], 'max_price': 0.0}
+    assert "d.floor_number = %(floor)s" in desk_conditions and "dp.price <= %(max_price)s" in slot_conditions
+
+
+@pytest.mark.parametrize('filters, expected', [
+    (DeskFilters(slot_type='Morning'), True),
+    (DeskFilters(max_price=0.0), True),
+    (DeskFilters(only_available=True), True),
+    (DeskFilters(city='Chennai', floor=1, limit=5), False),
+])
+def test_has_slot_filters(filters, expected):
+    assert filters.has_slot_filters() is expected
+
+
+def test_from_args_parses_query_parameters():
+    filters = DeskFilters.from_args(MultiDict({
+        'city': 'Chennai', 'building': '', 'floor': ' 2 ', 'desk_type_id': '1', 'slot_type': 'morning',
+        'max_price': '150.5', 'only_available': 'TRUE', 'after': '3', 'limit': '500'}), max_limit=100)
+
+    assert vars(filters) == {'city': 'Chennai', 'building': None, 'floor': 2, 'desk_type_id': 1, 'status': None,
+                             'slot_type': 'morning', 'max_price': 150.5, 'only_available': True,
+                             'desk_ids': None, 'after': 3, 'limit': 100}
+    assert not DeskFilters.from_args(MultiDict({'only_available': 'no'}), 100).only_available
+
+
+@pytest.mark.parametrize('args, name', [
+    ({'floor': 'abc'}, 'floor'),
+    ({'floor': '1.5'}, 'floor'),
+    ({'desk_type_id': '1e3'}, 'desk_type_id'),
+    ({'after': 'next'}, 'after'),
+    ({'limit': '0'}, 'limit'),
+    ({'limit': '-5'}, 'limit'),
+    ({'max_price': 'cheap'}, 'max_price'),
+    ({'max_price': 'nan'}, 'max_price'),
+    ({'max_price': 'inf'}, 'max_price'),
+    ({'max_price': '1e400'}, 'max_price'),
+    ({'city': 'Chen\x00nai'}, 'city'),
+    ({'building': '\x00'}, 'building'),
+    ({'status': 'active\x00'}, 'status'),
+    ({'slot_type': '\x00Morning'}, 'slot_type'),
+])
+def test_from_args_rejects_malformed_values(args, name):
+    with pytest.raises(ValueError, match=f"'{name}'"):
+        DeskFilters.from_args(MultiDict(args), 100)
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(desk_routes.desk_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('query', [
+    'floor=abc', 'limit=0', 'limit=ten', 'after=1.5', 'max_price=nan', 'max_price=-inf',
+    'city=%00', 'building=Tower%00A', 'status=%00', 'slot_type=%00',
+])
+def test_malformed_desk_queries_are_bad_requests(client, query, monkeypatch):
+    monkeypatch.setattr(DeskData, 'get_desk_availability_json', lambda *args, **kwargs: pytest.fail('queried'))
+
+    response = client.get(f'/api/desks?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid value for')
+
+
+def desks(filters):
+    result, status_code = DeskData.get_desk_availability(DAY, filters=filters)
+    assert status_code == 200, result
+    return result
+
+
+def test_filters_run_against_postgres(database):
+    def names(**values):
+        return [desk['desk_name'] for desk in desks(DeskFilters(**values))['desks']]
+
+    assert names() == ['A-101', 'A-201', 'B-101']
+    assert names(city='chennai') == ['A-101', 'A-201']
+    assert names(building='TOWER B') == ['B-101']
+    assert names(floor=1) == ['A-101', 'B-101']
+    assert names(desk_type_id=2) == ['B-101']
+    assert names(status='inactive') == []
+    assert names(desk_ids=[3, 1]) == ['A-101', 'B-101']
+    assert names(city='Chennai', floor=2) == ['A-201']
+    # Slot filters limit the slots listed and drop desks left without one
+    assert names(max_price=200) == ['A-101', 'A-201']
+    assert names(max_price=1) == []
+    assert names(only_available=True) == ['A-101', 'A-201', 'B-101']
+
+    morning = desks(DeskFilters(slot_type='MORNING', max_price=215))['desks']
+    assert [(desk['desk_name'], [slot['slot_type'] for slot in desk['slots']]) for desk in morning] == [
+        ('A-101', ['Morning']), ('A-201', ['Morning']), ('B-101', ['Morning'])]
+    assert [desk['slots'][0]['price'] for desk in morning] == [110.0, 110.0, 210.0]
+
+
+def test_pages_follow_next_cursor(database):
+    pages, after = [], None
+    while True:
+        page = desks(DeskFilters(city='Chennai', limit=1, after=after))
+        pages.append([desk['desk_name'] for desk in page['desks']])
+        after = page['next_cursor']
+        if after is None:
+            break
+
+    assert pages == [['A-101'], ['A-201']]
+    assert 'next_cursor' not in desks(DeskFilters(city='Chennai'))
@@ -0,0 +1,158 @@
+import json
+import time
+from datetime import date, timedelta
+
+import pytest
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from app.config.database import DB_CONFIG
+from app.models.booking_model import Booking, BookingItem
+from app.utils.db_utils import get_db_connection
+from app.utils.desk_notifications import (DESK_CHANGES_CHANNEL, DeskChangeListener, DeskChangeTracker, add_change,
+                                          changes_for_date)
+
+DAY, NEXT_DAY = '2025-01-01', '2025-01-02'
+
+
+def folded(*payloads):
+    changes = {}
+    for payload in payloads:
+        add_change(changes, payload)
+    return changes
+
+
+def test_bookings_collect_desks_per_date():
+    changes = folded({'table': 'booking_transactions', 'desk_id': 1, 'date': DAY},
+                     {'table': 'booking_transactions', 'desk_id': 2, 'date': DAY},
+                     {'table': 'booking_transactions', 'desk_id': 1, 'date': DAY},
+                     {'table': 'booking_transactions', 'desk_id': 3, 'date': NEXT_DAY})
+
+    assert changes == {DAY: {1, 2}, NEXT_DAY: {3}}
+    assert changes_for_date(changes, DAY) == (True, {1, 2})
+    assert changes_for_date(changes, NEXT_DAY) == (True, {3})
+    assert changes_for_date(changes, '2025-01-03') == (False, None)
+
+
+def test_a_desk_change_applies_to_every_date():
+    changes = folded({'table': 'desks', 'desk_id': 5, 'date': None},
+                     {'table': 'booking_transactions', 'desk_id': 1, 'date': DAY})
+
+    assert changes == {None: {5}, DAY: {1}}
+    assert changes_for_date(changes, DAY) == (True, {1, 5})
+    assert changes_for_date(changes, NEXT_DAY) == (True, {5})
+
+
+def test_a_change_without_a_desk_covers_every_desk():
+    whole_day = folded({'desk_id': 1, 'date': DAY}, {'desk_id': None, 'date': DAY}, {'desk_id': 2, 'date': DAY})
+    assert whole_day == {DAY: None}
+    assert changes_for_date(whole_day, DAY) == (True, None)
+    assert changes_for_date(whole_day, NEXT_DAY) == (False, None)
+
+    # desk_pricing: every desk on every date, whatever else changed
+    everything = folded({'table': 'booking_transactions', 'desk_id': 1, 'date': DAY},
+                        {'table': 'desk_pricing', 'desk_id': None, 'date': None},
+                        {'table': 'desks', 'desk_id': 5, 'date': None})
+    assert everything == {DAY: {1}, None: None}
+    assert changes_for_date(everything, DAY) == (True, None)
+    assert changes_for_date(everything, NEXT_DAY) == (True, None)
+
+
+def test_no_changes_affect_nothing():
+    assert changes_for_date({}, DAY) == (False, None)
+
+
+class FakeNotify:
+    def __init__(self, payload):
+        self.payload = payload
+
+
+class FakeConnection:
+    def __init__(self, payloads):
+        self.notifies = [FakeNotify(payload) for payload in payloads]
+
+    def poll(self):
+        pass
+
+
+def test_unreadable_payloads_refresh_everything():
+    changes = {}
+    DeskChangeListener._collect(FakeConnection([json.dumps({'desk_id': 1, 'date': DAY}), 'not json', '[1, 2]']),
+                                changes)
+
+    assert changes == {DAY: {1}, None: None}
+
+
+def test_tracker_versions_follow_the_dates_changed():
+    tracker = DeskChangeTracker()
+    assert tracker.version(DAY) is None
+
+    tracker.reset()
+    initial = tracker.version(DAY)
+    assert tracker.version(NEXT_DAY) == initial
+
+    tracker.record({DAY: {1}})
+    day_version = tracker.version(DAY)
+    assert day_version[0] != initial[0] and day_version[1] >= initial[1]
+    assert tracker.version(NEXT_DAY) == initial
+    assert tracker.version(DAY, NEXT_DAY) == day_version
+
+    tracker.record({None: {5}})
+    everywhere = tracker.version(NEXT_DAY)
+    assert everywhere != initial and tracker.version(DAY) == everywhere
+
+
+def test_tracker_versions_only_hold_while_listening():
+    tracker = DeskChangeTracker()
+    tracker.reset()
+    tracker.record({DAY: None})
+    before = tracker.version(DAY)
+
+    tracker.disconnected()
+    assert tracker.version(DAY) is None
+
+    # Changes may have been missed: a new epoch never repeats an old tag
+    tracker.reset()
+    assert tracker.version(DAY)[0].split('-')[0] != before[0].split('-')[0]
+
+
+@pytest.fixture
+def listening(database):
+    """A connection LISTENing on desk_changes, as DeskChangeListener holds."""
+    conn = get_db_connection(DB_CONFIG)
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    conn.cursor().execute(f"LISTEN {DESK_CHANGES_CHANNEL}")
+    yield conn
+    conn.close()
+
+
+def received(conn, timeout=5):
+    changes = {}
+    deadline = time.monotonic() + timeout
+    while not changes and time.monotonic() < deadline:
+        if DeskChangeListener._wait(conn, 0.1):
+            DeskChangeListener._collect(conn, changes)
+    return changes
+
+
+def test_triggers_notify_the_booking_date(database, listening):
+    cursor = database.cursor()
+    cursor.execute("SELECT id FROM sena.users WHERE email = 'bob@example.com'")
+    user_id = str(cursor.fetchone()[0])
+    day = (date.today() + timedelta(days=60)).isoformat()
+
+    result, status_code = Booking.create_bookings(user_id, [BookingItem(1, 1, day), BookingItem(3, 2, day)])
+    assert status_code == 201
+    assert received(listening) == {day: {1, 3}}
+
+    assert Booking.cancel_booking(result['bookings'][0]['booking_id'], user_id)[1] == 200
+    assert received(listening) == {day: {1}}
+
+    cursor.execute("UPDATE sena.desks SET description = description WHERE id = 2")
+    database.commit()
+    assert received(listening) == {None: {2}}
+
+    cursor.execute("UPDATE sena.desk_pricing SET price = price WHERE false")
+    database.commit()
+    changes = received(listening)
+    assert changes == {None: None}
+    assert changes_for_date(changes, day) == (True, None)
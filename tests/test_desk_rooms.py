@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+from app.routes.desk_routes import parse_dates
+from app.utils.desk_rooms import PROTOCOL_DELTA, PROTOCOL_FULL, DeskSubscriptions, desk_room
+
+DAY, NEXT_DAY = '2025-01-01', '2025-01-02'
+
+
+def test_each_date_and_protocol_has_its_own_room():
+    assert desk_room(DAY) == desk_room(DAY, PROTOCOL_FULL) == 'desks:2025-01-01'
+    assert desk_room(DAY, PROTOCOL_DELTA) == 'desks:2025-01-01:delta'
+    assert desk_room(NEXT_DAY) != desk_room(DAY)
+
+
+def test_subscribers_are_indexed_by_date_and_protocol():
+    subscriptions = DeskSubscriptions()
+    subscriptions.add_client('a')
+    subscriptions.add_client('b')
+
+    assert subscriptions.subscribe('a', DAY) is None
+    assert subscriptions.subscribe('b', DAY, PROTOCOL_DELTA) is None
+    assert subscriptions.subscribe('b', NEXT_DAY) is None
+
+    assert subscriptions.active_dates() == [DAY, NEXT_DAY]
+    assert subscriptions.subscriber_count(DAY) == 2
+    assert subscriptions.subscriber_count(DAY, PROTOCOL_FULL) == 1
+    assert subscriptions.subscriber_count(DAY, PROTOCOL_DELTA) == 1
+    assert subscriptions.subscriber_count(NEXT_DAY, PROTOCOL_DELTA) == 0
+    assert subscriptions.client_dates('b') == [DAY, NEXT_DAY]
+    assert subscriptions.client_protocol('b', DAY) == PROTOCOL_DELTA
+    assert subscriptions.client_protocol('a', NEXT_DAY) is None
+    assert subscriptions.stats() == (2, 2)
+
+
+def test_subscribing_again_switches_protocol():
+    subscriptions = DeskSubscriptions()
+
+    subscriptions.subscribe('a', DAY)
+    assert subscriptions.subscribe('a', DAY) == PROTOCOL_FULL
+    assert subscriptions.subscribe('a', DAY, PROTOCOL_DELTA) == PROTOCOL_FULL
+
+    assert subscriptions.client_protocol('a', DAY) == PROTOCOL_DELTA
+    assert subscriptions.subscriber_count(DAY, PROTOCOL_FULL) == 0
+    assert subscriptions.subscriber_count(DAY, PROTOCOL_DELTA) == 1
+
+
+def test_dates_without_subscribers_are_no_longer_active():
+    subscriptions = DeskSubscriptions()
+    subscriptions.subscribe('a', DAY)
+    subscriptions.subscribe('b', DAY, PROTOCOL_DELTA)
+    subscriptions.subscribe('b', NEXT_DAY)
+
+    assert subscriptions.unsubscribe('a', DAY) == PROTOCOL_FULL
+    assert subscriptions.unsubscribe('a', DAY) is None
+    assert subscriptions.unsubscribe('nobody', DAY) is None
+    assert subscriptions.active_dates() == [DAY, NEXT_DAY]
+
+    assert subscriptions.remove_client('b') == [DAY, NEXT_DAY]
+    assert subscriptions.remove_client('b') == []
+    assert subscriptions.active_dates() == []
+    assert subscriptions.subscriber_count(DAY) == 0
+    # a stays connected, viewing nothing
+    assert subscriptions.stats() == (1, 0)
+
+
+def test_concurrent_subscriptions_leave_a_consistent_index():
+    subscriptions = DeskSubscriptions()
+    days = [f'2025-01-{day:02d}' for day in range(1, 11)]
+
+    def client(sid):
+        subscriptions.add_client(sid)
+        for _ in range(20):
+            for day in days:
+                subscriptions.subscribe(sid, day, PROTOCOL_DELTA if int(sid) % 2 else PROTOCOL_FULL)
+            for day in days[::2]:
+                subscriptions.unsubscribe(sid, day)
+        if int(sid) % 3 == 0:
+            subscriptions.remove_client(sid)
+
+    threads = [threading.Thread(target=client, args=(str(sid),)) for sid in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    remaining = [str(sid) for sid in range(12) if sid % 3]
+    assert subscriptions.active_dates() == days[1::2]
+    for day in days[1::2]:
+        assert subscriptions.subscriber_count(day) == len(remaining)
+        assert subscriptions.subscriber_count(day, PROTOCOL_DELTA) == sum(int(sid) % 2 for sid in remaining)
+    assert subscriptions.stats() == (len(remaining), len(days) // 2)
+
+
+def test_parse_dates():
+    assert parse_dates(['2025-01-02', '2025-01-01', '2025-01-02']) == [DAY, NEXT_DAY]
+    assert parse_dates(DAY) == [DAY]
+
+
+@pytest.mark.parametrize('values', [None, [], {}, ['2025-02-30'], ['tomorrow'], [20250101]])
+def test_parse_dates_rejects_bad_lists(values):
+    with pytest.raises((TypeError, ValueError)):
+        parse_dates(values)
@@ -0,0 +1,56 @@
+import json
+
+from app.utils.desk_versions import DeskVersionStore, diff_desks
+
+
+def desk(desk_id, status='available', slots=()):
+    return {'desk_id': desk_id, 'status': status, 'slots': [{'slot_id': s, 'booked': b} for s, b in slots]}
+
+
+def texts(*desks):
+    return {d['desk_id']: json.dumps(d) for d in desks}
+
+
+def test_diff_sends_new_desks_whole_and_only_changed_fields_of_others():
+    old = {1: desk(1, slots=[(10, False), (11, False)]), 2: desk(2), 3: desk(3)}
+    new = {1: desk(1, 'partial', slots=[(10, True)]), 2: desk(2), 4: desk(4)}
+    diff = diff_desks(old, new)
+    assert diff['desks'] == [
+        {'desk_id': 1, 'status': 'partial', 'slots': [{'slot_id': 10, 'booked': True}], 'removed_slots': [11]},
+        desk(4)
+    ]
+    assert diff['removed'] == [3]
+
+
+def test_first_update_is_a_full_delta_and_an_unchanged_list_is_not_sent():
+    store = DeskVersionStore()
+    delta = store.update('2025-01-01', texts(desk(1), desk(2)))
+    assert delta['base_version'] == 0 and [d['desk_id'] for d in delta['desks']] == [1, 2]
+    assert store.update('2025-01-01', texts(desk(1), desk(2))) is None
+    assert store.version('2025-01-01') == delta['version']
+
+
+def test_client_catches_up_with_deltas_or_gets_a_snapshot():
+    store = DeskVersionStore(history=2)
+    first = store.update('2025-01-01', texts(desk(1)))['version']
+    second = store.update('2025-01-01', texts(desk(1, 'booked')))
+    assert second['desks'] == [{'desk_id': 1, 'status': 'booked'}]
+    assert store.deltas_since('2025-01-01', first) == [second]
+    assert store.deltas_since('2025-01-01', second['version']) == []
+
+    store.update('2025-01-01', texts(desk(1), desk(2)))
+    store.update('2025-01-01', texts(desk(2)))
+    assert store.deltas_since('2025-01-01', first) is None
+    snapshot = store.snapshot('2025-01-01')
+    assert json.loads(snapshot['desks'].text) == [desk(2)]
+    assert snapshot['version'] == store.version('2025-01-01')
+
+
+def test_list_read_before_the_stored_one_is_ignored():
+    store = DeskVersionStore()
+    store.update('2025-01-01', texts(desk(1, 'booked')), as_of=200)
+    # a refresh that started earlier but finished later
+    assert store.update('2025-01-01', texts(desk(1)), as_of=100) is None
+    assert store.desks('2025-01-01') == texts(desk(1, 'booked'))
+    assert store.refreshed_at('2025-01-01') == 200
+    assert store.update('2025-01-01', texts(desk(1)), as_of=300) is not None
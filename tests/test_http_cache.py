@@ -0,0 +1,176 @@
+import gzip
+import time
+import zlib
+
+import pytest
+from flask import Flask, jsonify
+from werkzeug.http import http_date
+
+from app.config.cache import HTTP_COMPRESSION_CONFIG
+from app.utils.http_cache import Validator, compressed, conditional_response
+
+BODY = {'desks': ['A-101'] * 200}
+
+
+@pytest.fixture
+def validator():
+    return Validator('v42', changed_at=time.time() - 10.5)
+
+
+@pytest.fixture
+def client(validator):
+    app = Flask(__name__)
+    app.calls = 0
+
+    @app.route('/desks')
+    @compressed
+    @conditional_response(lambda: app.validator)
+    def desks():
+        app.calls += 1
+        return jsonify(BODY)
+
+    @app.route('/missing')
+    @compressed
+    @conditional_response(lambda: app.validator)
+    def missing():
+        return jsonify({'error': 'Not found'}), 404
+
+    app.validator = validator
+    client = app.test_client()
+    client.app = app
+    return client
+
+
+def get(client, **headers):
+    return client.get('/desks', headers=headers)
+
+
+def jsonify_bytes(client):
+    with client.app.app_context():
+        return jsonify(BODY).get_data()
+
+
+def test_first_request_runs_the_view_and_sets_validators(client, validator):
+    response = get(client)
+
+    assert response.status_code == 200
+    assert response.get_etag() == ('v42', False)
+    assert response.last_modified.timestamp() == int(validator.changed_at) + 1
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert client.app.calls == 1
+
+
+@pytest.mark.parametrize('if_none_match', ['"v42"', 'W/"v42"', '"v41", "v42"', '*'])
+def test_if_none_match_answers_304_without_running_the_view(client, if_none_match):
+    response = get(client, **{'If-None-Match': if_none_match})
+
+    assert response.status_code == 304
+    assert response.get_etag() == ('v42', False)
+    assert response.get_data() == b''
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert client.app.calls == 0
+
+
+def test_if_none_match_with_another_tag_runs_the_view(client, validator):
+    # If-None-Match takes precedence: a matching date alone does not give a 304
+    response = get(client, **{'If-None-Match': '"v41"', 'If-Modified-Since': http_date(time.time())})
+
+    assert response.status_code == 200
+    assert client.app.calls == 1
+
+
+def test_if_modified_since_compares_to_the_second_after_the_change(client, validator):
+    last_modified = get(client).headers['Last-Modified']
+
+    assert get(client, **{'If-Modified-Since': last_modified}).status_code == 304
+    # The second the change happened in could hold later changes too
+    assert get(client, **{'If-Modified-Since': http_date(int(validator.changed_at))}).status_code == 200
+    assert client.app.calls == 2
+
+
+def test_last_modified_is_withheld_during_the_second_of_the_change(client):
+    # Half a second ahead, so the request is still within the change's second whenever it crosses one
+    client.app.validator = Validator('v43', changed_at=time.time() + 0.5)
+
+    response = get(client, **{'If-Modified-Since': http_date(time.time() + 2)})
+
+    assert response.status_code == 304
+    assert response.last_modified is None
+
+
+def test_no_validator_always_runs_the_view(client):
+    client.app.validator = None
+
+    response = get(client, **{'If-None-Match': '*'})
+
+    assert response.status_code == 200
+    assert response.get_etag() == (None, None)
+    assert client.app.calls == 1
+
+
+def test_errors_are_returned_untagged(client):
+    response = client.get('/missing', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 404
+    assert response.get_etag() == (None, None)
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip', 'gzip'),
+    ('deflate', 'deflate'),
+    ('gzip, deflate, br', 'gzip'),
+    ('deflate, gzip', 'gzip'),
+    ('gzip;q=0.5, deflate', 'deflate'),
+    ('gzip;q=0, deflate', 'deflate'),
+    ('*', 'gzip'),
+    ('gzip;q=0, deflate;q=0', None),
+    ('br, identity', None),
+    ('', None)
+])
+def test_accept_encoding_negotiation(client, accept_encoding, expected):
+    response = get(client, **{'Accept-Encoding': accept_encoding})
+
+    assert response.headers.get('Content-Encoding') == expected
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    body = response.get_data()
+    if expected == 'gzip':
+        body = gzip.decompress(body)
+    elif expected == 'deflate':
+        body = zlib.decompress(body)
+    assert response.content_length == len(response.get_data())
+    assert body == jsonify_bytes(client)
+
+
+def test_bodies_under_the_minimum_size_are_sent_uncompressed(client, monkeypatch):
+    size = len(jsonify_bytes(client))
+
+    monkeypatch.setitem(HTTP_COMPRESSION_CONFIG, 'min_size', size + 1)
+    assert 'Content-Encoding' not in get(client, **{'Accept-Encoding': 'gzip'}).headers
+
+    monkeypatch.setitem(HTTP_COMPRESSION_CONFIG, 'min_size', size)
+    assert get(client, **{'Accept-Encoding': 'gzip'}).headers['Content-Encoding'] == 'gzip'
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'deflate'])
+def test_compressed_bodies_carry_an_encoding_suffix_on_the_etag(client, encoding):
+    response = get(client, **{'Accept-Encoding': encoding})
+    assert response.get_etag() == (f'v42-{encoding}', False)
+
+    revalidated = get(client, **{'Accept-Encoding': encoding, 'If-None-Match': response.headers['ETag']})
+
+    assert revalidated.status_code == 304
+    assert revalidated.get_etag() == (f'v42-{encoding}', False)
+    assert 'Content-Encoding' not in revalidated.headers
+    assert client.app.calls == 1
+
+
+def test_a_changed_version_invalidates_compressed_tags(client):
+    tag = get(client, **{'Accept-Encoding': 'gzip'}).headers['ETag']
+    client.app.validator = Validator('v43')
+
+    response = get(client, **{'Accept-Encoding': 'gzip', 'If-None-Match': tag})
+
+    assert response.status_code == 200
+    assert response.get_etag() == ('v43-gzip', False)
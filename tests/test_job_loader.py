@@ -0,0 +1,129 @@
+import csv
+import io
+
+from app.utils import job_loader
+from app.utils.job_loader import CopyStream, load_jobs, staging_rows
+from helper import crawl_state
+
+
+def scraped(url, description='Build things.', **fields):
+    row = {'Title': 'Developer', 'Company': 'Acme', 'Salary': 'Not Disclosed', 'Location': 'Chennai',
+           'Skills': 'Python, SQL', 'URL': url, 'Description': description}
+    row.update(fields)
+    return row
+
+
+def read_all(stream, size):
+    chunks = []
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return ''.join(chunks)
+        chunks.append(chunk)
+
+
+def test_loader_and_scraper_share_the_job_key():
+    assert job_loader.job_key is crawl_state.job_key
+
+
+def test_staging_rows_strip_the_listing_query_from_urls():
+    rows = list(staging_rows([scraped(' https://www.naukri.com/job-listings-dev-1?src=srp&sid=9#apply ')]))
+
+    assert rows == [('https://www.naukri.com/job-listings-dev-1', 'Developer', 'Acme', 'Not Disclosed', 'Chennai',
+                     'Python, SQL', 'Build things.')]
+
+
+def test_staging_rows_store_no_description_as_null():
+    rows = staging_rows([scraped(f'https://x/job-{i}', description) for i, description in
+                         enumerate(job_loader.NO_DESCRIPTION + ('  N/A ', None))])
+
+    assert [row[-1] for row in rows] == [None] * (len(job_loader.NO_DESCRIPTION) + 2)
+
+
+def test_staging_rows_skip_and_count_rows_without_a_job_url():
+    skipped = [0]
+    rows = list(staging_rows([scraped('https://x/job-1'), scraped(''), scraped('N/A'), {'Title': 'No URL'},
+                              scraped('https://x/job-2', Title='', Salary=None)], skipped))
+
+    assert [row[0] for row in rows] == ['https://x/job-1', 'https://x/job-2']
+    assert rows[1][1:4] == (None, 'Acme', None)
+    assert skipped == [3]
+
+
+def test_copy_stream_quotes_fields_as_csv():
+    row = ('https://x/job-1', 'Dev, "Senior"', None, '', 'Chennai', 'Python, SQL', 'Line one\nline two\r\n')
+    stream = CopyStream(iter([row]), limit=10)
+
+    data = read_all(stream, 7)
+
+    assert data == ('https://x/job-1,"Dev, ""Senior""",,,Chennai,"Python, SQL",'
+                    '"Line one\nline two\r\n"\n')
+    assert next(csv.reader(io.StringIO(data))) == ['https://x/job-1', 'Dev, "Senior"', '', '', 'Chennai',
+                                                   'Python, SQL', 'Line one\nline two\r\n']
+
+
+def test_copy_stream_reads_at_most_limit_rows_per_batch():
+    rows = iter([(f'https://x/job-{i}', 'Dev') for i in range(5)])
+
+    first, second, third = CopyStream(rows, 2), CopyStream(rows, 2), CopyStream(rows, 2)
+
+    assert read_all(first, 5) == 'https://x/job-0,Dev\nhttps://x/job-1,Dev\n'
+    assert (first.count, first.exhausted) == (2, False)
+    assert read_all(second, -1) == 'https://x/job-2,Dev\nhttps://x/job-3,Dev\n'
+    assert (second.count, second.exhausted) == (2, False)
+    assert read_all(third, 64 * 1024) == 'https://x/job-4,Dev\n'
+    assert (third.count, third.exhausted) == (1, True)
+
+
+def test_copy_stream_on_an_empty_iterator_is_exhausted():
+    stream = CopyStream(iter([]), 2)
+
+    assert stream.read(100) == ''
+    assert (stream.count, stream.exhausted) == (0, True)
+
+
+def stored_jobs(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT url, title, skills, description, updated_at FROM sena.jobs ORDER BY url")
+    return {url: (title, skills, description, updated_at) for url, title, skills, description, updated_at
+            in cursor.fetchall()}
+
+
+def test_load_jobs_merges_batches_into_sena_jobs(database):
+    cursor = database.cursor()
+    cursor.execute("TRUNCATE sena.jobs")
+    database.commit()
+    first = [scraped(f'https://x/job-{i}?src=srp', Title=f'Developer {i}') for i in range(5)]
+    first.append(scraped('https://x/job-0?src=again', Title='Developer 0 (relisted)'))
+
+    totals = load_jobs(database, staging_rows(first), batch=4)
+
+    assert (totals['rows'], totals['inserted'], totals['updated']) == (6, 5, 1)
+    jobs = stored_jobs(database)
+    assert sorted(jobs) == [f'https://x/job-{i}' for i in range(5)]
+    assert jobs['https://x/job-0'][:3] == ('Developer 0 (relisted)', ['Python', 'SQL'], 'Build things.')
+
+    second = [scraped('https://x/job-1', 'Job description not found.', Title='Developer 1'),
+              scraped('https://x/job-2', Title='Lead Developer 2'),
+              scraped('https://x/job-9', 'N/A', Skills='')]
+    totals = load_jobs(database, staging_rows(second), batch=2)
+
+    assert (totals['rows'], totals['inserted'], totals['updated']) == (3, 1, 2)
+    after = stored_jobs(database)
+    # Nothing scraped changed for job-1 (its description was not found): its row keeps description and updated_at
+    assert after['https://x/job-1'] == jobs['https://x/job-1']
+    assert after['https://x/job-2'][0] == 'Lead Developer 2'
+    assert after['https://x/job-2'][3] > jobs['https://x/job-2'][3]
+    assert after['https://x/job-9'][1:3] == ([], None)
+
+
+def test_load_jobs_stops_after_an_exact_last_batch(database):
+    cursor = database.cursor()
+    cursor.execute("TRUNCATE sena.jobs")
+    database.commit()
+
+    totals = load_jobs(database, staging_rows(scraped(f'https://x/job-{i}') for i in range(4)), batch=2)
+
+    assert (totals['rows'], totals['inserted'], totals['updated']) == (4, 4, 0)
+    cursor.execute("SELECT count(*) FROM sena.jobs")
+    assert cursor.fetchone() == (4,)
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from app.utils.leader_election import LeaderElection
+
+
+def election(check_interval=0.04):
+    events = []
+    leader = LeaderElection('tests', on_elected=lambda: events.append('elected'),
+                            on_demoted=lambda: events.append('demoted'), check_interval=check_interval)
+    return leader, events
+
+
+def overdue(leader):
+    leader._check_started = time.monotonic() - leader.check_interval * 2
+
+
+def test_watch_steps_down_while_a_check_is_stuck():
+    leader, events = election()
+    term = leader._elect()
+    assert leader.is_leader
+
+    overdue(leader)
+    assert not leader.is_leader
+    leader._watch(term)
+
+    assert not leader._leader.is_set()
+    assert events == ['demoted']
+
+
+def test_a_stale_term_cannot_step_down_the_next():
+    leader, events = election()
+    first = leader._elect()
+    leader._step_down()
+    second = leader._elect()
+    assert second != first
+
+    leader._step_down(first)
+    assert leader._holds(second)
+
+    # The first term's watcher exits as soon as it runs, even with the new term's check overdue
+    overdue(leader)
+    leader._watch(first)
+    assert leader._holds(second)
+    assert events == ['demoted']
+
+    leader._step_down(second)
+    assert not leader._leader.is_set()
+    assert events == ['demoted', 'demoted']
+
+
+def test_a_running_watcher_exits_when_its_term_ends():
+    leader, events = election()
+    first = leader._elect()
+    watcher = threading.Thread(target=leader._watch, args=(first,), daemon=True)
+    watcher.start()
+
+    leader._step_down()
+    second = leader._elect()
+    overdue(leader)
+    watcher.join(timeout=1)
+
+    assert not watcher.is_alive()
+    assert leader._holds(second)
+    assert events == ['demoted']
@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from flask import Flask
+
+from app.config.auth import ADMIN_API_CONFIG
+from app.models import master_data_model
+from app.routes import master_data_routes
+from app.utils.cache import TTLCache
+from app.utils.cache_invalidation import MASTER_DATA_CHANNEL, InvalidationListener
+
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache(ttl=60)
+    cache.set('all', 1)
+    cache.set('short', 2, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get('all') == 1
+    assert cache.get('short', 'gone') == 'gone'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations']) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+
+def test_invalidate_one_key_or_everything():
+    cache = TTLCache()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.invalidate('a')
+    assert cache.get('a') is None and cache.get('b') == 2
+    cache.invalidate()
+    assert cache.stats()['size'] == 0
+
+
+def test_listener_delivers_each_notified_channel_once(monkeypatch):
+    calls = []
+
+    class Notify:
+        channel = MASTER_DATA_CHANNEL
+
+    class Connection:
+        notifies = [Notify(), Notify()]
+
+        def poll(self):
+            pass
+
+    connection = Connection()
+    # one pass of the listen loop, then stop it at the next select
+    selects = iter([([connection], [], [])])
+    monkeypatch.setattr('app.utils.cache_invalidation.select.select', lambda *args: next(selects))
+    listener = InvalidationListener({MASTER_DATA_CHANNEL: lambda: calls.append(1)})
+    with pytest.raises(StopIteration):
+        listener._listen(connection)
+    assert calls == [1]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(ADMIN_API_CONFIG, 'tokens', ['admin-secret'])
+    app = Flask(__name__)
+    app.register_blueprint(master_data_routes.master_data_bp)
+    return app.test_client()
+
+
+def test_invalidate_needs_an_admin_token(client, monkeypatch):
+    published = []
+    monkeypatch.setattr(master_data_routes, 'publish', lambda channel: published.append(channel) or True)
+    assert client.post('/api/master-data/cache/invalidate').status_code == 401
+    response = client.post('/api/master-data/cache/invalidate', headers={'Authorization': 'Bearer nope'})
+    assert response.status_code == 403
+    assert published == []
+
+
+def test_invalidate_clears_this_process_and_notifies_the_others(client, monkeypatch):
+    published = []
+    monkeypatch.setattr(master_data_routes, 'publish', lambda channel: published.append(channel) or True)
+    master_data_model._cache.set('all', {'locations': []})
+    response = client.post('/api/master-data/cache/invalidate', headers={'Authorization': 'Bearer admin-secret'})
+    assert response.status_code == 200
+    assert master_data_model._cache.stats()['size'] == 0
+    assert published == [MASTER_DATA_CHANNEL]
+
+    monkeypatch.setattr(master_data_routes, 'publish', lambda channel: False)
+    response = client.post('/api/master-data/cache/invalidate', headers={'Authorization': 'Bearer admin-secret'})
+    assert response.status_code == 503
+
+
+class MasterDataConnection:
+    """Answers the master data query with rows[0], then rows[1], ...; before_query(n) runs first."""
+
+    def __init__(self, rows, before_query=lambda n: None):
+        self.rows = rows
+        self.before_query = before_query
+        self.queries = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, vars=None):
+        self.queries += 1
+        self.before_query(self.queries)
+
+    def fetchone(self):
+        return self.rows[self.queries - 1]
+
+
+@pytest.fixture
+def master_data_db(monkeypatch):
+    def use(connection):
+        @contextmanager
+        def db_connection(db_config=None):
+            yield connection
+        monkeypatch.setattr(master_data_model, 'db_connection', db_connection)
+        return connection
+    master_data_model.MasterData.invalidate_cache()
+    yield use
+    master_data_model.MasterData.invalidate_cache()
+
+
+OLD = ([{'location_id': 1, 'location_name': 'Chennai'}], [], [])
+NEW = ([{'location_id': 1, 'location_name': 'Chennai'}, {'location_id': 2, 'location_name': 'Pune'}], [], [])
+
+
+def test_load_that_raced_an_invalidation_is_not_cached(master_data_db):
+    MasterData = master_data_model.MasterData
+    master_data_db(MasterDataConnection([OLD, NEW], lambda n: n == 1 and MasterData.invalidate_cache()))
+    assert MasterData.get_locations()[0] == OLD[0]
+    assert master_data_model._cache.stats()['size'] == 0
+    assert MasterData.get_locations()[0] == NEW[0]
+    assert master_data_model._cache.stats()['size'] == 1
+
+
+def test_requests_after_an_invalidation_do_not_join_an_older_load(master_data_db):
+    MasterData = master_data_model.MasterData
+    release, started = threading.Event(), threading.Event()
+
+    def before_query(n):
+        if n == 1:
+            started.set()
+            release.wait(5)
+
+    connection = master_data_db(MasterDataConnection([OLD, NEW], before_query))
+    early = threading.Thread(target=MasterData.get_locations)
+    early.start()
+    started.wait(5)
+    MasterData.invalidate_cache()
+    assert MasterData.get_locations()[0] == NEW[0]
+    release.set()
+    early.join(5)
+    assert connection.queries == 2
+    assert MasterData.get_locations()[0] == NEW[0]
+    assert connection.queries == 2
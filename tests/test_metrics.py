@@ -0,0 +1,176 @@
+import logging
+import re
+
+import pytest
+from flask import Flask
+
+from app.config.observability import METRICS_CONFIG
+from app.routes.health_routes import health_bp
+from app.utils import logging_utils, metrics
+from app.utils.instrumentation import instrument_app
+from app.utils.logging_utils import RateLimitFilter
+
+# One sample line of the Prometheus text format (0.0.4)
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? '
+                    r'(-?[0-9.e+-]+|\+Inf|-Inf|NaN)$')
+
+
+def parse(text):
+    """{name: [(labels text, value)]}, checking every line is a sample or a HELP / TYPE comment."""
+    assert text.endswith('\n')
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            continue
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            types[name] = kind
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        samples.setdefault(match.group(1), []).append((match.group(2) or '', float(match.group(3))))
+    return samples, types
+
+
+def test_render_counters_and_escaped_labels():
+    registry = metrics.Registry()
+    requests = metrics.Counter('test_requests_total', 'Requests', ['route', 'note'], registry=registry)
+    requests.labels('/api/desks', 'say "hi"\\\n').inc()
+    requests.labels('/api/desks', 'say "hi"\\\n').inc(2)
+    metrics.Counter('test_errors_total', 'Errors', registry=registry).inc()
+
+    text = registry.render()
+
+    assert text == ('# HELP test_requests_total Requests\n'
+                    '# TYPE test_requests_total counter\n'
+                    'test_requests_total{route="/api/desks",note="say \\"hi\\"\\\\\\n"} 3.0\n'
+                    '# HELP test_errors_total Errors\n'
+                    '# TYPE test_errors_total counter\n'
+                    'test_errors_total 1.0\n')
+    parse(text)
+    with pytest.raises(ValueError):
+        requests.labels('/api/desks')
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    registry = metrics.Registry()
+    latency = metrics.Histogram('test_latency_seconds', 'Latency', ['route'], buckets=(0.5, 0.1, 1.0),
+                                registry=registry)
+    for value in (0.05, 0.1, 0.3, 1.0, 7.0):
+        latency.labels('/api/desks').observe(value)
+
+    samples, types = parse(registry.render())
+
+    assert types == {'test_latency_seconds': 'histogram'}
+    assert samples['test_latency_seconds_bucket'] == [
+        ('{route="/api/desks",le="0.1"}', 2), ('{route="/api/desks",le="0.5"}', 3),
+        ('{route="/api/desks",le="1.0"}', 4), ('{route="/api/desks",le="+Inf"}', 5)]
+    assert samples['test_latency_seconds_sum'] == [('{route="/api/desks"}', pytest.approx(8.45))]
+    assert samples['test_latency_seconds_count'] == [('{route="/api/desks"}', 5)]
+
+
+def test_callback_metrics_are_read_at_scrape_time():
+    registry = metrics.Registry()
+    sizes = {'default': 3}
+    metrics.CallbackMetric('test_pool_size', 'Pool size', ['pool'], lambda: [((name,), size) for name, size
+                                                                             in sizes.items()], registry=registry)
+    metrics.CallbackMetric('test_broken', 'Fails to collect', [], lambda: 1 / 0, registry=registry)
+
+    sizes['default'] = 5
+    samples, types = parse(registry.render())
+
+    assert samples == {'test_pool_size': [('{pool="default"}', 5)]}
+    assert types == {'test_pool_size': 'gauge', 'test_broken': 'gauge'}
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    instrument_app(app)
+    app.register_blueprint(health_bp)
+
+    @app.route('/api/ping')
+    def ping():
+        return 'pong'
+
+    return app.test_client()
+
+
+def test_metrics_endpoint_exposes_request_latency(client):
+    client.get('/api/ping')
+    client.get('/api/ping')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    samples, types = parse(response.get_data(as_text=True))
+    assert types['http_request_duration_seconds'] == 'histogram'
+    labels = '{blueprint="",endpoint="ping",method="GET",status="200"'
+    buckets = [value for text, value in samples['http_request_duration_seconds_bucket'] if text.startswith(labels)]
+    assert len(buckets) == len(metrics.LATENCY_BUCKETS) + 1
+    assert buckets == sorted(buckets)
+    count = dict(samples['http_request_duration_seconds_count'])[labels + '}']
+    assert count >= 2 and buckets[-1] == count
+
+
+def test_metrics_endpoint_can_be_disabled(client, monkeypatch):
+    monkeypatch.setitem(METRICS_CONFIG, 'enabled', False)
+
+    assert client.get('/metrics').status_code == 404
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    """Messages a logger with a RateLimitFilter (burst 2 per 60s) lets through, and the clock it uses."""
+    clock = Clock()
+    monkeypatch.setattr(logging_utils.time, 'monotonic', clock)
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(record.getMessage())
+    handler.addFilter(RateLimitFilter(burst=2, period=60))
+    logger = logging.getLogger('tests.rate_limit')
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger, records, clock
+    logger.removeHandler(handler)
+    logger.setLevel(logging.NOTSET)
+    logger.propagate = True
+
+
+def test_rate_limit_filter_suppresses_repeats_of_a_message(logged):
+    logger, records, clock = logged
+    for attempt in range(5):
+        logger.warning("Listener reconnect failed: %s", f"attempt {attempt}")
+    logger.warning("Pool exhausted")
+    logger.error("Listener reconnect failed: %s", "as an error")
+
+    assert records == ["Listener reconnect failed: attempt 0", "Listener reconnect failed: attempt 1",
+                       "Pool exhausted", "Listener reconnect failed: as an error"]
+
+    clock.now = 1059.9
+    logger.warning("Listener reconnect failed: %s", "still in the window")
+    clock.now = 1060.0
+    logger.warning("Listener reconnect failed: %s", "next window")
+    logger.warning("Listener reconnect failed: %s", "again")
+
+    assert records[4:] == ["Listener reconnect failed: next window (suppressed 4 similar messages)",
+                           "Listener reconnect failed: again"]
+
+
+def test_rate_limit_filter_reports_nothing_when_nothing_was_dropped(logged):
+    logger, records, clock = logged
+    logger.info("Desk %s updated", 1)
+    clock.now += 60
+    logger.info("Desk %s updated", 2)
+
+    assert records == ["Desk 1 updated", "Desk 2 updated"]
@@ -0,0 +1,239 @@
+import csv
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('bs4')
+pytest.importorskip('requests')
+pytest.importorskip('selenium')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'helper'))
+
+import naukriScrapper
+from crawl_state import CrawlState
+from replay_server import PageArchive, make_handler
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'naukri')
+RESULTS_PATH = '/developer-jobs-in-chennai?k=developer&l=chennai'
+JOB_PATH = '/job-listings-python-developer-acme-chennai-0-to-3-years-110125000001?src=jobsearchDesk&sid=1'
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """The fixture pages, captured from naukri.com; pages saved to it later are served too."""
+    archive = PageArchive(str(tmp_path / 'pages'))
+    archive.save(naukriScrapper.BASE_URL + RESULTS_PATH, fixture('results.html'))
+    archive.save(naukriScrapper.BASE_URL + JOB_PATH, fixture('job.html'))
+    return archive
+
+
+@pytest.fixture
+def replay(archive):
+    """Base URL of a replay server for the archive."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(archive))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    fetcher = naukriScrapper.HttpFetcher(workers=2, timeout=5, retries=0)
+    yield fetcher
+    fetcher.close()
+
+
+def test_parsers_agree_on_a_replayed_results_page(replay, fetcher):
+    page = fetcher.get(replay + RESULTS_PATH)
+    jobs = naukriScrapper.extract_job_details(page, replay)
+    assert jobs == naukriScrapper.extract_job_details_soup(page, replay)
+    assert jobs == naukriScrapper.extract_job_details_soup(page, replay, only_listings=False)
+    assert jobs == [
+        {'title': 'Python Developer – Platform', 'company': 'Acme Software Pvt. Ltd.', 'salary': '5-9 Lacs PA',
+         'location': 'Chennai, Bengaluru', 'skills': ['Python', 'Django', 'SQL'], 'url': replay + JOB_PATH},
+        {'title': 'Java Engineer', 'company': 'Globex & Sons', 'salary': 'Not Disclosed', 'location': 'Chennai',
+         'skills': ['Java', 'C&C++'],
+         'url': replay + '/job-listings-java-engineer-globex-chennai-2-to-5-years-110125000002'},
+        {'title': None, 'company': 'Initech', 'salary': 'Not Disclosed', 'location': None, 'skills': [], 'url': None},
+    ]
+
+
+def test_job_description_is_read_from_the_served_page(replay, fetcher):
+    jobs = naukriScrapper.extract_job_details(fetcher.get(replay + RESULTS_PATH), replay)
+    description = naukriScrapper.fetch_description_http(fetcher, jobs[0]['url'])
+    assert description == "Build and run the platform's APIs.\nPython and SQL"
+    # captured without a description page
+    assert naukriScrapper.fetch_description_http(fetcher, jobs[1]['url']) is None
+
+
+class FakeDriver:
+    """Stands in for Chrome: serves each URL the rendered page given for it."""
+
+    def __init__(self, rendered):
+        self.rendered = rendered
+        self.page_source = ''
+        self.quit_called = False
+
+    def get(self, url):
+        self.page_source = self.rendered[url]
+
+    def find_elements(self, by, selector):
+        return ['description'] if 'JDC__dang-inner-html' in self.page_source else []
+
+    def execute_script(self, script):
+        return 'complete'
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_driver_pool_reuses_healthy_drivers_and_quits_broken_ones():
+    started = []
+    pool = naukriScrapper.DriverPool(1, factory=lambda: started.append(FakeDriver({})) or started[-1])
+    with pool.driver() as driver:
+        pass
+    with pytest.raises(naukriScrapper.TimeoutException):
+        with pool.driver() as again:
+            assert again is driver
+            raise naukriScrapper.TimeoutException()
+    with pytest.raises(naukriScrapper.WebDriverException):
+        with pool.driver():
+            raise naukriScrapper.WebDriverException('chrome not reachable')
+    assert driver.quit_called
+    with pool.driver() as replacement:
+        assert replacement is not driver
+    pool.close()
+    assert len(started) == 2 and replacement.quit_called
+
+
+def test_browser_renders_only_what_http_could_not_get(replay, fetcher):
+    jobs = naukriScrapper.extract_job_details(fetcher.get(replay + RESULTS_PATH), replay)
+    rendered = {jobs[1]['url']: '<div class="styles_JDC__dang-inner-html__h0K4t">Write Java services.</div>'}
+    pool = naukriScrapper.DriverPool(2, factory=lambda: FakeDriver(rendered))
+    finished = []
+    stats = naukriScrapper.fetch_descriptions(jobs, pool, fetcher=fetcher, on_job=finished.append)
+    pool.close()
+    assert [job['description'] for job in jobs] == [
+        "Build and run the platform's APIs.\nPython and SQL", 'Write Java services.', 'URL not available']
+    assert sorted(job['company'] for job in finished) == ['Acme Software Pvt. Ltd.', 'Globex & Sons', 'Initech']
+    assert (stats.tried['http'], stats.found['http'], stats.tried['browser'], stats.found['browser']) == (2, 1, 1, 1)
+    assert stats.missing == 0
+
+
+JAVA_JOB_PATH = '/job-listings-java-engineer-globex-chennai-2-to-5-years-110125000002'
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+def test_crawl_state_keys_jobs_by_url_without_query(tmp_path):
+    state = CrawlState(str(tmp_path / 'crawl.sqlite'))
+    state.mark('https://www.naukri.com/job-listings-dev-1?src=jobsearchDesk&sid=1', True)
+    assert state.is_done('https://www.naukri.com/job-listings-dev-1?src=similar_jobs#apply')
+    assert not state.is_done('https://www.naukri.com/job-listings-dev-2?src=jobsearchDesk')
+    state.close()
+
+
+def test_crawl_state_retries_failed_jobs_and_counts_attempts(tmp_path):
+    path = str(tmp_path / 'crawl.sqlite')
+    state = CrawlState(path)
+    state.mark('https://www.naukri.com/job-listings-dev-1?sid=1', False)
+    assert not state.is_done('https://www.naukri.com/job-listings-dev-1')
+    state.close()
+
+    state = CrawlState(path)
+    state.mark('https://www.naukri.com/job-listings-dev-1?sid=2', False)
+    state.mark('https://www.naukri.com/job-listings-dev-1?sid=3', True)
+    assert state.is_done('https://www.naukri.com/job-listings-dev-1')
+    assert state.counts() == {'done': 1}
+    assert state.conn.execute("SELECT attempts FROM jobs").fetchall() == [(3,)]
+    state.close()
+
+
+def test_csv_sink_writes_the_header_only_to_a_new_file(tmp_path):
+    path = str(tmp_path / 'jobs.csv')
+    job = {'title': 'Java Engineer', 'company': 'Globex & Sons', 'salary': 'Not Disclosed', 'location': 'Chennai',
+           'skills': ['Java', 'C&C++'], 'url': 'https://www.naukri.com/job-listings-java', 'description': 'Java,\nSQL'}
+    sink = naukriScrapper.CsvSink(path)
+    sink.write(job)
+    # Flushed as written, before the sink is closed
+    assert len(read_csv(path)) == 2
+    sink.close()
+
+    resumed = naukriScrapper.CsvSink(path)
+    resumed.write(dict(job, description=None))
+    resumed.close()
+    rows = read_csv(path)
+    assert rows[0] == naukriScrapper.CSV_FIELDS
+    assert rows[1:] == [
+        ['Java Engineer', 'Globex & Sons', 'Not Disclosed', 'Chennai', 'Java, C&C++',
+         'https://www.naukri.com/job-listings-java', 'Java,\nSQL'],
+        ['Java Engineer', 'Globex & Sons', 'Not Disclosed', 'Chennai', 'Java, C&C++',
+         'https://www.naukri.com/job-listings-java', '']]
+    assert (sink.rows, resumed.rows) == (1, 1)
+
+
+@pytest.mark.parametrize('url, page, expected', [
+    ('https://www.naukri.com/python-jobs-in-chennai?k=python&l=chennai', 1,
+     'https://www.naukri.com/python-jobs-in-chennai?k=python&l=chennai'),
+    ('https://www.naukri.com/python-jobs-in-chennai?k=python&l=chennai', 2,
+     'https://www.naukri.com/python-jobs-in-chennai-2?k=python&l=chennai'),
+    ('http://127.0.0.1:8765/captured/listing.html', 3, 'http://127.0.0.1:8765/captured/listing-3.html'),
+    ('file:///tmp/v1.2/listing.html?saved=1', 10, 'file:///tmp/v1.2/listing-10.html?saved=1'),
+    ('http://127.0.0.1:8765/v1.2/python-jobs', 2, 'http://127.0.0.1:8765/v1.2/python-jobs-2'),
+])
+def test_results_page_url(url, page, expected):
+    assert naukriScrapper.results_page_url(url, page) == expected
+
+
+def test_crawl_resumes_where_it_left_off(archive, replay, fetcher, tmp_path):
+    # Past the last page the site lists the same jobs again
+    archive.save(naukriScrapper.BASE_URL + naukriScrapper.results_page_url(RESULTS_PATH, 2), fixture('results.html'))
+    state_path, csv_path = str(tmp_path / 'crawl.sqlite'), str(tmp_path / 'jobs.csv')
+
+    def run():
+        state, sink, stats = CrawlState(state_path), naukriScrapper.CsvSink(csv_path), naukriScrapper.PathStats()
+        try:
+            naukriScrapper.crawl(replay + RESULTS_PATH, fetcher, None, state, sink, max_pages=5, stats=stats)
+            return state.counts(), sink.rows, stats.tried['http']
+        finally:
+            sink.close()
+            state.close()
+
+    # The Java job's page was not captured: it fails and is not written out
+    assert run() == ({'done': 1, 'failed': 1}, 2, 2)
+    assert sorted(row[0] for row in read_csv(csv_path)[1:]) == ['', 'Python Developer – Platform']
+
+    archive.save(naukriScrapper.BASE_URL + JAVA_JOB_PATH,
+                 '<div class="styles_JDC__dang-inner-html__h0K4t">Write Java services.</div>')
+    # Only the failed job is fetched again; the job without a URL cannot be tracked and is written again
+    assert run() == ({'done': 2}, 2, 1)
+    rows = read_csv(csv_path)
+    assert rows.count(naukriScrapper.CSV_FIELDS) == 1
+    assert sorted((row[0], row[-1]) for row in rows[1:]) == [
+        ('', 'URL not available'), ('', 'URL not available'), ('Java Engineer', 'Write Java services.'),
+        ("Python Developer – Platform", "Build and run the platform's APIs.\nPython and SQL")]
+
+    assert run() == ({'done': 2}, 1, 0)
+
+
+def test_crawl_stops_at_a_page_without_jobs(replay, fetcher, tmp_path, capsys):
+    state, sink = CrawlState(str(tmp_path / 'crawl.sqlite')), naukriScrapper.CsvSink(str(tmp_path / 'jobs.csv'))
+    naukriScrapper.crawl(replay + RESULTS_PATH, fetcher, None, state, sink, max_pages=5)
+    sink.close()
+    state.close()
+    out = capsys.readouterr().out
+    assert 'Loading page 2' in out and 'No new jobs on page 2; stopping' in out
+    assert 'Loading page 3' not in out
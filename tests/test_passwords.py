@@ -0,0 +1,81 @@
+import pytest
+from flask import Flask
+
+from app.config.auth import PASSWORD_HASH_CONFIG
+from app.routes.auth_routes import PASSWORDS_REHASHED, rehash_password
+from app.utils import passwords
+from app.utils.passwords import PasswordHashingBusy, busy_response, hash_password, is_hashed, verify_password
+
+FAST_METHOD = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture(autouse=True)
+def fast_hashes(monkeypatch):
+    monkeypatch.setitem(PASSWORD_HASH_CONFIG, 'method', FAST_METHOD)
+
+
+def test_hash_verifies_and_needs_no_rehash():
+    stored = hash_password('s3cret')
+    assert is_hashed(stored) and stored.startswith(FAST_METHOD + '$')
+    assert verify_password(stored, 's3cret') == (True, False)
+    assert verify_password(stored, 'wrong') == (False, False)
+
+
+def test_plaintext_row_verifies_and_needs_rehash():
+    assert not is_hashed('s3cret')
+    assert verify_password('s3cret', 's3cret') == (True, True)
+    assert verify_password('s3cret', 'wrong') == (False, False)
+
+
+def test_hash_made_with_another_method_needs_rehash(monkeypatch):
+    stored = hash_password('s3cret')
+    monkeypatch.setitem(PASSWORD_HASH_CONFIG, 'method', 'pbkdf2:sha256:2000')
+    assert verify_password(stored, 's3cret') == (True, True)
+    assert verify_password(stored, 'wrong') == (False, False)
+
+
+def test_unknown_user_does_not_match():
+    assert verify_password(None, 's3cret') == (False, False)
+
+
+def test_busy_when_too_many_are_waiting(monkeypatch):
+    monkeypatch.setitem(PASSWORD_HASH_CONFIG, 'max_pending', 0)
+    with pytest.raises(PasswordHashingBusy):
+        hash_password('s3cret')
+    with pytest.raises(PasswordHashingBusy):
+        verify_password('pbkdf2:sha256:1000$salt$hash', 's3cret')
+    assert passwords.pending() == 0
+
+    with Flask(__name__).app_context():
+        response, status = busy_response()
+    assert status == 503 and response.headers['Retry-After'] == '1'
+
+
+def stored_password(conn, email):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, password FROM sena.users WHERE email = %s", (email,))
+    row = cursor.fetchone()
+    conn.commit()
+    return row
+
+
+def test_rehash_counts_only_rows_it_upgraded(database):
+    rehashed = PASSWORDS_REHASHED.labels('plaintext')
+    user_id, stored = stored_password(database, 'bob@example.com')
+    assert stored == 'secret'
+    before = rehashed.value
+
+    # The password was changed since it was read: nothing is written or counted
+    rehash_password(user_id, 'changed meanwhile', 'secret')
+    assert stored_password(database, 'bob@example.com')[1] == 'secret'
+    assert rehashed.value == before
+
+    rehash_password(user_id, stored, 'secret')
+    upgraded = stored_password(database, 'bob@example.com')[1]
+    assert is_hashed(upgraded) and verify_password(upgraded, 'secret') == (True, False)
+    assert rehashed.value == before + 1
+
+    # A second login that read the plaintext row loses the race to the first
+    rehash_password(user_id, stored, 'secret')
+    assert stored_password(database, 'bob@example.com')[1] == upgraded
+    assert rehashed.value == before + 1
@@ -0,0 +1,148 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+from flask import Flask
+from werkzeug.datastructures import MultiDict
+
+from app.models.booking_model import Booking, BookingItem
+from app.models.desk_model import DeskData, DeskFilters, _RangeGrid
+from app.routes import desk_routes
+from app.routes.desk_routes import parse_range
+
+SLOTS = [{'slot_id': 1, 'slot_type': 'Morning'}, {'slot_id': 2, 'slot_type': 'Afternoon'}]
+
+
+def test_dates_run_from_start_to_end_inclusive():
+    assert _RangeGrid('2025-02-27', '2025-03-01', SLOTS).dates == ['2025-02-27', '2025-02-28', '2025-03-01']
+    assert _RangeGrid('2024-02-28', '2024-03-01', SLOTS).dates == ['2024-02-28', '2024-02-29', '2024-03-01']
+
+    header = _RangeGrid('2025-01-01', '2025-01-01', SLOTS).header()
+
+    assert header == {'start_date': '2025-01-01', 'end_date': '2025-01-01', 'dates': ['2025-01-01'],
+                      'slots': SLOTS, 'statuses': ['available']}
+
+
+def test_rows_fill_unbooked_cells_with_available():
+    grid = _RangeGrid('2025-01-01', '2025-01-03', SLOTS)
+
+    row = grid.desk_row(7, 'A-101', [110.0, 120.0], [[1, 0, 'booked'], [2, 1, 'booked']])
+
+    assert row == {'desk_id': 7, 'desk_name': 'A-101', 'prices': [110.0, 120.0],
+                   'grid': [[0, 0], [1, 0], [0, 1]]}
+    assert grid.statuses == ['available', 'booked']
+
+
+def test_status_codes_are_shared_by_every_desk():
+    grid = _RangeGrid('2025-01-01', '2025-01-02', SLOTS)
+    header = grid.header()
+
+    first = grid.desk_row(1, 'A-101', None, [[0, 0, 'pending'], [1, 1, 'booked']])
+    second = grid.desk_row(2, 'A-201', None, [[0, 1, 'booked'], [1, 0, 'blocked'], [1, 1, 'available']])
+
+    assert grid.statuses == ['available', 'pending', 'booked', 'blocked']
+    assert first['grid'] == [[1, 0], [0, 2]]
+    assert second['grid'] == [[0, 2], [3, 0]]
+    # A desk type without prices has none for any slot
+    assert first['prices'] == [None, None]
+    # The header is a snapshot; codes added later are sent on their own when streaming
+    assert header['statuses'] == ['available']
+
+
+def test_a_range_without_matching_slots_has_empty_rows():
+    grid = _RangeGrid('2025-01-01', '2025-01-02', [])
+
+    assert grid.desk_row(1, 'A-101', None, []) == {'desk_id': 1, 'desk_name': 'A-101', 'prices': [], 'grid': [[], []]}
+
+
+def test_parse_range():
+    assert parse_range(MultiDict({'start_date': '2025-01-01', 'end_date': '2025-01-31'})) == (
+        '2025-01-01', '2025-01-31', False)
+    assert parse_range(MultiDict({'start_date': '2025-01-01', 'end_date': '2025-12-31', 'stream': '1'})) == (
+        '2025-01-01', '2025-12-31', True)
+
+
+@pytest.mark.parametrize('args, message', [
+    ({}, 'required'),
+    ({'start_date': '2025-01-01'}, 'required'),
+    ({'start_date': 'tomorrow', 'end_date': '2025-01-02'}, 'required'),
+    ({'start_date': '2025-01-01', 'end_date': '2025-02-30'}, 'required'),
+    ({'start_date': '2025-01-02', 'end_date': '2025-01-01'}, 'before'),
+    ({'start_date': '2025-01-01', 'end_date': '2025-02-01'}, 'at most 31 days'),
+    ({'start_date': '2025-01-01', 'end_date': '2026-01-02', 'stream': 'yes'}, 'at most 366 days when streamed'),
+])
+def test_parse_range_rejects_bad_ranges(args, message):
+    with pytest.raises(ValueError, match=message):
+        parse_range(MultiDict(args))
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(desk_routes.desk_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('query', [
+    '', 'start_date=2025-01-01', 'start_date=2025-13-01&end_date=2025-13-02',
+    'start_date=2025-01-02&end_date=2025-01-01', 'start_date=2025-01-01&end_date=2025-03-01',
+    'start_date=2025-01-01&end_date=2025-01-02&floor=abc', 'start_date=2025-01-01&end_date=2025-01-02&limit=0',
+    'start_date=2025-01-01&end_date=2025-01-02&city=%00', 'start_date=2025-01-01&end_date=2025-01-02&stream=1&city=%00',
+    'start_date=2025-01-01&end_date=2025-01-02&max_price=100',
+    'start_date=2025-01-01&end_date=2025-01-02&only_available=1',
+])
+def test_malformed_range_queries_are_bad_requests(client, query, monkeypatch):
+    monkeypatch.setattr(DeskData, 'get_availability_range', lambda *args, **kwargs: pytest.fail('queried'))
+    monkeypatch.setattr(DeskData, 'stream_availability_range', lambda *args, **kwargs: pytest.fail('queried'))
+
+    response = client.get(f'/api/desks/range?{query}')
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def streamed(start_date, end_date, filters):
+    """The streamed lines put back together in the layout get_availability_range returns."""
+    lines = [json.loads(line) for line in DeskData.stream_availability_range(start_date, end_date, filters)]
+    result = lines[0]
+    assert result.pop('type') == 'header'
+    result['desks'] = []
+    for line in lines[1:-1]:
+        if line.pop('type') == 'status':
+            assert line['code'] == len(result['statuses'])
+            result['statuses'].append(line['status'])
+        else:
+            result['desks'].append(line)
+    assert lines[-1] == {'type': 'end', 'desks': len(result['desks'])}
+    return result
+
+
+def test_range_against_postgres(database):
+    start = date.today() + timedelta(days=50)
+    days = [(start + timedelta(days=offset)).isoformat() for offset in range(3)]
+    cursor = database.cursor()
+    cursor.execute("SELECT id FROM sena.users WHERE email = 'bob@example.com'")
+    user_id = str(cursor.fetchone()[0])
+    assert Booking.create_bookings(user_id, [BookingItem(2, 2, days[1]), BookingItem(3, 1, days[2])])[1] == 201
+
+    result, status_code = DeskData.get_availability_range(days[0], days[2])
+
+    assert status_code == 200
+    assert result['dates'] == days
+    assert result['slots'] == SLOTS
+    assert result['statuses'] == ['available', 'booked']
+    assert [(desk['desk_name'], desk['prices'], desk['grid']) for desk in result['desks']] == [
+        ('A-101', [110.0, 120.0], [[0, 0], [0, 0], [0, 0]]),
+        ('A-201', [110.0, 120.0], [[0, 0], [0, 1], [0, 0]]),
+        ('B-101', [210.0, 220.0], [[0, 0], [0, 0], [1, 0]])]
+    assert streamed(days[0], days[2], None) == result
+
+    afternoon, _ = DeskData.get_availability_range(days[0], days[2], DeskFilters(slot_type='afternoon', city='Chennai'))
+    assert afternoon['slots'] == [SLOTS[1]]
+    assert [(desk['desk_name'], desk['prices'], desk['grid']) for desk in afternoon['desks']] == [
+        ('A-101', [120.0], [[0], [0], [0]]), ('A-201', [120.0], [[0], [1], [0]])]
+
+    page, _ = DeskData.get_availability_range(days[0], days[2], DeskFilters(limit=2))
+    assert [desk['desk_name'] for desk in page['desks']] == ['A-101', 'A-201'] and page['next_cursor'] == 2
+    page, _ = DeskData.get_availability_range(days[0], days[2], DeskFilters(limit=2, after=2))
+    assert [desk['desk_name'] for desk in page['desks']] == ['B-101'] and page['next_cursor'] is None
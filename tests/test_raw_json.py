@@ -0,0 +1,81 @@
+import datetime
+import json
+
+import pytest
+from socketio.packet import Packet
+
+from app.utils import raw_json
+from app.utils.raw_json import RawJSON
+
+DESKS = '[{"desk_id":1,"name":"A-101","slots":[{"slot_id":1,"status":"available"}]}]'
+
+
+def test_top_level_raw_json_is_written_verbatim():
+    assert raw_json.dumps(RawJSON(DESKS), separators=(',', ':')) == DESKS
+    assert raw_json.dumps(RawJSON('  {"spacing": "kept"} ')) == '  {"spacing": "kept"} '
+
+
+def test_nested_fragments_are_inserted_in_place():
+    payload = {'date': '2025-01-01', 'desks': RawJSON(DESKS), 'meta': {'counts': RawJSON('{"available":1}')}}
+
+    text = raw_json.dumps(payload, separators=(',', ':'))
+
+    assert text == ('{"date":"2025-01-01","desks":' + DESKS + ',"meta":{"counts":{"available":1}}}')
+    assert raw_json.loads(text) == {'date': '2025-01-01', 'desks': json.loads(DESKS),
+                                    'meta': {'counts': {'available': 1}}}
+
+
+def test_many_fragments_keep_their_own_positions():
+    # Fragment 1's marker is a prefix of fragment 10's, and 10 is written before 1
+    fragments = [RawJSON(f'{{"n":{i}}}') for i in range(12)]
+    payload = {'reversed': fragments[::-1], 'same': [fragments[1], fragments[1]]}
+
+    decoded = raw_json.loads(raw_json.dumps(payload))
+
+    assert decoded['reversed'] == [{'n': i} for i in reversed(range(12))]
+    assert decoded['same'] == [{'n': 1}, {'n': 1}]
+
+
+def test_fragments_do_not_match_equal_looking_strings():
+    payload = {'text': 'raw-json-0:0', 'desks': RawJSON('[]')}
+
+    assert raw_json.loads(raw_json.dumps(payload)) == {'text': 'raw-json-0:0', 'desks': []}
+
+
+def test_other_values_go_through_default():
+    def default(value):
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    payload = {'date': datetime.date(2025, 1, 1), 'desks': RawJSON(DESKS)}
+
+    assert raw_json.loads(raw_json.dumps(payload, default=default)) == {'date': '2025-01-01',
+                                                                        'desks': json.loads(DESKS)}
+
+
+def test_default_may_return_raw_json():
+    class Snapshot:
+        desks = RawJSON(DESKS)
+
+    text = raw_json.dumps({'snapshot': Snapshot()}, default=lambda value: {'desks': value.desks})
+
+    assert raw_json.loads(text) == {'snapshot': {'desks': json.loads(DESKS)}}
+
+
+def test_unserializable_values_still_raise():
+    with pytest.raises(TypeError, match='set'):
+        raw_json.dumps({'desks': RawJSON(DESKS), 'tags': {'window'}})
+
+
+def test_socketio_packet_round_trip():
+    class RawJSONPacket(Packet):
+        json = raw_json
+
+    update = {'date': '2025-01-01', 'desks': RawJSON(DESKS)}
+    encoded = RawJSONPacket(data=['desk_update', update], namespace='/desks').encode()
+
+    assert encoded == '2/desks,["desk_update",{"date":"2025-01-01","desks":' + DESKS + '}]'
+    decoded = RawJSONPacket(encoded_packet=encoded)
+    assert decoded.namespace == '/desks'
+    assert decoded.data == ['desk_update', {'date': '2025-01-01', 'desks': json.loads(DESKS)}]
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+class CountingEvent(threading.Event):
+    def __init__(self):
+        super().__init__()
+        self.waiters = 0
+
+    def wait(self, timeout=None):
+        self.waiters += 1
+        return super().wait(timeout)
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Call flight.do(key, fn) from callers threads, all while the first one runs fn; returns their outcomes."""
+    release = threading.Event()
+    started = threading.Event()
+    outcomes = []
+
+    def blocked():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call():
+        try:
+            outcomes.append(flight.do(key, blocked))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    threads[0].start()
+    started.wait(5)
+    done = flight._calls[key].done = CountingEvent()
+    for thread in threads[1:]:
+        thread.start()
+    while done.waiters < callers - 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    runs = []
+    outcomes = run_concurrently(flight, 'desks', lambda: runs.append(1) or ['desk'], 4)
+    assert runs == [1]
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True]
+    assert all(result == ['desk'] for result, _ in outcomes)
+    assert flight.in_flight() == 0
+
+
+def test_concurrent_calls_share_the_exception():
+    def fail():
+        raise RuntimeError("query failed")
+
+    outcomes = run_concurrently(SingleFlight(), 'desks', fail, 3)
+    assert len(outcomes) == 3 and all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+def test_nothing_is_kept_after_the_call():
+    flight = SingleFlight()
+    assert flight.do('desks', lambda: 1) == (1, False)
+    assert flight.do('desks', lambda: 2) == (2, False)
+    with pytest.raises(ValueError):
+        flight.do('desks', int, 'x')
+    assert flight.in_flight() == 0
+
+
+def start_blocked(flight, key, result, outcomes, **kwargs):
+    """Run flight.do(key, ...) on a thread until the returned event is set; waits for the call to start."""
+    release, started = threading.Event(), threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+        return result
+
+    thread = threading.Thread(target=lambda: outcomes.append(flight.do(key, blocked, **kwargs)))
+    thread.start()
+    started.wait(5)
+    return release, thread
+
+
+def test_caller_does_not_join_a_call_that_started_too_early():
+    flight = SingleFlight()
+    outcomes = []
+    release_early, early = start_blocked(flight, 'desks', 'before the change', outcomes)
+    changed_at = time.time()
+    while time.time() <= changed_at:
+        time.sleep(0.001)
+
+    release_late, late = start_blocked(flight, 'desks', 'after the change', outcomes, not_before=changed_at)
+    release_early.set()
+    early.join(5)
+    # the early call finishing leaves the later one for new callers to join
+    assert flight.in_flight() == 1
+    release_late.set()
+    late.join(5)
+    assert outcomes == [('before the change', False), ('after the change', False)]
+    assert flight.in_flight() == 0
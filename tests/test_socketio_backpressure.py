@@ -0,0 +1,82 @@
+import socketio
+
+from app.utils.socketio_backpressure import CHAIN, STATE, BackpressureMixin
+
+
+class Manager(BackpressureMixin, socketio.Manager):
+    pass
+
+
+class Packet:
+    def __init__(self, name, size=10):
+        self.name = name
+        self.data = b'x' * size
+
+
+class Server:
+    def start_background_task(self, target, *args):
+        target(*args)
+
+
+def make_manager(queued, **limits):
+    """A manager whose clients have queued[eio_sid] packets waiting; returns (manager, sent, resyncs)."""
+    manager = Manager()
+    manager.server = Server()
+    manager.backpressure.update(max_queued=2, max_buffer_packets=3, max_buffer_bytes=10 ** 6,
+                                policy='keep', **limits)
+    sent, resyncs = [], []
+    manager._send_now = lambda eio_sid, pkt: sent.append((eio_sid, pkt.name))
+    manager._queued = lambda eio_sid: queued.get(eio_sid)
+    manager.sid_from_eio_sid = lambda eio_sid, namespace: 'sid-' + eio_sid
+    manager.on_resync = lambda sid, key: resyncs.append((sid, key))
+    return manager, sent, resyncs
+
+
+def emit(manager, eio_sid, name, key=None, kind=None):
+    manager._classified((key, kind), manager._send_or_buffer, eio_sid, Packet(name))
+
+
+def test_client_that_keeps_up_is_sent_packets_directly():
+    manager, sent, _ = make_manager({'fast': 0})
+    emit(manager, 'fast', 'desks 1', '2025-01-01', STATE)
+    assert sent == [('fast', 'desks 1')]
+    assert manager.stats()['slow_clients'] == 0
+
+
+def test_newer_state_replaces_buffered_one_for_its_key():
+    manager, sent, _ = make_manager({'slow': 5})
+    emit(manager, 'slow', 'desks 1', '2025-01-01', STATE)
+    emit(manager, 'slow', 'other 1', '2025-01-02', STATE)
+    emit(manager, 'slow', 'desks 2', '2025-01-01', STATE)
+    assert sent == []
+    outbox = manager._outboxes['slow']
+    assert [pkt.name for _, _, pkt, _ in outbox.packets] == ['other 1', 'desks 2']
+    assert manager.stats()['events']['coalesced'] == 1
+
+
+def test_chained_packets_are_dropped_for_a_resync_when_over_the_limit():
+    manager, _, resyncs = make_manager({'slow': 5})
+    for n in range(4):
+        emit(manager, 'slow', f'delta {n}', '2025-01-01', CHAIN)
+    assert resyncs == [('sid-slow', '2025-01-01')]
+    assert manager._outboxes['slow'].packets == []
+
+    emit(manager, 'slow', 'delta 4', '2025-01-01', CHAIN)
+    assert manager._outboxes['slow'].packets == []
+    emit(manager, 'slow', 'snapshot', '2025-01-01', STATE)
+    emit(manager, 'slow', 'delta 5', '2025-01-01', CHAIN)
+    assert [pkt.name for _, _, pkt, _ in manager._outboxes['slow'].packets] == ['snapshot', 'delta 5']
+
+
+def test_outbox_is_sent_as_the_client_catches_up():
+    queued = {'slow': 5}
+    manager, sent, _ = make_manager(queued)
+    emit(manager, 'slow', 'desks 1', '2025-01-01', STATE)
+    emit(manager, 'slow', 'other 1', '2025-01-02', STATE)
+    manager._pump_once()
+    assert sent == []
+
+    queued['slow'] = 0
+    manager._pump_once()
+    assert sent == [('slow', 'desks 1'), ('slow', 'other 1')]
+    assert 'slow' not in manager._outboxes